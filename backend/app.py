@@ -1,20 +1,85 @@
 from flask import Flask
-from flask_cors import CORS 
+from flask_cors import CORS
 from snapshots.snapshot_runner import snapshots
 from transcription.transcription_api import transcription
 from evaluation.evaluation_api import evaluation
 from bodylanguage.eyecontactscore import contact_score
 from questions.questiongeneration import question_generation
 from questions.answerfeedback import answer_feedback
+from media.media_api import media
+from media.upload_stream import MAX_UPLOAD_BYTES
+from jobs.jobs_api import jobs
+from live.live_api import live
+from llm.llm_api import llm
+from telemetry.metrics_api import metrics
+from telemetry import tracing
+from resources import get_setting, warm_up
 
-app = Flask(__name__)
-CORS(app)  # Enabling CORS
+# Blueprints grouped by the kind of work they do, so production can serve each group
+# from its own Gunicorn pool (see deploy/): "vision" routes take uploads and decode
+# video (CPU-bound), "llm" routes mostly wait on the OpenAI API (I/O-bound).
+ROUTE_GROUPS = {
+    "vision": [
+        (snapshots, "/snapshots"),
+        (transcription, "/transcription"),
+        (contact_score, "/contact-score"),
+        (media, "/media"),
+        (jobs, "/jobs"),
+        (live, "/live"),
+        # Only for POST /generate-questions(/stream), which take a video upload and
+        # transcribe it; nginx sends the /<media_id> routes to the llm pool.
+        (question_generation, "/question_generation"),
+    ],
+    "llm": [
+        (evaluation, "/evaluation"),
+        (question_generation, "/question_generation"),
+        (answer_feedback, "/answer-feedback"),
+        (llm, "/llm"),
+    ],
+}
+
+def create_app(routes: str = "all") -> Flask:
+    """
+    Builds the Flask app with every blueprint ("all", the default) or only one of the
+    ROUTE_GROUPS. The module-level `app` is built from APP_ROUTES, which is what
+    deploy/gunicorn.conf.py serves.
+    """
+    if routes != "all" and routes not in ROUTE_GROUPS:
+        raise ValueError(f"Unknown route group '{routes}', expected all, {', '.join(ROUTE_GROUPS)}")
+
+    app = Flask(__name__)
+    CORS(app)  # Enabling CORS
+    # Requests that declare a bigger body are refused before anything is read.
+    app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_BYTES
+
+    for group, blueprints in ROUTE_GROUPS.items():
+        if routes in ("all", group):
+            for blueprint, url_prefix in blueprints:
+                # A blueprint listed in both groups is registered once in "all".
+                if blueprint.name not in app.blueprints:
+                    app.register_blueprint(blueprint, url_prefix=url_prefix)
+    # Every pool serves its own /metrics and traces its requests (see telemetry/).
+    app.register_blueprint(metrics)
+    tracing.init_app(app)
+
+    # Load configuration, detectors and the OpenAI client once, before the first request.
+    warm_up()
+    return app
+
+def shutdown_app(wait: bool = True):
+    """
+    Stops the background pools: lets queued jobs finish (or cancels them when
+    wait=False) and stops the attention worker processes and the judge threads.
+    """
+    from bodylanguage.parallel_attention import shutdown_pool
+    from jobs.job_queue import job_queue
+    from questions.answerfeedback import shutdown_judge_pool
+
+    job_queue.shutdown(wait=wait)
+    shutdown_judge_pool(wait=wait)
+    shutdown_pool()
+
+app = create_app(get_setting("APP_ROUTES", "all"))
 
-app.register_blueprint(snapshots, url_prefix="/snapshots")
-app.register_blueprint(transcription, url_prefix="/transcription")
-app.register_blueprint(evaluation, url_prefix="/evaluation")
-app.register_blueprint(contact_score, url_prefix="/contact-score")
-app.register_blueprint(question_generation, url_prefix="/question_generation")
-app.register_blueprint(answer_feedback, url_prefix="/answer-feedback")
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,287 @@
+"""
+Scores a directory of pitch videos (and/or .txt transcripts) offline: attention,
+transcription and rubric evaluation for each, written to one JSONL or Parquet file.
+
+Frame scoring for every video is spread over the shared attention process pool
+(bodylanguage.parallel_attention, ATTENTION_WORKERS processes), while transcription and
+evaluation run in --api-concurrency threads, so at most that many OpenAI calls are in
+flight (and they still go through llm.gateway's rate limits). Each finished stage is
+checkpointed in --store, keyed by file content, so an interrupted run resumes where it
+stopped, and re-scoring after a rubric change only re-runs the evaluations.
+
+Run from the backend directory:
+    python -m batch.batch_score archive/ --output scores.jsonl --pitch-type hackathon
+    python -m batch.batch_score archive/ --output scores.parquet --stages transcript,evaluation
+    python -m batch.batch_score --file pitch.txt --pitch-type "pitch deck"
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bodylanguage.eyecontactscore import ATTENTION_SAMPLE_RATE
+from bodylanguage.parallel_attention import (
+    ATTENTION_WORKERS,
+    plan_attention,
+    score_attention_plan,
+    shutdown_pool,
+)
+from evaluation.pitch_analysis import (
+    ANALYSIS_MODEL,
+    ANALYSIS_PROMPT_TEMPLATE,
+    LLM_COMBINED_ANALYSIS,
+)
+from evaluation.script_evaluation import (
+    EVALUATION_PROMPT_TEMPLATE,
+    evaluate_pitch,
+    evaluation_criteria,
+    load_pitch_text,
+)
+from llm.gateway import request_key
+from transcription.get_transcription import get_transcription
+from transcription.transcript_cache import hash_file
+
+from .results_store import ResultsStore
+
+VIDEO_EXTENSIONS = {".mp4", ".mov", ".m4v", ".webm", ".mkv", ".avi"}
+TRANSCRIPT_EXTENSIONS = {".txt"}
+STAGES = ("attention", "transcript", "evaluation")
+
+
+class StageStats:
+    """Items, time and media seconds per stage, for the throughput report."""
+
+    def __init__(self):
+        self.stages = {stage: {"done": 0, "resumed": 0, "failed": 0, "seconds": 0.0, "media_seconds": 0.0}
+                       for stage in STAGES}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, outcome: str, seconds: float = 0.0, media_seconds: float = 0.0):
+        with self._lock:
+            entry = self.stages[stage]
+            entry[outcome] += 1
+            entry["seconds"] += seconds
+            entry["media_seconds"] += media_seconds
+
+    def report(self, wall_seconds: float) -> str:
+        header = (f"{'stage':12} {'done':>6} {'resumed':>8} {'failed':>7} {'busy s':>9} {'items/min':>10} "
+                  f"{'media x':>8}")
+        lines = [header]
+        for stage, entry in self.stages.items():
+            per_minute = entry["done"] / wall_seconds * 60 if wall_seconds else 0.0
+            # Seconds of video analysed per second of wall time.
+            speed = f"{entry['media_seconds'] / wall_seconds:8.1f}" if entry["media_seconds"] else f"{'-':>8}"
+            lines.append(f"{stage:12} {entry['done']:6} {entry['resumed']:8} {entry['failed']:7} "
+                         f"{entry['seconds']:9.1f} {per_minute:10.1f} {speed}")
+        return "\n".join(lines)
+
+
+def find_inputs(directory: str, recursive: bool = True) -> list:
+    """
+    Returns [(path, "video" | "transcript"), ...] for the supported files, sorted by path.
+    """
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        if not recursive:
+            dirs.clear()
+        paths.extend(os.path.join(root, name) for name in files)
+    inputs = []
+    for path in sorted(paths):
+        extension = os.path.splitext(path)[1].lower()
+        if extension in VIDEO_EXTENSIONS:
+            inputs.append((path, "video"))
+        elif extension in TRANSCRIPT_EXTENSIONS:
+            inputs.append((path, "transcript"))
+    return inputs
+
+
+def rubric_fingerprint(pitch_type: str) -> str:
+    """
+    Identifies everything that decides an evaluation besides the transcript, so
+    evaluations are redone when the criteria, prompt or model change.
+    """
+    if LLM_COMBINED_ANALYSIS:
+        parts = ("combined", ANALYSIS_MODEL, ANALYSIS_PROMPT_TEMPLATE)
+    else:
+        parts = ("separate", "gpt-4o-mini", EVALUATION_PROMPT_TEMPLATE)
+    return request_key(*parts, pitch_type.lower(), evaluation_criteria(pitch_type))[:16]
+
+
+def run_stage(store: ResultsStore, stats: StageStats, key: str, stage: str, compute, media_seconds=None):
+    """
+    Returns the checkpointed result of `stage` for `key`, or computes and stores it.
+    `media_seconds(value)` gives the seconds of video the stage covered.
+    """
+    value = store.get(key, stage)
+    if value is not None:
+        stats.record(stage, "resumed")
+        return value
+    started = time.perf_counter()
+    try:
+        value = compute()
+    except Exception:
+        stats.record(stage, "failed", time.perf_counter() - started)
+        raise
+    seconds = time.perf_counter() - started
+    store.put(key, stage, value, seconds)
+    stats.record(stage, "done", seconds, media_seconds(value) if media_seconds else 0.0)
+    return value
+
+
+def score_attention(video_path: str, workers: int) -> dict:
+    plan = plan_attention(video_path, ATTENTION_SAMPLE_RATE)
+    summary = score_attention_plan(plan, workers)
+    return {
+        "duration": plan["segments"][-1][1] if plan["segments"] else 0.0,
+        "average": summary["average"],
+        "samples": summary["samples"],
+        "longest_gaze_loss": summary["longest_gaze_loss"],
+        "detector": summary["detector"],
+    }
+
+
+def score_item(path: str, kind: str, options, store: ResultsStore, stats: StageStats, api_pool) -> dict:
+    """
+    Runs the selected stages for one file and returns its output row. A failed stage
+    is reported in row["errors"] and the stages that don't depend on it still run.
+    """
+    sha256 = hash_file(path)
+    row = {"path": path, "kind": kind, "sha256": sha256, "pitch_type": options.pitch_type,
+           "rubric": options.rubric, "duration": None, "attention_score": None, "longest_gaze_loss": None,
+           "attention_samples": None, "transcript": None, "score": None, "evaluation": None, "errors": {}}
+
+    transcript = None
+    if kind == "transcript":
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            transcript = f.read()
+    elif "transcript" in options.stages or "evaluation" in options.stages:
+        # Sent to the API threads first, so Whisper works while the frames are scored.
+        transcript = api_pool.submit(run_stage, store, stats, sha256, "transcript",
+                                     lambda: get_transcription(path, content_hash=sha256))
+
+    if kind == "video" and "attention" in options.stages:
+        try:
+            attention = run_stage(store, stats, sha256, "attention",
+                                  lambda: score_attention(path, options.workers), lambda value: value["duration"])
+            row.update(duration=attention["duration"], attention_score=attention["average"],
+                       longest_gaze_loss=attention["longest_gaze_loss"], attention_samples=attention["samples"])
+        except Exception as e:  # noqa: BLE001
+            row["errors"]["attention"] = str(e)
+
+    if transcript is not None and not isinstance(transcript, str):
+        try:
+            transcript = transcript.result()
+        except Exception as e:  # noqa: BLE001
+            row["errors"]["transcript"] = str(e)
+            transcript = None
+    row["transcript"] = transcript
+
+    if "evaluation" in options.stages and transcript:
+        try:
+            evaluation = api_pool.submit(
+                run_stage, store, stats, f"{sha256}:{options.rubric}", "evaluation",
+                lambda: evaluate_pitch(transcript, options.pitch_type),
+            ).result()
+            row.update(evaluation=evaluation, score=evaluation.get("score"))
+        except Exception as e:  # noqa: BLE001
+            row["errors"]["evaluation"] = str(e)
+    elif "evaluation" in options.stages and "transcript" not in row["errors"]:
+        row["errors"]["evaluation"] = "Empty transcript"
+    return row
+
+
+def write_jsonl(rows: list, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(row) + "\n" for row in rows)
+
+
+def write_parquet(rows: list, path: str):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Nested values are stored as JSON strings: evaluations don't all have the same keys.
+    flat = [{**row, "evaluation": json.dumps(row["evaluation"]) if row["evaluation"] is not None else None,
+             "errors": json.dumps(row["errors"])} for row in rows]
+    pq.write_table(pa.Table.from_pylist(flat), path)
+
+
+def run_batch(options) -> list:
+    inputs = find_inputs(options.directory, options.recursive)
+    if not inputs:
+        raise SystemExit(f"No videos or .txt transcripts found in {options.directory}")
+    store = ResultsStore(options.store)
+    stats = StageStats()
+    print(f"{len(inputs)} files, stages: {', '.join(options.stages)}, rubric {options.rubric}")
+
+    started = time.perf_counter()
+    rows = [None] * len(inputs)
+    finished = 0
+    lock = threading.Lock()
+
+    def work(index, path, kind):
+        nonlocal finished
+        row = score_item(path, kind, options, store, stats, api_pool)
+        rows[index] = row
+        with lock:
+            finished += 1
+            status = f"score {row['score']}" if row["score"] is not None else "done"
+            if row["errors"]:
+                status += f", failed: {', '.join(row['errors'])}"
+            print(f"[{finished}/{len(inputs)}] {os.path.relpath(path, options.directory)}: {status}", flush=True)
+
+    # Item threads mostly wait (on the attention pool or the API threads); --jobs of them
+    # keep the process pool busy with one video's ranges while another is being planned.
+    with ThreadPoolExecutor(max_workers=options.api_concurrency, thread_name_prefix="batch-api") as api_pool, \
+            ThreadPoolExecutor(max_workers=options.jobs, thread_name_prefix="batch-item") as item_pool:
+        for future in [item_pool.submit(work, index, path, kind) for index, (path, kind) in enumerate(inputs)]:
+            future.result()
+    wall_seconds = time.perf_counter() - started
+    shutdown_pool()
+
+    if options.output.endswith(".parquet"):
+        write_parquet(rows, options.output)
+    else:
+        write_jsonl(rows, options.output)
+    failed = sum(1 for row in rows if row["errors"])
+    print(f"\nWrote {len(rows)} rows to {options.output} ({failed} with errors) in {wall_seconds:.1f} s\n")
+    print(stats.report(wall_seconds))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", nargs="?", help="folder of videos and/or .txt transcripts")
+    parser.add_argument("--input-text", help="evaluate this pitch text and print the result")
+    parser.add_argument("--file", help="evaluate the pitch text in this file and print the result")
+    parser.add_argument("--pitch-type", default="hackathon", help="rubric: 'hackathon' or 'pitch deck'")
+    parser.add_argument("--output", default="batch_results.jsonl", help="a .jsonl or .parquet file")
+    parser.add_argument("--store", default="batch_results.sqlite3", help="checkpoint file, reused to resume")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"comma-separated subset of {', '.join(STAGES)}")
+    parser.add_argument("--workers", type=int, default=ATTENTION_WORKERS, help="1 scores frames in this process instead of the ATTENTION_WORKERS pool")
+    parser.add_argument("--api-concurrency", type=int, default=4, help="OpenAI calls in flight at once")
+    parser.add_argument("--jobs", type=int, default=4, help="files in progress at once")
+    parser.add_argument("--no-recursive", dest="recursive", action="store_false")
+    args = parser.parse_args()
+
+    if not args.directory:
+        # A single pitch text, as script_evaluation.load_pitch_text reads it.
+        print(json.dumps(evaluate_pitch(load_pitch_text(args), args.pitch_type), indent=2))
+        return
+
+    args.stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+    if args.output.endswith(".parquet"):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error("writing Parquet needs pyarrow (uv pip install pyarrow); use a .jsonl output instead")
+    args.rubric = rubric_fingerprint(args.pitch_type)
+    run_batch(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+
+class ResultsStore:
+    """
+    Checkpoints for batch runs: one JSON value per (key, stage) in a local SQLite file.
+    Keys are content hashes (plus the rubric for evaluations), so a resumed run skips
+    every stage that already finished, even if the files were moved or renamed.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT NOT NULL, stage TEXT NOT NULL, value TEXT NOT NULL, seconds REAL NOT NULL, "
+                "created REAL NOT NULL, PRIMARY KEY (key, stage))"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str, stage: str):
+        """Returns the stored value of a finished stage, or None."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM results WHERE key = ? AND stage = ?", (key, stage)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def put(self, key: str, stage: str, value, seconds: float):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                (key, stage, json.dumps(value), seconds, time.time()),
+            )
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT stage, COUNT(*) FROM results GROUP BY stage").fetchall()
+        return dict(rows)
@@ -0,0 +1,75 @@
+"""
+Cost of turning per-frame detections into the attention summary, NumPy vs plain Python.
+
+Detection itself is identical in both cases; this times only the post-processing
+(scores, 3 s smoothing, gaze-loss streaks, per-second timeline) over synthetic
+measurements, for a 10-minute video at 1 fps up to a 1-hour video at every frame.
+
+Run from the backend directory:
+    python -m benchmarks.bench_attention_model
+"""
+import time
+
+import numpy as np
+
+from bodylanguage.attention_model import frames_array, summarize_attention
+
+
+def python_summary(samples, rate, window=3.0, below=50.0, min_seconds=2.0):
+    # The same summary written as per-frame Python loops, for comparison.
+    scores = [100 if faces and eyes >= 2 else 50 if faces else 0 for _, faces, eyes, _ in samples]
+    timestamps = [timestamp for timestamp, _, _, _ in samples]
+    smoothed, low, high, total = [], 0, 0, 0
+    for timestamp in timestamps:
+        # Two-pointer sliding window over the sorted timestamps.
+        while high < len(timestamps) and timestamps[high] <= timestamp + window / 2:
+            total += scores[high]
+            high += 1
+        while timestamps[low] < timestamp - window / 2:
+            total -= scores[low]
+            low += 1
+        smoothed.append(total / (high - low))
+    streaks, start = [], None
+    for index, value in enumerate([*smoothed, below]):
+        if value < below and start is None:
+            start = index
+        elif value >= below and start is not None:
+            duration = timestamps[index - 1] + 1 / rate - timestamps[start]
+            if duration >= min_seconds:
+                streaks.append((timestamps[start], duration))
+            start = None
+    buckets = {}
+    for timestamp, score in zip(timestamps, scores):
+        buckets.setdefault(int(timestamp), []).append(score)
+    return {second: sum(values) / len(values) for second, values in buckets.items()}, streaks
+
+
+def synthetic(frame_count, rate, rng):
+    faces = (rng.random(frame_count) > 0.2).astype(int)
+    eyes = faces * rng.integers(0, 3, frame_count)
+    return [(index / rate, int(faces[index]), int(eyes[index]), 0.1) for index in range(frame_count)]
+
+
+def main():
+    rng = np.random.default_rng(36)
+    print(f"{'case':24} {'frames':>8} {'python s':>9} {'pack s':>9} {'numpy s':>9} {'speedup':>8}")
+    for name, seconds, rate in [("10 min @ 1 fps", 600, 1.0), ("10 min @ 30 fps", 600, 30.0),
+                                ("60 min @ 30 fps", 3600, 30.0)]:
+        samples = synthetic(int(seconds * rate), rate, rng)
+
+        # Packing happens once per frame as detections come in; the summary is what reruns.
+        started = time.perf_counter()
+        frames = frames_array(samples)
+        packing = time.perf_counter() - started
+        started = time.perf_counter()
+        summarize_attention(frames, rate)
+        vectorized = time.perf_counter() - started
+
+        started = time.perf_counter()
+        python_summary(samples, rate)
+        loops = time.perf_counter() - started
+        print(f"{name:24} {len(samples):8} {loops:9.3f} {packing:9.3f} {vectorized:9.3f} {loops / vectorized:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
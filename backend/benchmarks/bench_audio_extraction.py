@@ -0,0 +1,83 @@
+"""
+Compares the old moviepy audio extraction against the ffmpeg paths in
+transcription.extractaudio.
+
+Generates a synthetic clip with a 128 kb/s stereo AAC track (what phones usually record)
+and a WebM clip with Opus audio, then times and sizes:
+  - moviepy: the original VideoFileClip(...).audio.write_audiofile(.mp3)
+  - ffmpeg_opus / ffmpeg_mp3: 16 kHz mono re-encode
+  - ffmpeg_copy: stream copy of an already compact track (the WebM clip)
+
+Run from the backend directory:
+    python -m benchmarks.bench_audio_extraction --duration 60
+"""
+import argparse
+import os
+import subprocess
+import tempfile
+import time
+
+import imageio_ffmpeg
+
+from transcription import extractaudio
+
+
+def make_clip(path, duration, audio_args):
+    subprocess.run(
+        [imageio_ffmpeg.get_ffmpeg_exe(), "-y", "-v", "error",
+         "-f", "lavfi", "-i", "testsrc2=size=640x360:rate=30",
+         "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=44100",
+         "-f", "lavfi", "-i", "anoisesrc=color=pink:amplitude=0.1:sample_rate=44100",
+         "-filter_complex", "[1:a][2:a]amix=inputs=2,pan=stereo|c0=c0|c1=c0[a]",
+         "-map", "0:v", "-map", "[a]", "-t", str(duration), *audio_args, path],
+        check=True,
+    )
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - started, result
+
+
+def run_ffmpeg(video_path, output_base, audio_format):
+    extractaudio.AUDIO_FORMAT = audio_format
+    return extractaudio._ffmpeg_extract(video_path, output_base)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", help="Benchmark an existing video instead of generating one")
+    parser.add_argument("--duration", type=int, default=60)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        video_path = args.video
+        if video_path is None:
+            video_path = os.path.join(temp_dir, "clip.mp4")
+            print(f"Generating {args.duration}s clips...")
+            make_clip(video_path, args.duration,
+                      ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "aac", "-b:a", "128k"])
+        webm_path = os.path.join(temp_dir, "clip.webm")
+        make_clip(webm_path, args.duration, ["-c:v", "libvpx", "-b:v", "500k", "-c:a", "libopus", "-b:a", "48k"])
+        print(f"Source audio: {extractaudio.probe_audio_stream(video_path)}, "
+              f"webm audio: {extractaudio.probe_audio_stream(webm_path)}\n")
+
+        rows = [
+            ("moviepy", *timed(extractaudio._moviepy_extract, video_path, os.path.join(temp_dir, "moviepy"))),
+            ("ffmpeg_opus", *timed(run_ffmpeg, video_path, os.path.join(temp_dir, "opus"), "opus")),
+            ("ffmpeg_mp3", *timed(run_ffmpeg, video_path, os.path.join(temp_dir, "mp3"), "mp3")),
+            ("ffmpeg_copy (webm)", *timed(run_ffmpeg, webm_path, os.path.join(temp_dir, "copy"), "opus")),
+        ]
+
+        baseline_seconds, baseline_path = rows[0][1], rows[0][2]
+        baseline_size = os.path.getsize(baseline_path)
+        print(f"{'case':20} {'seconds':>8} {'speedup':>8} {'size KB':>9} {'smaller':>8}")
+        for name, seconds, path in rows:
+            size = os.path.getsize(path)
+            print(f"{name:20} {seconds:8.2f} {baseline_seconds / seconds:7.1f}x "
+                  f"{size / 1024:9.0f} {baseline_size / size:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
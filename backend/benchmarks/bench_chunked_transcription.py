@@ -0,0 +1,76 @@
+"""
+Measures chunked, concurrent transcription against the local stub Whisper server.
+
+Generates a speech-like recording (tone bursts separated by short pauses), then times:
+  - single: the whole file in one request (what transcribe_audio used to do)
+  - chunked xN: transcribe_chunked() with N concurrent requests
+
+With the stub's latency proportional to audio length, wall time should drop close to
+linearly with the number of chunks in flight.
+
+Run from the backend directory:
+    python -m benchmarks.bench_chunked_transcription --minutes 20
+    python -m benchmarks.bench_chunked_transcription --minutes 60 --fail-rate 0.1
+"""
+import argparse
+import os
+import subprocess
+import tempfile
+import time
+
+import imageio_ffmpeg
+
+from benchmarks.stub_openai import start_stub_server
+from transcription import chunked_transcription
+from transcription.chunked_transcription import transcribe_chunk, transcribe_chunked
+
+
+def make_recording(path, seconds):
+    # 4.5 s of "speech" then 0.5 s of silence, so silencedetect has cut points.
+    expression = "if(lt(mod(t,5),4.5),0.3*sin(2*PI*(220+40*mod(floor(t),5))*t),0)"
+    subprocess.run(
+        [imageio_ffmpeg.get_ffmpeg_exe(), "-y", "-v", "error",
+         "-f", "lavfi", "-i", f"aevalsrc='{expression}':s=16000:d={seconds}",
+         "-c:a", "libopus", "-b:a", "24k", path],
+        check=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=20)
+    parser.add_argument("--chunk-seconds", type=float, default=120)
+    parser.add_argument("--concurrency", default="1,2,4,8")
+    parser.add_argument("--latency-per-second", type=float, default=0.02)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency_per_second=args.latency_per_second, fail_rate=args.fail_rate)
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ["OPENAI_API_KEY"] = "stub"
+    chunked_transcription.RETRY_BASE_SECONDS = 0.1
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        audio_path = os.path.join(temp_dir, "recording.ogg")
+        print(f"Generating a {args.minutes:g} minute recording...")
+        make_recording(audio_path, args.minutes * 60)
+        print(f"{os.path.getsize(audio_path) / 1024 / 1024:.1f} MB\n")
+
+        started = time.perf_counter()
+        transcribe_chunk(audio_path)
+        single = time.perf_counter() - started
+
+        print(f"{'case':16} {'chunks':>6} {'segments':>8} {'seconds':>8} {'speedup':>8}")
+        print(f"{'single':16} {1:6d} {'':>8} {single:8.2f} {1.0:7.1f}x")
+        for concurrency in (int(value) for value in args.concurrency.split(",")):
+            started = time.perf_counter()
+            result = transcribe_chunked(audio_path, args.chunk_seconds, concurrency)
+            seconds = time.perf_counter() - started
+            print(f"{f'chunked x{concurrency}':16} {result['chunks']:6d} {len(result['segments']):8d} "
+                  f"{seconds:8.2f} {single / seconds:7.1f}x")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
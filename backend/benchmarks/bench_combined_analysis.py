@@ -0,0 +1,81 @@
+"""
+One combined pitch analysis (evaluation.pitch_analysis) vs the three separate
+completions for feedback, evaluation and questions, against the local stub server.
+
+The separate calls run one after another, as the routes send them during a full
+review; prompt and completion tokens are the ones the stub reports in `usage`.
+--minutes sets the transcript length; long ones show the token-budget trimming.
+
+Run from the backend directory:
+    python -m benchmarks.bench_combined_analysis --minutes 5
+    python -m benchmarks.bench_combined_analysis --minutes 120
+"""
+import argparse
+import os
+import time
+
+from benchmarks.stub_openai import start_stub_server
+
+# About 130 spoken words per minute.
+MINUTE = (
+    "We help founders rehearse their pitch. Our app measures eye contact and pacing, transcribes the talk "
+    "and suggests the questions investors are likely to ask. Teams at three accelerators use it every week, "
+    "and we charge a monthly subscription per seat. The market is every startup that raises money, and we "
+    "start with accelerators because they bring whole cohorts at once. Our next step is integrating with "
+    "video call tools so founders can practise with real investors and get feedback on the spot. "
+)
+
+
+def tokens(model):
+    from telemetry.tracing import LLM_TOKENS
+    return LLM_TOKENS.value(model=model, type="prompt"), LLM_TOKENS.value(model=model, type="completion")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=5)
+    parser.add_argument("--pitch-type", default="pitch deck")
+    parser.add_argument("--token-latency", type=float, default=0.02, help="Stub latency per completion token")
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(token_latency=args.token_latency)
+    os.environ.update(OPENAI_BASE_URL=base_url, OPENAI_API_KEY="stub", LLM_CACHE_ENABLED="0")
+    from bodylanguage.eyecontactscore import feedback_messages
+    from evaluation.pitch_analysis import (
+        analyse_pitch,
+        estimate_tokens,
+        trim_transcript,
+    )
+    from evaluation.script_evaluation import evaluation_messages
+    from llm.chat import chat_completion
+    from questions.questiongeneration import questions_messages
+
+    transcript = MINUTE * max(1, round(args.minutes))
+    print(f"{args.minutes:g} minute transcript: ~{estimate_tokens(transcript)} tokens, "
+          f"~{estimate_tokens(trim_transcript(transcript))} after trimming\n")
+
+    def separate():
+        chat_completion(feedback_messages(transcript), "gpt-4o", max_tokens=300)
+        chat_completion(evaluation_messages(transcript, args.pitch_type), "gpt-4o-mini",
+                        response_format={"type": "json_object"}, max_tokens=2000)
+        chat_completion(questions_messages(transcript), "gpt-4o", response_format={"type": "json_object"},
+                        max_tokens=2000)
+
+    def combined():
+        analyse_pitch(transcript, args.pitch_type)
+
+    print(f"{'mode':22} {'calls':>5} {'seconds':>8} {'prompt tokens':>14} {'completion tokens':>18}")
+    for name, calls, run in [("three separate calls", 3, separate), ("one combined call", 1, combined)]:
+        before = [tokens(model) for model in ("gpt-4o", "gpt-4o-mini")]
+        started = time.perf_counter()
+        run()
+        seconds = time.perf_counter() - started
+        after = [tokens(model) for model in ("gpt-4o", "gpt-4o-mini")]
+        prompt = sum(a[0] - b[0] for a, b in zip(after, before))
+        completion = sum(a[1] - b[1] for a, b in zip(after, before))
+        print(f"{name:22} {calls:5} {seconds:8.2f} {prompt:14.0f} {completion:18.0f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
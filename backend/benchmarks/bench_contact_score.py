@@ -0,0 +1,94 @@
+"""
+End-to-end /contact-score latency: the old serial pipeline against the dependency graph.
+
+Generates a clip with audio and runs it through:
+  - serial: analyse_attention -> get_transcription -> generate_feedback, one after another
+  - graph:  upload_contact_score_stages() on jobs.dag.run_dag, where frame scoring
+            overlaps audio extraction and Whisper
+
+Whisper and the LLM are served by the local stub (latency grows with audio length), and
+every run uses a fresh content hash so the transcript cache never answers.
+
+Run from the backend directory:
+    python -m benchmarks.bench_contact_score --duration 60
+"""
+import argparse
+import os
+import subprocess
+import tempfile
+import time
+import uuid
+
+import imageio_ffmpeg
+
+from benchmarks.stub_openai import start_stub_server
+
+
+def make_clip(path, duration):
+    subprocess.run(
+        [imageio_ffmpeg.get_ffmpeg_exe(), "-y", "-v", "error",
+         "-f", "lavfi", "-i", "testsrc2=size=1280x720:rate=30",
+         "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=44100",
+         "-t", str(duration), "-c:v", "libx264", "-g", "30", "-pix_fmt", "yuv420p",
+         "-c:a", "aac", "-b:a", "128k", path],
+        check=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", help="Benchmark an existing video instead of generating one")
+    parser.add_argument("--duration", type=int, default=60)
+    parser.add_argument("--latency-per-second", type=float, default=0.08,
+                        help="Stub Whisper latency per second of audio")
+    parser.add_argument("--runs", type=int, default=2)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency_per_second=args.latency_per_second)
+    os.environ.update(OPENAI_BASE_URL=base_url, OPENAI_API_KEY="stub", TRANSCRIPT_CACHE_DIR=tempfile.mkdtemp())
+    from bodylanguage.eyecontactscore import (
+        analyse_attention,
+        generate_feedback,
+        upload_contact_score_stages,
+    )
+    from jobs.dag import run_dag
+    from transcription.get_transcription import get_transcription
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        video_path = args.video
+        if video_path is None:
+            video_path = os.path.join(temp_dir, "clip.mp4")
+            print(f"Generating a {args.duration}s 720p clip with audio...")
+            make_clip(video_path, args.duration)
+
+        def serial():
+            timings = {}
+            started = time.perf_counter()
+            analyse_attention(video_path)
+            timings["attention"] = time.perf_counter() - started
+            transcript = get_transcription(video_path, content_hash=uuid.uuid4().hex)
+            timings["transcript"] = time.perf_counter() - started - timings["attention"]
+            generate_feedback(transcript)
+            timings["feedback"] = time.perf_counter() - started - timings["attention"] - timings["transcript"]
+            return time.perf_counter() - started, timings
+
+        def graph():
+            started = time.perf_counter()
+            timings = run_dag(upload_contact_score_stages(video_path, uuid.uuid4().hex, temp_dir), {})
+            return time.perf_counter() - started, timings
+
+        print(f"\n{'run':8} {'serial':>8} {'graph':>8} {'speedup':>8}   graph stages (start +seconds)")
+        for run in range(args.runs):
+            serial_seconds, serial_timings = serial()
+            graph_seconds, graph_timings = graph()
+            stages = ", ".join(f"{name} {t['start']:.1f}+{t['seconds']:.1f}" for name, t in graph_timings.items())
+            print(f"{run:<8d} {serial_seconds:8.2f} {graph_seconds:8.2f} {serial_seconds / graph_seconds:7.2f}x   {stages}")
+        ideal = max(serial_timings["attention"], serial_timings["transcript"]) + serial_timings["feedback"]
+        print("\nSerial stages: " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in serial_timings.items()))
+        print(f"max(vision, transcription) + LLM = {ideal:.2f}s")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Face detector backends compared on the frames attention scoring would sample.
+
+Frames are decoded up front, so only detection is timed. For every backend (and batch
+size for the batched ones) this prints frames/sec, then how often each backend agrees
+with the reference backend (the first one listed) on face presence and on the 0/50/100
+frame score. Backends whose model files are missing are skipped with the reason; fetch
+them with `python -m bodylanguage.detectors download ssd yunet`.
+
+Run from the backend directory:
+    python -m benchmarks.bench_face_detectors pitch.mp4
+    python -m benchmarks.bench_face_detectors pitch.mp4 --backends haar,yunet --rate 2 --batch 1,8,16
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from bodylanguage.attention_model import frame_scores, frames_array
+from bodylanguage.detectors import DETECTORS
+from bodylanguage.parallel_attention import FRAME_SIZE
+from media.frame_sampler import sample_frames
+
+
+def measure_all(detector, frames, batch_size):
+    measurements = []
+    for start in range(0, len(frames), batch_size):
+        measurements.extend(detector.measure(frames[start:start + batch_size]))
+    return measurements
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("video")
+    parser.add_argument("--backends", default=",".join(DETECTORS))
+    parser.add_argument("--rate", type=float, default=1.0)
+    parser.add_argument("--batch", default="1,8", help="batch sizes to try for the SSD backend")
+    args = parser.parse_args()
+    cv2.setNumThreads(1)
+
+    frames = [(timestamp, frame) for _, timestamp, frame in sample_frames(args.video, rate=args.rate, size=FRAME_SIZE)]
+    print(f"{len(frames)} frames from {args.video}\n")
+    grays = [cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) for _, frame in frames]
+    timestamps = [timestamp for timestamp, _ in frames]
+
+    reference = None
+    print(f"{'backend':14} {'frames/s':>9} {'faces agree':>12} {'score agree':>12} {'mean |diff|':>12}")
+    for name in args.backends.split(","):
+        try:
+            detector = DETECTORS[name]()
+        except ValueError as e:
+            print(f"{name:14} skipped: {e}")
+            continue
+        inputs = grays if detector.grayscale else [frame for _, frame in frames]
+        batch_sizes = [int(size) for size in args.batch.split(",")] if name == "ssd" else [1]
+
+        for batch_size in batch_sizes:
+            started = time.perf_counter()
+            measurements = measure_all(detector, inputs, batch_size)
+            fps = len(inputs) / (time.perf_counter() - started)
+
+            measured = frames_array([(timestamp, *m) for timestamp, m in zip(timestamps, measurements)])
+            label = name if len(batch_sizes) == 1 else f"{name} x{batch_size}"
+            if reference is None:
+                reference = measured
+                print(f"{label:14} {fps:9.1f} {'(reference)':>12}")
+                continue
+            faces_agree = np.mean((measured["faces"] > 0) == (reference["faces"] > 0)) * 100
+            scores, reference_scores = frame_scores(measured), frame_scores(reference)
+            score_agree = np.mean(scores == reference_scores) * 100
+            mean_diff = np.abs(scores - reference_scores).mean()
+            print(f"{label:14} {fps:9.1f} {faces_agree:11.1f}% {score_agree:11.1f}% {mean_diff:12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Detect-then-track vs detecting on every sample, on one video.
+
+Frames are decoded up front, so only detection/tracking is timed. For every sample
+rate this prints the CPU time of full detection on every sample, the time with
+bodylanguage.tracking.FaceTracker, how many samples still ran the full detector, and
+how often the tracked measurements agree with full detection.
+
+Run from the backend directory:
+    python -m benchmarks.bench_face_tracking pitch.mp4
+    python -m benchmarks.bench_face_tracking pitch.mp4 --rates 1,5 --redetect 10 --backend yunet
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from bodylanguage.attention_model import frame_scores, frames_array
+from bodylanguage.detectors import DETECTORS
+from bodylanguage.parallel_attention import FRAME_SIZE
+from bodylanguage.tracking import FaceTracker
+from media.frame_sampler import sample_frames
+
+
+def timed_measure(detector, frames):
+    started = time.perf_counter()
+    measurements = detector.measure([frame for _, frame in frames])
+    seconds = time.perf_counter() - started
+    return frames_array([(timestamp, *m) for (timestamp, _), m in zip(frames, measurements)]), seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("video")
+    parser.add_argument("--rates", default="1,5")
+    parser.add_argument("--redetect", type=int, default=10, help="samples between full detections")
+    parser.add_argument("--backend", default="haar", choices=list(DETECTORS))
+    args = parser.parse_args()
+    cv2.setNumThreads(1)
+    detector = DETECTORS[args.backend]()
+
+    print(f"{'rate':>5} {'samples':>8} {'detect s':>9} {'track s':>8} {'speedup':>8} {'detector runs':>14}"
+          f" {'faces agree':>12} {'score agree':>12}")
+    for rate in [float(rate) for rate in args.rates.split(",")]:
+        frames = [(timestamp, frame) for _, timestamp, frame in sample_frames(
+            args.video, rate=rate, size=FRAME_SIZE, grayscale=detector.grayscale, method="grab")]
+
+        full, full_seconds = timed_measure(detector, frames)
+        tracker = FaceTracker(detector, redetect_frames=args.redetect)
+        tracked, tracked_seconds = timed_measure(tracker, frames)
+
+        faces_agree = np.mean((full["faces"] > 0) == (tracked["faces"] > 0)) * 100
+        score_agree = np.mean(frame_scores(full) == frame_scores(tracked)) * 100
+        print(f"{rate:5.1f} {len(frames):8} {full_seconds:9.2f} {tracked_seconds:8.2f}"
+              f" {full_seconds / tracked_seconds:7.1f}x {tracker.detections:14} {faces_agree:11.1f}% {score_agree:11.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Compares the old "cap.read() every frame" loops against media.frame_sampler.
+
+Generates a synthetic H.264 clip (60 fps by default) with the bundled ffmpeg and times:
+  - legacy_attention: the original eyecontactscore loop (read all, keep every 30th)
+  - legacy_snapshots: the original snapshot_runner loop (read all, keep one per second)
+  - sampler_<method>: sample_frames() at the same rates
+
+Run from the backend directory:
+    python -m benchmarks.bench_frame_sampling --duration 30 --fps 60 --gop 60
+"""
+import argparse
+import os
+import subprocess
+import tempfile
+import time
+
+import cv2
+import imageio_ffmpeg
+
+from media.frame_sampler import probe_keyframes, sample_frames
+
+
+def make_clip(path, duration, fps, width, height, gop):
+    command = [
+        imageio_ffmpeg.get_ffmpeg_exe(), "-y", "-v", "error",
+        "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate={fps}",
+        "-t", str(duration), "-c:v", "libx264", "-pix_fmt", "yuv420p",
+    ]
+    if gop:
+        command += ["-g", str(gop)]
+    subprocess.run([*command, path], check=True)
+
+
+def legacy_attention(video_path):
+    cap = cv2.VideoCapture(video_path)
+    frames = 0
+    frame_count = 0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if frame_count % 30 != 0:
+            frame_count += 1
+            continue
+        frame = cv2.resize(frame, (640, 480))
+        cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        frames += 1
+        frame_count += 1
+    cap.release()
+    return frames
+
+
+def legacy_snapshots(video_path):
+    cap = cv2.VideoCapture(video_path)
+    frame_interval = int(cap.get(cv2.CAP_PROP_FPS))
+    frames = 0
+    frame_count = 0
+    while True:
+        ret, _ = cap.read()
+        if not ret:
+            break
+        if frame_count % frame_interval == 0:
+            frames += 1
+        frame_count += 1
+    cap.release()
+    return frames
+
+
+def timed(func, *args, **kwargs):
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", help="Benchmark an existing video instead of generating one")
+    parser.add_argument("--duration", type=int, default=30)
+    parser.add_argument("--fps", type=int, default=60)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--gop", type=int, default=60, help="Keyframe interval in frames (0 = encoder default)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        video_path = args.video
+        if video_path is None:
+            video_path = os.path.join(temp_dir, "clip.mp4")
+            print(f"Generating {args.duration}s {args.width}x{args.height}@{args.fps} clip (gop={args.gop or 'default'})...")
+            make_clip(video_path, args.duration, args.fps, args.width, args.height, args.gop)
+
+        fps = cv2.VideoCapture(video_path).get(cv2.CAP_PROP_FPS)
+        print(f"Keyframes: {len(probe_keyframes(video_path))}, fps: {fps:.2f}\n")
+
+        def run_sampler(rate, method, **kwargs):
+            return sum(1 for _ in sample_frames(video_path, rate=rate, method=method, **kwargs))
+
+        attention_rate = fps / 30
+        rows = [
+            ("legacy_attention", None, *timed(legacy_attention, video_path)),
+            ("legacy_snapshots", None, *timed(legacy_snapshots, video_path)),
+        ]
+        for method in ("grab", "keyframes", "auto"):
+            rows.append((f"sampler_{method} (attention)", "legacy_attention",
+                         *timed(run_sampler, attention_rate, method, size=(640, 480), grayscale=True)))
+            rows.append((f"sampler_{method} (snapshots)", "legacy_snapshots",
+                         *timed(run_sampler, 1.0, method)))
+
+        baselines = {name: seconds for name, _, seconds, _ in rows if name.startswith("legacy")}
+        print(f"{'case':36} {'frames':>7} {'seconds':>9} {'speedup':>8}")
+        for name, baseline, seconds, frames in rows:
+            speedup = f"{baselines[baseline] / seconds:7.1f}x" if baseline else ""
+            print(f"{name:36} {frames:7d} {seconds:9.2f} {speedup:>8}")
+
+
+if __name__ == "__main__":
+    main()
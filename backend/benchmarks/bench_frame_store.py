@@ -0,0 +1,69 @@
+"""
+Per-frame JPEG files vs the frame store (media.frame_store), on one video.
+
+For both formats this times writing the sampled frames, then reading every frame back
+for analysis (imread + decode vs a memory-mapped view), and reports the bytes on disk.
+The frame store only encodes a JPEG when a thumbnail is requested, timed separately.
+
+Run from the backend directory:
+    python -m benchmarks.bench_frame_store pitch.mp4 --rate 1
+"""
+import argparse
+import glob
+import os
+import tempfile
+import time
+
+import cv2
+
+from media import frame_store
+from media.frame_sampler import sample_frames
+
+
+def folder_size(path):
+    return sum(os.path.getsize(file_path) for file_path in glob.glob(os.path.join(path, "**", "*"), recursive=True)
+               if os.path.isfile(file_path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("video")
+    parser.add_argument("--rate", type=float, default=1.0)
+    args = parser.parse_args()
+    cv2.setNumThreads(1)
+    work_dir = tempfile.mkdtemp()
+    frame_store.FRAMES_FOLDER = work_dir
+
+    # The old snapshot format: one JPEG per sampled frame at full resolution.
+    jpeg_dir = os.path.join(work_dir, "jpeg")
+    os.makedirs(jpeg_dir)
+    started = time.perf_counter()
+    for count, (_, _, frame) in enumerate(sample_frames(args.video, rate=args.rate)):
+        cv2.imwrite(os.path.join(jpeg_dir, f"frame_{count:04d}.jpg"), frame)
+    jpeg_write = time.perf_counter() - started
+    started = time.perf_counter()
+    checksum = sum(int(cv2.imread(path).mean()) for path in sorted(glob.glob(os.path.join(jpeg_dir, "*.jpg"))))
+    jpeg_read = time.perf_counter() - started
+    jpeg_bytes = folder_size(jpeg_dir)
+
+    started = time.perf_counter()
+    index = frame_store.create_frame_store(args.video, "0" * 32, rate=args.rate)
+    store_write = time.perf_counter() - started
+    store = frame_store.open_frame_store("0" * 32)
+    started = time.perf_counter()
+    checksum = sum(int(frame.mean()) for _, frame in store)
+    store_read = time.perf_counter() - started
+    store_bytes = folder_size(store.path)
+    started = time.perf_counter()
+    store.thumbnail(0)
+    thumbnail = time.perf_counter() - started
+
+    print(f"{index['count']} frames at {args.rate} fps, store frames {index['width']}x{index['height']} (checksum {checksum})\n")
+    print(f"{'format':14} {'write s':>8} {'read all s':>11} {'MB on disk':>11}")
+    print(f"{'jpeg files':14} {jpeg_write:8.2f} {jpeg_read:11.3f} {jpeg_bytes / 1e6:11.1f}")
+    print(f"{'frame store':14} {store_write:8.2f} {store_read:11.3f} {store_bytes / 1e6:11.1f}")
+    print(f"\nfirst 160px thumbnail: {thumbnail * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
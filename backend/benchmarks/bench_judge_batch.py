@@ -0,0 +1,73 @@
+"""
+A mock Q&A session judged one question at a time against the batch endpoint.
+
+Times, against the local stub server:
+  - sequential: N calls to /answer-feedback/judge-responses, one after another (what
+    Answer.jsx does today)
+  - batch: one call to /judge-responses/batch
+  - batch/stream: one call to /judge-responses/batch/stream, to the first and last result
+
+Run from the backend directory:
+    python -m benchmarks.bench_judge_batch --questions 10 --concurrency 5
+    python -m benchmarks.bench_judge_batch --rpm 120     # with a client-side rate limit
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.stub_openai import QUESTIONS, start_stub_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--rpm", type=int, default=0, help="LLM_RATE_LIMIT_OPENAI_RPM (0 = no limit)")
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server()
+    os.environ.update(
+        OPENAI_BASE_URL=base_url,
+        OPENAI_API_KEY="stub",
+        JUDGE_BATCH_CONCURRENCY=str(args.concurrency),
+        LLM_RATE_LIMIT_OPENAI_RPM=str(args.rpm),
+    )
+    os.chdir(tempfile.mkdtemp())
+    import app
+
+    client = app.app.test_client()
+    items = [{"question": QUESTIONS[index % len(QUESTIONS)], "answer": f"Answer number {index}."}
+             for index in range(args.questions)]
+
+    started = time.perf_counter()
+    for item in items:
+        assert client.post("/answer-feedback/judge-responses", json=item).status_code == 200
+    sequential = time.perf_counter() - started
+
+    started = time.perf_counter()
+    response = client.post("/answer-feedback/judge-responses/batch", json={"items": items})
+    batch = time.perf_counter() - started
+    assert all("feedback" in result for result in response.json["results"]), response.json
+
+    started = time.perf_counter()
+    response = client.post("/answer-feedback/judge-responses/batch/stream", json={"items": items}, buffered=False)
+    first_result = None
+    for chunk in response.response:
+        if first_result is None and chunk.startswith(b"event: result"):
+            first_result = time.perf_counter() - started
+    response.close()
+    stream_done = time.perf_counter() - started
+
+    print(f"{args.questions} questions, concurrency {args.concurrency}, rate limit {args.rpm or 'off'} rpm\n")
+    print(f"{'case':28} {'seconds':>8} {'speedup':>8}")
+    print(f"{'sequential':28} {sequential:8.2f} {1.0:7.1f}x")
+    print(f"{'batch':28} {batch:8.2f} {sequential / batch:7.1f}x")
+    print(f"{'batch/stream first result':28} {first_result:8.2f} {sequential / first_result:7.1f}x")
+    print(f"{'batch/stream done':28} {stream_done:8.2f} {sequential / stream_done:7.1f}x")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Live recording (live.live_session) vs uploading the finished recording.
+
+Both paths analyse the same WebM (VP8 + Opus, like Chrome's MediaRecorder) against the
+OpenAI stub. The upload path runs the /contact-score pipeline after recording has
+ended, which is what the user waits for today (not counting the upload itself). The live
+path is fed the file in one-second chunks at --speed times real time, as the browser
+would send them, and the clock starts when the recording stops.
+
+Run from the backend directory:
+    python -m benchmarks.bench_live_session --duration 60
+    python -m benchmarks.bench_live_session --video pitch.webm --speed 1
+"""
+import argparse
+import os
+import subprocess
+import tempfile
+import time
+
+import imageio_ffmpeg
+
+from benchmarks.stub_openai import start_stub_server
+from benchmarks.synthetic_video import generate_video
+from transcription.chunked_transcription import probe_duration
+
+
+def make_recording(path, duration):
+    source = os.path.splitext(path)[0] + ".mp4"
+    generate_video(source, duration, (640, 480), 30)
+    subprocess.run(
+        [imageio_ffmpeg.get_ffmpeg_exe(), "-y", "-v", "error", "-i", source,
+         "-c:v", "libvpx", "-deadline", "realtime", "-cpu-used", "8", "-b:v", "1M",
+         "-c:a", "libopus", "-b:a", "64k", path],
+        check=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", help="a WebM or fragmented MP4 recording (default: generate one)")
+    parser.add_argument("--duration", type=int, default=60)
+    parser.add_argument("--speed", type=float, default=1.0, help="feed the live session this many times real time")
+    parser.add_argument("--latency-per-second", type=float, default=0.08,
+                        help="Stub Whisper latency per second of audio")
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency_per_second=args.latency_per_second)
+    work_dir = tempfile.mkdtemp()
+    os.environ.update(OPENAI_BASE_URL=base_url, OPENAI_API_KEY="stub", LLM_CACHE_ENABLED="0",
+                      TRANSCRIPT_CACHE_DIR=os.path.join(work_dir, "transcripts"))
+    video = os.path.abspath(args.video) if args.video else os.path.join(work_dir, "recording.webm")
+    if not args.video:
+        make_recording(video, args.duration)
+    os.chdir(work_dir)
+    from bodylanguage.eyecontactscore import upload_contact_score_stages
+    from bodylanguage.parallel_attention import shutdown_pool
+    from jobs.dag import run_dag
+    from live.live_session import LiveSession
+    from transcription.transcript_cache import hash_file
+
+    duration = probe_duration(video)
+    with open(video, "rb") as f:
+        data = f.read()
+    print(f"{duration:.0f} s recording, {len(data) / 1e6:.1f} MB\n")
+
+    # Upload path: everything starts once the recording is complete.
+    started = time.perf_counter()
+    run_dag(upload_contact_score_stages(video, hash_file(video), work_dir), {})
+    upload_wait = time.perf_counter() - started
+
+    # Live path: chunks arrive while "recording", analysis runs alongside.
+    events = []
+    first_transcript = []
+    live_started = time.perf_counter()
+
+    def send(message):
+        events.append(message["type"])
+        if message["type"] == "transcript" and not first_transcript:
+            first_transcript.append(time.perf_counter() - live_started)
+
+    session = LiveSession(send, filename="recording.webm")
+    chunk_bytes = max(1, int(len(data) / duration))
+    for offset in range(0, len(data), chunk_bytes):
+        session.feed(data[offset:offset + chunk_bytes])
+        time.sleep(1.0 / args.speed)
+    recording_seconds = time.perf_counter() - live_started
+    result = session.finish()
+    live_wait = result["seconds_after_stop"]
+
+    print(f"{'path':28} {'wait after recording ends':>26}")
+    print(f"{'upload when finished':28} {upload_wait:25.2f}s")
+    print(f"{'live session':28} {live_wait:25.2f}s")
+    print(f"\nlive: fed for {recording_seconds:.1f} s; {events.count('attention')} attention and "
+          f"{events.count('transcript')} transcript updates, first transcript after "
+          f"{first_transcript[0] if first_transcript else float('nan'):.1f} s; "
+          f"{len(result['transcript'].split())} words, attention {result['attention_score']:.1f}")
+    server.shutdown()
+    shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
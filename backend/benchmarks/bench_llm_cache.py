@@ -0,0 +1,77 @@
+"""
+Latency of repeated LLM calls with the response cache, against the local stub server.
+
+Each route is called twice with the same input (a page refresh or demo re-run): the
+first call misses and goes to the stub, the second is served from the cache. With
+--near-duplicates the evaluation is then re-submitted with one word of the
+transcript changed (a mis-transcription), which should be a near-duplicate hit.
+
+Run from the backend directory:
+    python -m benchmarks.bench_llm_cache --near-duplicates
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+
+from benchmarks.stub_openai import start_stub_server
+
+TRANSCRIPT = " ".join(
+    f"In minute {index} we explain how our coaching app helps founders rehearse their pitch, "
+    f"measures eye contact and pacing, and suggests the questions investors are likely to ask."
+    for index in range(20)
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--near-duplicates", action="store_true")
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server()
+    os.environ.update(
+        OPENAI_BASE_URL=base_url,
+        OPENAI_API_KEY="stub",
+        LLM_CACHE_DIR=tempfile.mkdtemp(),
+        LLM_CACHE_NEAR_DUPLICATES="1" if args.near_duplicates else "0",
+    )
+    os.chdir(tempfile.mkdtemp())
+    import app
+
+    client = app.app.test_client()
+
+    def judge():
+        return client.post("/answer-feedback/judge-responses",
+                           json={"question": "How do you make money?", "answer": "Subscriptions."})
+
+    def evaluate(transcript=TRANSCRIPT):
+        return client.post("/evaluation/evaluate_transcript", data={
+            "transcription": (io.BytesIO(transcript.encode()), "transcript.txt"), "pitch_type": "hackathon",
+        })
+
+    cases = [("judge-responses", judge), ("evaluate_transcript", evaluate), ("evaluate_transcript", evaluate)]
+    if args.near_duplicates:
+        edited = TRANSCRIPT.replace("minute 7 we explain", "minute 7 we show")
+        cases.append(("evaluate (edited transcript)", lambda: evaluate(edited)))
+
+    print(f"{'call':30} {'seconds':>8}")
+    for name, call in cases:
+        started = time.perf_counter()
+        response = call()
+        assert response.status_code == 200, response.data
+        print(f"{name:30} {time.perf_counter() - started:8.3f}")
+    for name, call in cases[:1]:
+        started = time.perf_counter()
+        call()
+        print(f"{name + ' (repeat)':30} {time.perf_counter() - started:8.3f}")
+
+    print()
+    for key, value in client.get("/llm/cache-stats").json.items():
+        print(f"{key:16} {value}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+The LLM gateway (llm.gateway) under bursts, against the local stub server.
+
+Three bursts of --requests concurrent chat completions, with the response cache off:
+  identical    the same prompt from every caller; coalesced into one stub request
+  rate limit   distinct prompts with LLM_RATE_LIMIT_OPENAI_RPM=--rpm; they queue in
+               the gateway instead of all reaching the provider at once
+  429s         distinct prompts while the stub fails --fail-rate of requests with 429;
+               every call should still succeed after backing off
+
+Run from the backend directory:
+    python -m benchmarks.bench_llm_gateway --requests 20 --rpm 120 --fail-rate 0.3
+"""
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.stub_openai import start_stub_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--rpm", type=int, default=120)
+    parser.add_argument("--fail-rate", type=float, default=0.3)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(first_token_latency=0.2, token_latency=0.001)
+    stats = server.app.config["stats"]
+    os.environ.update(OPENAI_BASE_URL=base_url, OPENAI_API_KEY="stub", LLM_CACHE_ENABLED="0",
+                      LLM_RATE_LIMIT_OPENAI_RPM=str(args.rpm), LLM_RETRY_BASE_SECONDS="0.2")
+    from openai import OpenAIError
+
+    from llm.chat import chat_completion
+    from llm.gateway import COALESCED, QUEUE_DEPTH, RETRIES, WAIT_SECONDS, LLMBusyError
+
+    def burst(name, prompts):
+        before = dict(stats)
+        failed = []
+        deepest = [0]
+        sampling = threading.Event()
+
+        def sample():
+            while not sampling.wait(0.02):
+                deepest[0] = max(deepest[0], QUEUE_DEPTH.value(kind="chat"))
+
+        def ask(prompt):
+            try:
+                chat_completion([{"role": "user", "content": prompt}], "gpt-4o", max_tokens=300)
+            except (OpenAIError, LLMBusyError) as e:
+                failed.append(e)
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(prompts)) as pool:
+            list(pool.map(ask, prompts))
+        seconds = time.perf_counter() - started
+        sampling.set()
+        sampler.join()
+        print(f"{name:12} {seconds:8.2f} {stats['requests'] - before['requests']:6} "
+              f"{stats['failures'] - before['failures']:6} {len(failed):7} {deepest[0]:12.0f}")
+
+    print(f"{'burst':12} {'seconds':>8} {'sent':>6} {'429s':>6} {'failed':>7} {'queue depth':>12}")
+    burst("identical", ["Summarise this pitch: we help founders rehearse."] * args.requests)
+    burst("rate limit", [f"Summarise pitch number {index}." for index in range(args.requests)])
+    server.app.config["fail_rate"] = args.fail_rate
+    burst("429s", [f"Give feedback on pitch number {index}." for index in range(args.requests)])
+
+    print(f"\ncoalesced calls: {COALESCED.value(kind='chat'):.0f}, "
+          f"retries after 429: {RETRIES.value(kind='chat', reason=429):.0f}, "
+          f"calls that waited in the queue: {WAIT_SECONDS.count(kind='chat')}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Time-to-first-content for the streaming LLM routes, against the local stub server.
+
+For each route the blocking version is timed end to end, and the "/stream" version is
+timed to its first content event (a text delta, question or evaluation section) and
+to its final "done" event. Transcripts and attention scores are seeded into stored
+media, so only the LLM part is measured.
+
+Run from the backend directory:
+    python -m benchmarks.bench_llm_streaming --token-latency 0.02
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+
+from benchmarks.stub_openai import start_stub_server
+
+CONTENT_EVENTS = ("event: delta", "event: question", "event: section")
+TRANSCRIPT = "We are building an app that coaches founders on their pitch delivery."
+
+
+def timed_blocking(client, url, **kwargs):
+    started = time.perf_counter()
+    response = client.post(url, **kwargs)
+    assert response.status_code == 200, response.data
+    return time.perf_counter() - started
+
+
+def timed_stream(client, url, **kwargs):
+    started = time.perf_counter()
+    response = client.post(url, buffered=False, **kwargs)
+    first_content = None
+    for chunk in response.response:
+        text = chunk.decode() if isinstance(chunk, bytes) else chunk
+        if first_content is None and text.startswith(CONTENT_EVENTS):
+            first_content = time.perf_counter() - started
+        assert not text.startswith("event: error"), text
+    response.close()
+    return first_content, time.perf_counter() - started
+
+
+def seeded_media(client, get_artifact):
+    from bodylanguage.attention_model import frames_array, summarize_attention
+
+    media_id = client.post("/media", data={"video": (io.BytesIO(b"not a real video"), "pitch.mp4")}).json["media_id"]
+    get_artifact(media_id, "transcript", lambda meta: TRANSCRIPT)
+    get_artifact(media_id, "attention", lambda meta: summarize_attention(frames_array([]), 1.0))
+    return media_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--first-token-latency", type=float, default=0.4)
+    parser.add_argument("--token-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(first_token_latency=args.first_token_latency, token_latency=args.token_latency)
+    os.environ.update(OPENAI_BASE_URL=base_url, OPENAI_API_KEY="stub")
+    os.chdir(tempfile.mkdtemp())
+    import app
+    from media.media_store import get_artifact
+
+    client = app.app.test_client()
+    judge = {"json": {"question": "How do you make money?", "answer": "Subscriptions."}}
+
+    def evaluation():
+        return {"data": {"transcription": (io.BytesIO(TRANSCRIPT.encode()), "t.txt"), "pitch_type": "hackathon"}}
+
+    cases = [
+        ("judge-responses", "/answer-feedback/judge-responses", "/answer-feedback/judge-responses/stream",
+         lambda: judge, lambda: judge),
+        ("evaluate_transcript", "/evaluation/evaluate_transcript", "/evaluation/evaluate_transcript/stream",
+         evaluation, evaluation),
+    ]
+    for name, prefix in (("contact-score feedback", "/contact-score/{}"),
+                         ("generate-questions", "/question_generation/generate-questions/{}")):
+        blocking_id, stream_id = seeded_media(client, get_artifact), seeded_media(client, get_artifact)
+        cases.append((name, prefix.format(blocking_id), prefix.format(stream_id) + "/stream", dict, dict))
+
+    print(f"{'route':24} {'blocking':>9} {'first content':>14} {'stream done':>12} {'TTFC gain':>10}")
+    for name, url, stream_url, blocking_kwargs, stream_kwargs in cases:
+        blocking = timed_blocking(client, url, **blocking_kwargs())
+        first_content, done = timed_stream(client, stream_url, **stream_kwargs())
+        print(f"{name:24} {blocking:9.2f} {first_content:14.2f} {done:12.2f} {blocking / first_content:9.1f}x")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
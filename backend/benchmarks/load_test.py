@@ -0,0 +1,137 @@
+"""
+Throughput and latency under concurrent video uploads.
+
+Every request uploads the same video as multipart form data with a few random bytes
+appended, so the transcript and response caches can't short-circuit the work. For each
+concurrency level, N client threads send --requests uploads in total; the script prints
+requests/sec, latency percentiles and error counts.
+
+Against a running server (e.g. Gunicorn with deploy/gunicorn.conf.py, behind nginx):
+    python -m benchmarks.load_test pitch.mp4 --url http://127.0.0.1:8001 --concurrency 1,4,8
+
+Without --url the app is served in-process by Werkzeug's threaded server with the
+OpenAI stub (benchmarks.stub_openai) behind it, which is only useful for comparing
+changes to the app itself, not for sizing a deployment.
+
+Run from the backend directory.
+"""
+import argparse
+import http.client
+import os
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+import numpy as np
+
+
+def multipart_body(field: str, filename: str, data: bytes, fields: dict | None = None) -> tuple:
+    boundary = uuid.uuid4().hex
+    body = "".join(
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"{name}\"\r\n\r\n{value}\r\n"
+        for name, value in (fields or {}).items()
+    ).encode() + (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"{field}\"; filename=\"{filename}\"\r\n"
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode() + data + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def upload(url: str, video: bytes, timeout: float) -> tuple:
+    body, content_type = multipart_body("video", "pitch.mp4", video + os.urandom(16))
+    request = urllib.request.Request(url, data=body, method="POST", headers={"Content-Type": content_type})
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (OSError, http.client.HTTPException):
+        # Timeouts, refused or dropped connections.
+        status = "error"
+    return status, time.perf_counter() - started
+
+
+def run_level(url: str, video: bytes, concurrency: int, total: int, timeout: float) -> dict:
+    results = []
+    lock = threading.Lock()
+    remaining = [total]
+
+    def client():
+        while True:
+            with lock:
+                if remaining[0] == 0:
+                    return
+                remaining[0] -= 1
+            result = upload(url, video, timeout)
+            with lock:
+                results.append(result)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = np.array([seconds for status, seconds in results if status == 200])
+    return {
+        "ok": len(latencies),
+        "errors": len(results) - len(latencies),
+        "throughput": len(latencies) / elapsed,
+        "p50": float(np.percentile(latencies, 50)) if len(latencies) else float("nan"),
+        "p95": float(np.percentile(latencies, 95)) if len(latencies) else float("nan"),
+        "max": float(latencies.max()) if len(latencies) else float("nan"),
+    }
+
+
+def serve_in_process(**stub_options) -> tuple:
+    from werkzeug.serving import make_server
+
+    from benchmarks.stub_openai import start_stub_server
+
+    stub, base_url = start_stub_server(**stub_options)
+    os.environ.update(OPENAI_BASE_URL=base_url, OPENAI_API_KEY="stub", LLM_CACHE_ENABLED="0")
+    os.chdir(tempfile.mkdtemp())
+    from app import create_app
+
+    server = make_server("127.0.0.1", 0, create_app(), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", [server, stub]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("video")
+    parser.add_argument("--url", help="base URL of a running server (default: serve in-process)")
+    parser.add_argument("--route", default="/contact-score")
+    parser.add_argument("--concurrency", default="1,2,4")
+    parser.add_argument("--requests", type=int, default=8, help="uploads per concurrency level")
+    parser.add_argument("--timeout", type=float, default=600.0)
+    args = parser.parse_args()
+
+    with open(args.video, "rb") as f:
+        video = f.read()
+    servers = []
+    base_url = args.url
+    if base_url is None:
+        base_url, servers = serve_in_process()
+
+    print(f"POST {args.route} with {len(video) / 1e6:.1f} MB uploads, {args.requests} per level\n")
+    print(f"{'clients':>7} {'ok':>4} {'errors':>6} {'req/s':>7} {'p50 s':>7} {'p95 s':>7} {'max s':>7}")
+    for concurrency in [int(level) for level in args.concurrency.split(",")]:
+        result = run_level(base_url.rstrip("/") + args.route, video, concurrency, args.requests, args.timeout)
+        print(f"{concurrency:7} {result['ok']:4} {result['errors']:6} {result['throughput']:7.2f}"
+              f" {result['p50']:7.2f} {result['p95']:7.2f} {result['max']:7.2f}")
+
+    for server in servers:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
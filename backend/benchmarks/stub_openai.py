@@ -0,0 +1,184 @@
+"""
+A local stand-in for the OpenAI API, for benchmarks and smoke tests.
+
+POST /v1/audio/transcriptions sleeps for --base-latency + --latency-per-second x the
+audio's duration (roughly how Whisper behaves) and answers with a verbose_json body
+with one segment every --segment-seconds.
+
+POST /v1/chat/completions answers with canned feedback text, or the JSON the
+evaluation, question and combined analysis (response_format "pitch_analysis")
+prompts ask for. Prompt tokens in `usage` are estimated at four characters each. The first token takes --first-token-latency
+and every following token --token-latency, with or without stream=True.
+
+--fail-rate makes a share of requests return 429 so the retry paths get exercised.
+
+Point the backend at it with:
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=stub
+Run from the backend directory:
+    python -m benchmarks.stub_openai --port 8765
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+from flask import Flask, Response, jsonify, request
+from werkzeug.serving import make_server
+
+FEEDBACK_TEXT = (
+    "Your pitch opens with a clear problem statement and a confident delivery. The demo shows a "
+    "working prototype, which is a real strength. To improve, quantify the market size, explain "
+    "how you will acquire your first customers and spend less time on implementation details. "
+    "Finish with a concrete ask so the audience knows exactly what you need from them."
+)
+QUESTIONS = [
+    "How do you make money from each customer?",
+    "What does it cost you to acquire a customer today?",
+    "Which part of the product is hardest for a competitor to copy?",
+    "What traction do you have so far?",
+    "How big is the market you are targeting first?",
+    "What happens if a large incumbent builds the same feature?",
+    "How will you scale the infrastructure past your first thousand users?",
+    "What are the main regulatory risks?",
+    "How much funding do you need and what will it buy?",
+    "What would make you abandon this idea?",
+]
+EVALUATION = {
+    "score": 72,
+    "strengths": ["Clear problem statement", "Working prototype", "Confident delivery"],
+    "areas_for_improvement": ["Market sizing", "Go-to-market plan", "Time management"],
+    "suggestions": ["Quantify the market", "Name your first ten customers", "Cut the technical deep dive"],
+    "line_references": ["'We built this in 24 hours' - say what it enables instead"],
+    "summary": "A promising pitch that needs sharper business detail.",
+}
+
+
+def _canned_completion(prompt, response_format=None):
+    if (response_format or {}).get("json_schema", {}).get("name") == "pitch_analysis":
+        return json.dumps({"feedback": FEEDBACK_TEXT, "evaluation": EVALUATION, "questions": QUESTIONS}, indent=2)
+    if "key 'questions'" in prompt:
+        return json.dumps({"questions": QUESTIONS}, indent=2)
+    if "score, strengths" in prompt:
+        return json.dumps(EVALUATION, indent=2)
+    return FEEDBACK_TEXT
+
+
+def _tokens(text):
+    # Roughly four characters per token, like the real tokenizer.
+    return [text[index:index + 4] for index in range(0, len(text), 4)]
+
+
+def create_stub_app(base_latency=0.2, latency_per_second=0.02, segment_seconds=5.0, fail_rate=0.0,
+                    first_token_latency=0.4, token_latency=0.02):
+    stub = Flask(__name__)
+    stub.config["stats"] = {"requests": 0, "failures": 0}
+    # Read on every request, so a benchmark can change it while the stub is running.
+    stub.config["fail_rate"] = fail_rate
+
+    @stub.route("/v1/chat/completions", methods=["POST"])
+    def chat_completions():
+        stub.config["stats"]["requests"] += 1
+        if random.random() < stub.config["fail_rate"]:
+            stub.config["stats"]["failures"] += 1
+            return jsonify({"error": {"message": "Rate limit reached (stub)", "type": "rate_limit"}}), 429
+
+        body = request.get_json()
+        tokens = _tokens(_canned_completion(body["messages"][-1]["content"], body.get("response_format")))
+        prompt_tokens = sum(len(_tokens(message["content"])) for message in body["messages"])
+        base = {"id": "chatcmpl-stub", "created": int(time.time()), "model": body["model"]}
+
+        if not body.get("stream"):
+            time.sleep(first_token_latency + token_latency * (len(tokens) - 1))
+            return jsonify({
+                **base, "object": "chat.completion",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "".join(tokens)}}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                          "total_tokens": prompt_tokens + len(tokens)},
+            })
+
+        def chunks():
+            time.sleep(first_token_latency)
+            for index, token in enumerate(tokens):
+                if index:
+                    time.sleep(token_latency)
+                chunk = {**base, "object": "chat.completion.chunk",
+                         "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+            chunk = {**base, "object": "chat.completion.chunk",
+                     "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+            yield f"data: {json.dumps(chunk)}\n\ndata: [DONE]\n\n"
+
+        return Response(chunks(), mimetype="text/event-stream")
+
+    @stub.route("/v1/audio/transcriptions", methods=["POST"])
+    def transcriptions():
+        stub.config["stats"]["requests"] += 1
+        if random.random() < stub.config["fail_rate"]:
+            stub.config["stats"]["failures"] += 1
+            return jsonify({"error": {"message": "Rate limit reached (stub)", "type": "rate_limit"}}), 429
+
+        # Imported here, so importing the stub doesn't read the backend's settings before a
+        # benchmark has pointed them at it.
+        from transcription.chunked_transcription import probe_duration
+
+        upload = request.files["file"]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            audio_path = os.path.join(temp_dir, os.path.basename(upload.filename or "audio.ogg"))
+            upload.save(audio_path)
+            duration = probe_duration(audio_path)
+        time.sleep(base_latency + latency_per_second * duration)
+
+        segments = []
+        start = 0.0
+        while start < duration:
+            end = min(start + segment_seconds, duration)
+            segments.append({
+                "id": len(segments), "seek": 0, "start": start, "end": end,
+                "text": f" Segment {len(segments)} of {upload.filename}.", "tokens": [],
+                "temperature": 0.0, "avg_logprob": 0.0, "compression_ratio": 1.0, "no_speech_prob": 0.0,
+            })
+            start = end
+        text = "".join(segment["text"] for segment in segments).strip()
+
+        if request.form.get("response_format") == "verbose_json":
+            return jsonify({"task": "transcribe", "language": "english", "duration": duration,
+                            "text": text, "segments": segments})
+        return jsonify({"text": text})
+
+    return stub
+
+
+def start_stub_server(port=0, **options):
+    """
+    Starts the stub on a background thread and returns (server, base_url). Call
+    server.shutdown() when done.
+    """
+    server = make_server("127.0.0.1", port, create_stub_app(**options), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--base-latency", type=float, default=0.2)
+    parser.add_argument("--latency-per-second", type=float, default=0.02)
+    parser.add_argument("--segment-seconds", type=float, default=5.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--first-token-latency", type=float, default=0.4)
+    parser.add_argument("--token-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    server = make_server("127.0.0.1", args.port, create_stub_app(
+        args.base_latency, args.latency_per_second, args.segment_seconds, args.fail_rate,
+        args.first_token_latency, args.token_latency), threaded=True)
+    print(f"Stub OpenAI server on http://127.0.0.1:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+"""
+End-to-end benchmark suite: every upload endpoint against synthetic videos of several
+lengths, resolutions and frame rates, plus the text-only LLM endpoints.
+
+The app runs in this process behind Werkzeug's threaded server, with the OpenAI stub
+(benchmarks.stub_openai) standing in for Whisper and chat completions; its latency is
+set with the --stub-* options. Videos come from benchmarks.synthetic_video and are kept
+in --video-dir, so later runs reuse them.
+
+For every endpoint and video ("case") the suite sends --warmup untimed requests, then
+--requests timed ones from --concurrency client threads, and records:
+  - latency percentiles (p50/p90/p95/p99), mean and max, in seconds;
+  - throughput (successful requests/sec) and the error count;
+  - CPU seconds spent by this process and its children (ffmpeg, the attention worker
+    pool) while the case ran, total and per request;
+  - peak RSS of this process plus its children during the case, sampled every 50 ms.
+The stub shares the process, but it only sleeps, so it adds next to no CPU time.
+
+Every upload gets a few random bytes appended (and every transcript a nonce), and the
+LLM response cache is off, so no request is answered from a cache.
+
+Results go to --output as JSON. With --baseline, each case is compared against an
+earlier results file, and the script exits with status 1 if p50, p95, CPU per request
+or peak RSS grew by more than --tolerance:
+    python -m benchmarks.suite --matrix quick --output before.json
+    python -m benchmarks.suite --matrix quick --output after.json --baseline before.json
+
+Run from the backend directory.
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+from benchmarks.load_test import multipart_body, serve_in_process
+from benchmarks.synthetic_video import generate_video, parse_size
+
+# name -> (seconds, (width, height), fps)
+MATRICES = {
+    "quick": {
+        "10s-360p-30fps": (10, (640, 360), 30),
+        "10s-720p-25fps": (10, (1280, 720), 25),
+    },
+    "full": {
+        "30s-480p-24fps": (30, (854, 480), 24),
+        "60s-720p-30fps": (60, (1280, 720), 30),
+        "60s-1080p-30fps": (60, (1920, 1080), 30),
+        "120s-720p-60fps": (120, (1280, 720), 60),
+    },
+}
+
+# name -> (kind, route). "video" endpoints run once per video, the others once per suite.
+ENDPOINTS = {
+    "contact-score": ("video", "/contact-score"),
+    "extract-frames": ("video", "/snapshots/extract-frames"),
+    "transcribe": ("video", "/transcription/transcribe"),
+    "generate-questions": ("video", "/question_generation/generate-questions"),
+    "evaluate-transcript": ("text", "/evaluation/evaluate_transcript"),
+    "judge-responses": ("json", "/answer-feedback/judge-responses"),
+}
+
+TRANSCRIPT = (
+    "Hi everyone, we are building a tool that helps founders rehearse their pitch. You record "
+    "yourself, and it scores your eye contact, transcribes what you said and asks the questions "
+    "an investor would ask. We have two hundred users from our university pilot and we are "
+    "raising a small pre-seed round to hire our first engineer."
+)
+
+# Compared against the baseline: (metric, smallest change worth reporting). The floor
+# keeps noise on very fast cases from failing a run.
+COMPARED_METRICS = [("p50", 0.05), ("p95", 0.1), ("cpu_per_request", 0.05), ("peak_rss_mb", 20.0)]
+
+
+def build_request(base_url: str, kind: str, route: str, video: bytes) -> urllib.request.Request:
+    nonce = os.urandom(8).hex()
+    if kind == "video":
+        body, content_type = multipart_body("video", "pitch.mp4", video + os.urandom(16))
+    elif kind == "text":
+        body, content_type = multipart_body("transcription", "transcript.txt", f"{TRANSCRIPT} ({nonce})".encode(),
+                                            fields={"pitch_type": "investor"})
+    else:
+        body = json.dumps({"question": "What traction do you have so far?",
+                           "answer": f"Two hundred users from our pilot ({nonce})."}).encode()
+        content_type = "application/json"
+    return urllib.request.Request(base_url + route, data=body, method="POST", headers={"Content-Type": content_type})
+
+
+def send(request: urllib.request.Request, timeout: float) -> tuple:
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (OSError, http.client.HTTPException):
+        status = "error"
+    return status, time.perf_counter() - started
+
+
+def descendants() -> list:
+    """PIDs of every live child and grandchild of this process (Linux only)."""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    # The command name may contain spaces; fields after it are fixed.
+                    parents[int(entry)] = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+    found, frontier = [], [os.getpid()]
+    while frontier:
+        children = [pid for pid, parent in parents.items() if parent in frontier]
+        found += children
+        frontier = children
+    return found
+
+
+def cpu_seconds() -> float:
+    # This process, children it has already waited for (ffmpeg runs), and live
+    # children such as the attention workers, which only show up in /proc.
+    times = os.times()
+    total = times.user + times.system + times.children_user + times.children_system
+    ticks = os.sysconf("SC_CLK_TCK")
+    for pid in descendants():
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            total += (int(fields[11]) + int(fields[12])) / ticks
+        except (OSError, IndexError, ValueError):
+            continue
+    return total
+
+
+def rss_bytes() -> int:
+    total = 0
+    for pid in [os.getpid(), *descendants()]:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                total += next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmRSS:"))
+        except (OSError, StopIteration, ValueError):
+            continue
+    return total
+
+
+class PeakRSS:
+    """Samples rss_bytes() on a background thread until stopped; .peak is the highest seen."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak = 0
+        # CPU time the sampler itself used, so run_case can leave it out.
+        self.cpu_seconds = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while True:
+            started = time.thread_time()
+            self.peak = max(self.peak, rss_bytes())
+            self.cpu_seconds += time.thread_time() - started
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_case(base_url: str, kind: str, route: str, video: bytes, requests: int, concurrency: int,
+             warmup: int, timeout: float) -> dict:
+    for _ in range(warmup):
+        send(build_request(base_url, kind, route, video), timeout)
+
+    results = []
+    lock = threading.Lock()
+    remaining = [requests]
+
+    def client():
+        while True:
+            with lock:
+                if remaining[0] == 0:
+                    return
+                remaining[0] -= 1
+            result = send(build_request(base_url, kind, route, video), timeout)
+            with lock:
+                results.append(result)
+
+    cpu_before = cpu_seconds()
+    with PeakRSS() as rss:
+        started = time.perf_counter()
+        threads = [threading.Thread(target=client) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    cpu = cpu_seconds() - cpu_before - rss.cpu_seconds
+
+    latencies = np.array([seconds for status, seconds in results if status == 200])
+    summary = {
+        "requests": len(results),
+        "ok": len(latencies),
+        "errors": len(results) - len(latencies),
+        "wall_seconds": elapsed,
+        "throughput": len(latencies) / elapsed,
+        "cpu_seconds": cpu,
+        "cpu_per_request": cpu / max(len(results), 1),
+        "peak_rss_mb": rss.peak / 1e6,
+    }
+    for name, value in [("p50", 50), ("p90", 90), ("p95", 95), ("p99", 99)]:
+        summary[name] = float(np.percentile(latencies, value)) if len(latencies) else None
+    summary["mean"] = float(latencies.mean()) if len(latencies) else None
+    summary["max"] = float(latencies.max()) if len(latencies) else None
+    return summary
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Returns (case, metric, baseline value, current value) for every regression."""
+    regressions = []
+    for case, current in results.items():
+        previous = baseline.get(case)
+        if previous is None:
+            continue
+        for metric, floor in COMPARED_METRICS:
+            before, after = previous.get(metric), current.get(metric)
+            if before is None or after is None:
+                continue
+            if after > before * (1 + tolerance) and after - before > floor:
+                regressions.append((case, metric, before, after))
+    return regressions
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_video_spec(spec: str) -> tuple:
+    # "SECONDS:WIDTHxHEIGHT:FPS", e.g. "45:1280x720:30"
+    seconds, size, fps = spec.split(":")
+    return f"{seconds}s-{size}-{fps}fps", (float(seconds), parse_size(size), float(fps))
+
+
+def fmt(value, spec):
+    return format(value, spec) if value is not None else format("-", ">" + spec.split(".")[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matrix", choices=MATRICES, default="quick")
+    parser.add_argument("--video", action="append", default=[], metavar="SECONDS:WxH:FPS",
+                        help="benchmark this video instead of the matrix (repeatable)")
+    parser.add_argument("--video-dir", default=os.path.join(tempfile.gettempdir(), "pitch-benchmark-videos"))
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS))
+    parser.add_argument("--requests", type=int, default=3, help="timed requests per case")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=600.0)
+    parser.add_argument("--stub-base-latency", type=float, default=0.2)
+    parser.add_argument("--stub-latency-per-second", type=float, default=0.02)
+    parser.add_argument("--stub-first-token-latency", type=float, default=0.4)
+    parser.add_argument("--stub-token-latency", type=float, default=0.02)
+    parser.add_argument("--stub-fail-rate", type=float, default=0.0)
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--baseline", help="earlier --output file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative growth (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    endpoints = args.endpoints.split(",")
+    unknown = [name for name in endpoints if name not in ENDPOINTS]
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(unknown)}")
+    videos = dict(parse_video_spec(spec) for spec in args.video) or MATRICES[args.matrix]
+
+    # Paths are resolved before serve_in_process moves into its scratch directory.
+    output = os.path.abspath(args.output)
+    baseline = os.path.abspath(args.baseline) if args.baseline else None
+    os.makedirs(args.video_dir, exist_ok=True)
+    video_paths = {}
+    for name, (seconds, size, fps) in videos.items():
+        video_paths[name] = os.path.abspath(os.path.join(args.video_dir, f"{name}.mp4"))
+        if not os.path.exists(video_paths[name]):
+            print(f"generating {name}...")
+            generate_video(video_paths[name], seconds, size, fps)
+
+    meta = {
+        "commit": git_commit(),
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "options": vars(args),
+        "videos": {name: {"seconds": seconds, "size": list(size), "fps": fps}
+                   for name, (seconds, size, fps) in videos.items()},
+    }
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    base_url, servers = serve_in_process(
+        base_latency=args.stub_base_latency, latency_per_second=args.stub_latency_per_second,
+        first_token_latency=args.stub_first_token_latency, token_latency=args.stub_token_latency,
+        fail_rate=args.stub_fail_rate)
+
+    cases = []
+    for endpoint in endpoints:
+        kind, route = ENDPOINTS[endpoint]
+        if kind == "video":
+            cases += [(f"{endpoint}/{name}", kind, route, video_paths[name]) for name in videos]
+        else:
+            cases.append((endpoint, kind, route, None))
+
+    results = {}
+    print(f"{'case':40} {'ok':>3} {'err':>3} {'p50 s':>7} {'p95 s':>7} {'req/s':>6} {'cpu/req':>7} {'rss MB':>7}")
+    for case, kind, route, path in cases:
+        video = b""
+        if path is not None:
+            with open(path, "rb") as f:
+                video = f.read()
+        result = run_case(base_url, kind, route, video, args.requests, args.concurrency, args.warmup, args.timeout)
+        results[case] = result
+        print(f"{case:40} {result['ok']:3} {result['errors']:3} {fmt(result['p50'], '7.2f')} {fmt(result['p95'], '7.2f')}"
+              f" {result['throughput']:6.2f} {result['cpu_per_request']:7.2f} {result['peak_rss_mb']:7.0f}")
+
+    for server in servers:
+        server.shutdown()
+    from app import shutdown_app
+
+    shutdown_app(wait=False)
+    meta["max_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+    with open(output, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    print(f"\nresults written to {output}")
+
+    if baseline is None:
+        return
+    with open(baseline) as f:
+        previous = json.load(f)
+    regressions = compare(results, previous["results"], args.tolerance)
+    print(f"\ncompared with {baseline} (commit {previous['meta'].get('commit')}, tolerance {args.tolerance:.0%})")
+    for case, metric, before, after in regressions:
+        change = f" ({after / before - 1:+.0%})" if before else ""
+        print(f"  REGRESSION {case} {metric}: {before:.2f} -> {after:.2f}{change}")
+    if regressions:
+        sys.exit(1)
+    print("  no regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Synthetic pitch videos for benchmarks, drawn frame by frame with OpenCV.
+
+Each frame has a textured background and a cartoon head that drifts around the frame,
+blinks now and then and turns away for a stretch in the middle. The Haar detector finds
+the head in most frames (the eye cascade rarely fires on the cartoon eyes), which keeps
+the detector, tracker and attention model busy much like a real recording does.
+
+Frames are piped as raw BGR into the bundled ffmpeg, which encodes H.264 (keyframe every
+second) and adds a sine tone so the audio extraction and transcription paths run too.
+
+Run from the backend directory:
+    python -m benchmarks.synthetic_video clip.mp4 --seconds 30 --size 1280x720 --fps 30
+"""
+import argparse
+import math
+import subprocess
+
+import cv2
+import imageio_ffmpeg
+import numpy as np
+
+
+def parse_size(size: str) -> tuple:
+    width, height = size.lower().split("x")
+    return int(width), int(height)
+
+
+def background(width: int, height: int, seed: int) -> np.ndarray:
+    # A gradient plus blurred noise: flat colour would compress to nothing and decode
+    # unrealistically fast.
+    rng = np.random.default_rng(seed)
+    ramp = np.linspace(60, 160, width, dtype=np.float32)
+    frame = np.repeat(ramp[None, :, None], height, axis=0).repeat(3, axis=2)
+    noise = cv2.GaussianBlur(rng.normal(0, 40, (height, width, 3)).astype(np.float32), (0, 0), 3)
+    return np.clip(frame + noise, 0, 255).astype(np.uint8)
+
+
+def draw_head(frame: np.ndarray, t: float, seconds: float):
+    height, width = frame.shape[:2]
+    radius = int(min(width, height) * 0.18)
+    center = (int(width / 2 + width * 0.2 * math.sin(t * 0.7)),
+              int(height / 2 + height * 0.1 * math.sin(t * 1.3)))
+    axes = (radius, int(radius * 1.3))
+    cv2.ellipse(frame, center, axes, 0, 0, 360, (150, 180, 225), -1, cv2.LINE_AA)
+    # Looks away (no eyes, head shifted sideways) for the middle tenth of the video.
+    if 0.45 * seconds <= t < 0.55 * seconds:
+        cv2.ellipse(frame, (center[0] + radius // 2, center[1]), (radius // 3, radius // 2), 0, 0, 360,
+                    (110, 140, 190), -1, cv2.LINE_AA)
+        return
+    eye_y = center[1] - radius // 4
+    blink = (t % 4.0) < 0.15
+    for dx in (-radius // 2.5, radius // 2.5):
+        eye = (int(center[0] + dx), eye_y)
+        if blink:
+            cv2.line(frame, (eye[0] - radius // 6, eye[1]), (eye[0] + radius // 6, eye[1]), (40, 40, 40), 3)
+        else:
+            cv2.ellipse(frame, eye, (radius // 6, radius // 9), 0, 0, 360, (255, 255, 255), -1, cv2.LINE_AA)
+            cv2.circle(frame, eye, radius // 14, (40, 30, 20), -1, cv2.LINE_AA)
+    cv2.ellipse(frame, (center[0], center[1] - radius // 2), (radius // 2, radius // 8), 0, 180, 360,
+                (60, 60, 90), 4, cv2.LINE_AA)
+    cv2.ellipse(frame, (center[0], center[1] + radius // 2), (radius // 3, radius // 8), 0, 0, 180,
+                (60, 60, 160), 4, cv2.LINE_AA)
+
+
+def generate_video(path: str, seconds: float, size: tuple = (1280, 720), fps: float = 30, audio: bool = True,
+                   seed: int = 0) -> str:
+    """
+    Writes a synthetic H.264 MP4 of the given length, (width, height) and frame rate to
+    path, with a 440 Hz AAC track unless audio=False. The same seed gives the same video.
+    """
+    width, height = size
+    command = [imageio_ffmpeg.get_ffmpeg_exe(), "-y", "-v", "error",
+               "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{width}x{height}", "-r", str(fps), "-i", "-"]
+    if audio:
+        command += ["-f", "lavfi", "-i", "sine=frequency=440:sample_rate=44100", "-c:a", "aac", "-b:a", "128k"]
+    command += ["-t", str(seconds), "-c:v", "libx264", "-preset", "veryfast", "-g", str(round(fps)),
+                "-pix_fmt", "yuv420p", path]
+
+    base = background(width, height, seed)
+    encoder = subprocess.Popen(command, stdin=subprocess.PIPE)
+    try:
+        for index in range(round(seconds * fps)):
+            frame = base.copy()
+            draw_head(frame, index / fps, seconds)
+            encoder.stdin.write(frame.tobytes())
+    finally:
+        encoder.stdin.close()
+        if encoder.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed writing {path}")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--size", default="1280x720")
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--no-audio", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate_video(args.path, args.seconds, parse_size(args.size), args.fps, not args.no_audio, args.seed)
+
+
+if __name__ == "__main__":
+    main()
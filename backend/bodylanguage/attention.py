@@ -0,0 +1,54 @@
+import cv2
+
+# Pure attention scoring, kept free of Flask/OpenAI imports so that worker processes
+# (see bodylanguage.parallel_attention) can load it cheaply.
+
+def load_cascades():
+    """
+    Returns the (face, eye) Haar cascades used for attention scoring.
+    """
+    face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+    eye_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
+    return face_cascade, eye_cascade
+
+def clip_box(box, shape) -> tuple:
+    """
+    Clips an (x, y, w, h) box to a frame of the given shape.
+    """
+    x, y, w, h = (round(value) for value in box)
+    x1, y1 = max(0, x), max(0, y)
+    x2, y2 = min(shape[1], x + w), min(shape[0], y + h)
+    return x1, y1, max(0, x2 - x1), max(0, y2 - y1)
+
+def count_eyes(gray, box, eye_cascade) -> int:
+    """
+    Runs the eye cascade inside one face box only.
+    """
+    x, y, w, h = clip_box(box, gray.shape)
+    if w == 0 or h == 0:
+        return 0
+    return len(eye_cascade.detectMultiScale(gray[y:y+h, x:x+w]))
+
+def detect_faces(gray, face_cascade, eye_cascade) -> tuple:
+    """
+    Returns (boxes, eyes) for one grayscale frame: an (x, y, w, h) box per face and
+    the number of eyes found in each.
+    """
+    faces = face_cascade.detectMultiScale(gray, scaleFactor=1.3, minNeighbors=5)
+    boxes = [tuple(int(value) for value in face) for face in faces]
+    return boxes, [count_eyes(gray, box, eye_cascade) for box in boxes]
+
+def summarize_faces(boxes, eyes, shape) -> tuple:
+    """
+    Returns (faces, eyes, face_area): eyes is the most eyes found in any one face and
+    face_area the largest face's share of the frame. Every face counts, not just the
+    last one detected.
+    """
+    largest_area = max((w * h for _, _, w, h in boxes), default=0)
+    return len(boxes), min(max(eyes, default=0), 255), min(largest_area / (shape[0] * shape[1]), 1.0)
+
+def measure_frame(gray, face_cascade, eye_cascade) -> tuple:
+    """
+    Measures one 640x480 grayscale frame: returns (faces, eyes, face_area).
+    """
+    return summarize_faces(*detect_faces(gray, face_cascade, eye_cascade), gray.shape)
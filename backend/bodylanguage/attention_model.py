@@ -0,0 +1,118 @@
+import base64
+
+import numpy as np
+
+from resources import get_setting
+
+# Attention scoring over whole videos as NumPy arrays. The detectors only record what
+# they see in each sampled frame (FRAME_DTYPE, 8 bytes per frame); scores, smoothing,
+# gaze-loss streaks and the per-second timeline are all derived from those arrays with
+# vectorized operations, so there is no Python work per frame after detection.
+FRAME_DTYPE = np.dtype([
+    ("timestamp", "<f4"),   # seconds from the start of the video
+    ("faces", "u1"),        # faces detected
+    ("eyes", "u1"),         # most eyes found in any one face
+    ("face_area", "<f2"),   # largest face's share of the frame, 0-1
+])
+
+# Centered moving-average window for the smoothed score, in seconds.
+ATTENTION_SMOOTHING_SECONDS = get_setting("ATTENTION_SMOOTHING_SECONDS", 3.0, float)
+# A frame counts as "gaze lost" when its smoothed score is below this, and only runs of
+# at least ATTENTION_GAZE_LOSS_SECONDS are reported as streaks.
+ATTENTION_GAZE_LOSS_BELOW = get_setting("ATTENTION_GAZE_LOSS_BELOW", 50.0, float)
+ATTENTION_GAZE_LOSS_SECONDS = get_setting("ATTENTION_GAZE_LOSS_SECONDS", 2.0, float)
+
+
+def frames_array(samples) -> np.ndarray:
+    """
+    Packs (timestamp, faces, eyes, face_area) tuples into a FRAME_DTYPE array.
+    """
+    return np.array(list(samples), dtype=FRAME_DTYPE)
+
+
+def frame_scores(frames: np.ndarray) -> np.ndarray:
+    """
+    100 where some face shows both eyes, 50 where only faces are found, 0 otherwise.
+    """
+    return np.where((frames["faces"] > 0) & (frames["eyes"] >= 2), 100.0, np.where(frames["faces"] > 0, 50.0, 0.0)).astype(np.float32)
+
+
+def smooth_scores(timestamps: np.ndarray, scores: np.ndarray, window_seconds: float) -> np.ndarray:
+    """
+    Centered moving average over `window_seconds`, by timestamp rather than sample
+    count so it stays correct when samples are unevenly spaced (keyframe sampling).
+    """
+    if len(scores) == 0 or window_seconds <= 0:
+        return scores.astype(np.float32)
+    totals = np.concatenate(([0.0], np.cumsum(scores, dtype=np.float64)))
+    low = np.searchsorted(timestamps, timestamps - window_seconds / 2, side="left")
+    high = np.searchsorted(timestamps, timestamps + window_seconds / 2, side="right")
+    return ((totals[high] - totals[low]) / (high - low)).astype(np.float32)
+
+
+def gaze_loss_streaks(timestamps: np.ndarray, lost: np.ndarray, interval: float, min_seconds: float) -> dict:
+    """
+    Returns {"start": [...], "end": [...], "seconds": [...]} for every run of `lost`
+    frames lasting at least `min_seconds`. Each sample stands for `interval` seconds.
+    """
+    edges = np.diff(np.concatenate(([0], lost.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1) - 1
+    start_times = timestamps[starts]
+    end_times = timestamps[ends] + interval
+    durations = end_times - start_times
+    keep = durations >= min_seconds
+    return {
+        "start": np.round(start_times[keep], 2).tolist(),
+        "end": np.round(end_times[keep], 2).tolist(),
+        "seconds": np.round(durations[keep], 2).tolist(),
+    }
+
+
+def per_second(timestamps: np.ndarray, *columns: np.ndarray) -> tuple:
+    """
+    Averages each column over whole seconds. Returns (seconds, column averages...).
+    """
+    seconds, buckets = np.unique(timestamps.astype(np.int64), return_inverse=True)
+    counts = np.bincount(buckets)
+    return (seconds, *(np.bincount(buckets, weights=column) / counts for column in columns))
+
+
+def encode_frames(frames: np.ndarray) -> str:
+    return base64.b64encode(frames.astype(FRAME_DTYPE).tobytes()).decode("ascii")
+
+
+def decode_frames(payload: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(payload), dtype=FRAME_DTYPE)
+
+
+def summarize_attention(frames: np.ndarray, rate: float) -> dict:
+    """
+    Turns the per-frame measurements of a video sampled `rate` times per second into
+        {"average", "samples",
+         "timeline": {"second": [...], "score": [...], "smoothed": [...], "faces": [...]},
+         "gaze_loss": {"start": [...], "end": [...], "seconds": [...]}, "longest_gaze_loss",
+         "frames": base64 FRAME_DTYPE array for overlays}.
+    """
+    timestamps = frames["timestamp"].astype(np.float64)
+    scores = frame_scores(frames)
+    smoothed = smooth_scores(timestamps, scores, ATTENTION_SMOOTHING_SECONDS)
+    streaks = gaze_loss_streaks(timestamps, smoothed < ATTENTION_GAZE_LOSS_BELOW, 1.0 / rate,
+                                ATTENTION_GAZE_LOSS_SECONDS)
+    seconds, second_scores, second_smoothed, second_faces = per_second(
+        timestamps, scores, smoothed, frames["faces"].astype(np.float64)
+    )
+
+    return {
+        "average": float(scores.mean()) if len(scores) else 0.0,
+        "samples": len(frames),
+        "timeline": {
+            "second": seconds.tolist(),
+            "score": np.round(second_scores, 1).tolist(),
+            "smoothed": np.round(second_smoothed, 1).tolist(),
+            "faces": np.round(second_faces, 2).tolist(),
+        },
+        "gaze_loss": streaks,
+        "longest_gaze_loss": max(streaks["seconds"], default=0.0),
+        "frames": encode_frames(frames),
+    }
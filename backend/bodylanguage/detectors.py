@@ -0,0 +1,199 @@
+import os
+import sys
+import urllib.request
+
+import cv2
+import numpy as np
+
+from resources import get_setting, root_dir
+
+from .attention import (
+    clip_box,
+    count_eyes,
+    detect_faces,
+    load_cascades,
+    summarize_faces,
+)
+
+# Face detector backends for attention scoring, chosen with FACE_DETECTOR:
+#   - "haar":  the original Haar face + eye cascades (no model files needed)
+#   - "ssd":   OpenCV's ResNet-10 SSD face detector through cv2.dnn, with several frames
+#              per forward pass (FACE_DETECTOR_BATCH); eyes are still counted with the
+#              Haar eye cascade, but only inside the detected faces
+#   - "yunet": OpenCV's YuNet (cv2.FaceDetectorYN); its eye and nose landmarks tell
+#              whether a face is turned towards the camera, which stands in for "both
+#              eyes visible"
+# Every backend measures a list of frames and returns (faces, eyes, face_area) per frame,
+# the same tuple as attention.measure_frame. The DNN models are downloaded once with
+#     python -m bodylanguage.detectors download ssd yunet
+FACE_DETECTOR = get_setting("FACE_DETECTOR", "haar")
+FACE_DETECTOR_MODEL_DIR = get_setting("FACE_DETECTOR_MODEL_DIR", os.path.join(root_dir, "models"))
+FACE_DETECTOR_BATCH = get_setting("FACE_DETECTOR_BATCH", 8, int)
+FACE_DETECTOR_CONFIDENCE = get_setting("FACE_DETECTOR_CONFIDENCE", 0.6, float)
+# A YuNet face counts as facing the camera when the nose is within this fraction of the
+# eye distance from the point between the eyes (roughly +/-30 degrees of yaw).
+YUNET_MAX_NOSE_OFFSET = get_setting("YUNET_MAX_NOSE_OFFSET", 0.3, float)
+
+MODEL_FILES = {
+    "ssd": {
+        "deploy.prototxt":
+            "https://raw.githubusercontent.com/opencv/opencv/4.x/samples/dnn/face_detector/deploy.prototxt",
+        "res10_300x300_ssd_iter_140000_fp16.caffemodel":
+            "https://raw.githubusercontent.com/opencv/opencv_3rdparty/dnn_samples_face_detector_20180205_fp16/"
+            "res10_300x300_ssd_iter_140000_fp16.caffemodel",
+    },
+    "yunet": {
+        "face_detection_yunet_2023mar.onnx":
+            "https://github.com/opencv/opencv_zoo/raw/main/models/face_detection_yunet/"
+            "face_detection_yunet_2023mar.onnx",
+    },
+}
+
+
+def model_path(backend: str, filename: str) -> str:
+    path = os.path.join(FACE_DETECTOR_MODEL_DIR, filename)
+    if not os.path.exists(path):
+        raise ValueError(
+            f"Model file {filename} for the '{backend}' face detector is missing from {FACE_DETECTOR_MODEL_DIR}; "
+            f"run: python -m bodylanguage.detectors download {backend}"
+        )
+    return path
+
+
+class FaceDetector:
+    """
+    Base for the backends. Subclasses implement detect(frames), returning (boxes, eyes)
+    per frame with an (x, y, w, h) pixel box and an eye count per face, and
+    count_eyes(frame, box) for a single face box (used by bodylanguage.tracking).
+    """
+    name = None
+    grayscale = False
+
+    def detect(self, frames: list) -> list:
+        raise NotImplementedError
+
+    def count_eyes(self, frame, box) -> int:
+        raise NotImplementedError
+
+    def measure(self, frames: list) -> list:
+        return [summarize_faces(boxes, eyes, frame.shape) for frame, (boxes, eyes) in zip(frames, self.detect(frames))]
+
+
+class HaarDetector(FaceDetector):
+    name = "haar"
+    grayscale = True
+
+    def __init__(self):
+        self.face_cascade, self.eye_cascade = load_cascades()
+
+    def detect(self, frames: list) -> list:
+        return [detect_faces(gray, self.face_cascade, self.eye_cascade) for gray in frames]
+
+    def count_eyes(self, frame, box) -> int:
+        return count_eyes(frame, box, self.eye_cascade)
+
+
+class SSDDetector(FaceDetector):
+    name = "ssd"
+
+    def __init__(self, batch_size: int = FACE_DETECTOR_BATCH, confidence: float = FACE_DETECTOR_CONFIDENCE):
+        self.net = cv2.dnn.readNetFromCaffe(
+            model_path(self.name, "deploy.prototxt"),
+            model_path(self.name, "res10_300x300_ssd_iter_140000_fp16.caffemodel"),
+        )
+        self.eye_cascade = load_cascades()[1]
+        self.batch_size = batch_size
+        self.confidence = confidence
+
+    def detect(self, frames: list) -> list:
+        results = []
+        for start in range(0, len(frames), self.batch_size):
+            batch = frames[start:start + self.batch_size]
+            self.net.setInput(cv2.dnn.blobFromImages(batch, 1.0, (300, 300), (104.0, 177.0, 123.0)))
+            # One row per detection across the whole batch: [image, label, confidence, x1, y1, x2, y2].
+            detections = self.net.forward().reshape(-1, 7)
+            detections = detections[detections[:, 2] >= self.confidence]
+            for image_index, frame in enumerate(batch):
+                corners = np.clip(detections[detections[:, 0] == image_index, 3:7], 0.0, 1.0)
+                height, width = frame.shape[:2]
+                corners = (corners * [width, height, width, height]).astype(int)
+                boxes = [(x1, y1, x2 - x1, y2 - y1) for x1, y1, x2, y2 in corners if x2 > x1 and y2 > y1]
+                results.append((boxes, [self.count_eyes(frame, box) for box in boxes]))
+        return results
+
+    def count_eyes(self, frame, box) -> int:
+        x, y, w, h = clip_box(box, frame.shape)
+        if w == 0 or h == 0:
+            return 0
+        return len(self.eye_cascade.detectMultiScale(cv2.cvtColor(frame[y:y+h, x:x+w], cv2.COLOR_BGR2GRAY)))
+
+
+class YuNetDetector(FaceDetector):
+    name = "yunet"
+
+    def __init__(self, confidence: float = FACE_DETECTOR_CONFIDENCE):
+        # cv2.FaceDetectorYN takes one image per call, so frames are measured one by one;
+        # at 640x480 it is still several times faster than the cascades.
+        self.detector = cv2.FaceDetectorYN.create(
+            model_path(self.name, "face_detection_yunet_2023mar.onnx"), "", (640, 480), score_threshold=confidence
+        )
+        self.input_size = (640, 480)
+
+    def _detect_one(self, image):
+        height, width = image.shape[:2]
+        if (width, height) != self.input_size:
+            self.detector.setInputSize((width, height))
+            self.input_size = (width, height)
+        _, faces = self.detector.detect(image)
+        if faces is None:
+            return [], []
+
+        # Columns: x, y, w, h, right eye, left eye, nose tip, mouth corners (x, y each), score.
+        right_eye, left_eye, nose = faces[:, 4:6], faces[:, 6:8], faces[:, 8:10]
+        eye_distance = np.maximum(np.linalg.norm(left_eye - right_eye, axis=1), 1.0)
+        nose_offset = np.abs(nose[:, 0] - (left_eye[:, 0] + right_eye[:, 0]) / 2) / eye_distance
+        eyes = np.where(nose_offset <= YUNET_MAX_NOSE_OFFSET, 2, 1)
+        boxes = [tuple(int(value) for value in face[:4]) for face in faces]
+        return boxes, eyes.tolist()
+
+    def detect(self, frames: list) -> list:
+        return [self._detect_one(frame) for frame in frames]
+
+    def count_eyes(self, frame, box) -> int:
+        # Re-run YuNet on the face with some margin; a small crop is cheap to detect in.
+        x, y, w, h = box
+        x, y, w, h = clip_box((x - w / 4, y - h / 4, w * 1.5, h * 1.5), frame.shape)
+        if w < 10 or h < 10:
+            return 0
+        _, eyes = self._detect_one(frame[y:y+h, x:x+w])
+        return max(eyes, default=0)
+
+
+DETECTORS = {"haar": HaarDetector, "ssd": SSDDetector, "yunet": YuNetDetector}
+
+
+def load_detector(name: str = FACE_DETECTOR):
+    """
+    Creates a face detector backend by name (see DETECTORS).
+    """
+    if name not in DETECTORS:
+        raise ValueError(f"Unknown face detector '{name}', expected one of {', '.join(DETECTORS)}")
+    return DETECTORS[name]()
+
+
+def download_models(backend: str):
+    os.makedirs(FACE_DETECTOR_MODEL_DIR, exist_ok=True)
+    for filename, url in MODEL_FILES.get(backend, {}).items():
+        path = os.path.join(FACE_DETECTOR_MODEL_DIR, filename)
+        if os.path.exists(path):
+            continue
+        print(f"Downloading {url}")
+        urllib.request.urlretrieve(url, path + ".part")
+        os.replace(path + ".part", path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] != "download":
+        sys.exit("usage: python -m bodylanguage.detectors download ssd|yunet [...]")
+    for backend_name in sys.argv[2:]:
+        download_models(backend_name)
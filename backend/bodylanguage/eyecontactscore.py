@@ -1,14 +1,38 @@
-import cv2
 import os
-import sys
 import tempfile
-from flask import Blueprint, request, jsonify
-from dotenv import load_dotenv
-from transcription.get_transcription import get_transcription  # Helper for audio extraction & transcription
-from openai import OpenAI
+from flask import Blueprint, Response, jsonify
+from transcription.get_transcription import get_transcription, is_transcribed  # Helper for audio extraction & transcription
+from transcription.extractaudio import extract_audio_from_file
+from resources import get_setting
+from llm.chat import chat_completion
+from evaluation.pitch_analysis import LLM_COMBINED_ANALYSIS, get_pitch_analysis
+from media.media_store import get_media, get_artifact, find_artifact, get_transcript, get_audio_track, list_artifacts
+from jobs.dag import run_dag, StageFailedError
+from llm.streaming import sse_event, sse_response, stream_chat, stream_text_events
+from media.upload_stream import receive_upload
+from .parallel_attention import plan_attention, score_attention_plan
+from .attention_model import FRAME_DTYPE, decode_frames
 
 contact_score = Blueprint("contact-score", __name__)
 
+# Frames scored per second of video. Only these frames are decoded (see media.frame_sampler),
+# which replaces the old "read everything, keep every 30th frame" loop. Worker count and
+# range length for parallel scoring are ATTENTION_WORKERS and ATTENTION_CHUNK_SECONDS.
+ATTENTION_SAMPLE_RATE = get_setting("ATTENTION_SAMPLE_RATE", 1.0, float)
+
+def feedback_messages(transcript: str) -> list:
+    prompt = (
+        "I have reviewed your pitch transcript. Please provide a concise summary and direct feedback "
+        "in a friendly, first-person tone. Your response should include a brief summary of the pitch, "
+        "highlight its strengths, and suggest areas for improvement. Keep your response under 150 words, "
+        "and ensure it forms a complete, coherent paragraph without cutting off abruptly.\n\n"
+        f"Transcript:\n\n{transcript}"
+    )
+    return [
+        {"role": "system", "content": "You are an experienced venture capitalist providing direct feedback on a pitch."},
+        {"role": "user", "content": prompt}
+    ]
+
 def generate_feedback(transcript: str) -> str:
     """
     Uses the OpenAI API to generate a concise feedback response based on the transcript.
@@ -16,104 +40,222 @@ def generate_feedback(transcript: str) -> str:
     of the pitch along with constructive suggestions. Please keep the feedback under 150 words
     and ensure it doesn't cut off abruptly.
     """
-    # Load environment variables from the root directory
-    root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
-    dotenv_path = os.path.join(root_dir, ".env")
-    load_dotenv(dotenv_path)
+    if LLM_COMBINED_ANALYSIS:
+        # Shares one completion with the evaluation and questions (see evaluation.pitch_analysis).
+        return get_pitch_analysis(transcript)["feedback"].strip()
 
-    openai_api_key = os.getenv("OPENAI_API_KEY")
-    if not openai_api_key:
-        print("Error: OPENAI_API_KEY not found in .env file.")
-        sys.exit(1)
+    response = chat_completion(feedback_messages(transcript), "gpt-4o", similar_to=transcript, max_tokens=300)
 
-    client = OpenAI(api_key=openai_api_key)
+    summarised_feedback = response.strip()
+    return summarised_feedback
 
-    prompt = (
-        "I have reviewed your pitch transcript. Please provide a concise summary and direct feedback "
-        "in a friendly, first-person tone. Your response should include a brief summary of the pitch, "
-        "highlight its strengths, and suggest areas for improvement. Keep your response under 150 words, "
-        "and ensure it forms a complete, coherent paragraph without cutting off abruptly.\n\n"
-        f"Transcript:\n\n{transcript}"
-    )
+def analyse_attention(video_path: str) -> dict:
+    """
+    Scores the video in parallel time ranges (see bodylanguage.parallel_attention) and
+    returns the summary from bodylanguage.attention_model.summarize_attention.
+    """
+    plan = plan_attention(video_path, ATTENTION_SAMPLE_RATE)
+    return score_attention_plan(plan)
 
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[
-            {"role": "system", "content": "You are an experienced venture capitalist providing direct feedback on a pitch."},
-            {"role": "user", "content": prompt}
-        ],
-        max_tokens=300,
-    )
+def score_attention(video_path: str) -> float:
+    """
+    Returns the average attention score (0-100) over the sampled frames of the video.
+    """
+    return analyse_attention(video_path)["average"]
 
-    summarised_feedback = response.choices[0].message.content.strip()
-    return summarised_feedback
+def _extract_audio(video_path: str, folder: str) -> str:
+    audio_path = extract_audio_from_file(video_path, os.path.join(folder, "audio"))
+    if audio_path is None:
+        raise ValueError("Could not extract audio from the video")
+    return audio_path
 
-@contact_score.route("", methods=["POST"])
-def calculate_average_attention_score():
-    if "video" not in request.files:
-        return jsonify({"error": "No video file provided"}), 400
+def upload_contact_score_stages(video_path: str, content_hash: str, temp_dir: str, with_feedback: bool = True) -> list:
+    """
+    The /contact-score pipeline as a dependency graph for jobs.dag.run_dag. Frame scoring
+    (CPU-bound) starts once audio extraction is done and runs while Whisper is in flight
+    (mostly waiting on the network), and the feedback starts as soon as the transcript
+    is ready.
+    """
+    def frames(ctx):
+        return plan_attention(video_path, ATTENTION_SAMPLE_RATE)
 
-    video_file = request.files["video"]
-    if video_file.filename == "":
-        return jsonify({"error": "No selected file"}), 400
+    def attention(ctx):
+        return score_attention_plan(ctx["frames"])
 
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_video_path = os.path.join(temp_dir, video_file.filename)
-        video_file.save(temp_video_path)
+    def audio(ctx):
+        # Nothing to extract if this upload has been transcribed before.
+        if is_transcribed(content_hash):
+            return None
+        return _extract_audio(video_path, temp_dir)
 
-        cap = cv2.VideoCapture(temp_video_path)
-        if not cap.isOpened():
-            return jsonify({"error": "Unable to open video file"}), 500
+    def transcript(ctx):
+        return get_transcription(
+            video_path,
+            content_hash=content_hash,
+            audio_path_provider=lambda: ctx["audio"] or _extract_audio(video_path, temp_dir),
+        )
 
-        face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-        eye_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
+    def feedback(ctx):
+        return generate_feedback(ctx["transcript"])
 
-        attention_scores = []
-        frame_skip = 30  # Process every 30th frame
-        frame_count = 0
+    # Audio extraction is short but on the critical path (Whisper is the slowest step), so
+    # frame scoring waits for it instead of competing with ffmpeg for CPU, then runs
+    # while the transcription request is in flight.
+    stages = [
+        ("audio", audio, []),
+        ("transcript", transcript, ["audio"]),
+        ("frames", frames, ["audio"]),
+        ("attention", attention, ["frames"]),
+    ]
+    if with_feedback:
+        stages.append(("feedback", feedback, ["transcript"]))
+    return stages
+
+def media_contact_score_stages(media_id: str, with_feedback: bool = True) -> list:
+    """
+    Same graph for a video stored through POST /media. Each stage goes through the media
+    store, so a re-run for the same media ID reuses everything already computed.
+    """
+    def frames(ctx):
+        # Probe the video and split it into ranges for the parallel attention scorer.
+        if "attention" in list_artifacts(media_id):
+            return None
+        return plan_attention(get_media(media_id)["path"], ATTENTION_SAMPLE_RATE)
 
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
+    def attention(ctx):
+        return get_artifact(media_id, "attention", lambda meta: score_attention_plan(ctx["frames"]))
 
-            # skip frames for lower process load
-            if frame_count % frame_skip != 0:
-                frame_count += 1
-                continue
+    def audio(ctx):
+        if "transcript" in list_artifacts(media_id) or is_transcribed(get_media(media_id)["sha256"]):
+            return None
+        return get_audio_track(media_id)
 
-            # resize for faster processing
-            frame = cv2.resize(frame, (640, 480))
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = face_cascade.detectMultiScale(gray, scaleFactor=1.3, minNeighbors=5)
-            attention_score = 0
+    def transcript(ctx):
+        return get_transcript(media_id)
 
-            for (x, y, w, h) in faces:
-                roi_gray = gray[y:y+h, x:x+w]
-                eyes = eye_cascade.detectMultiScale(roi_gray)
-                if len(eyes) >= 2:
-                    attention_score = 100  # Full attention
-                else:
-                    attention_score = 50   # Partial attention - this would be chnaged with faster processor
+    def feedback(ctx):
+        return get_artifact(media_id, "feedback", lambda meta: generate_feedback(ctx["transcript"]))
 
-            attention_scores.append(attention_score)
-            frame_count += 1
+    # Stage names double as context keys, so "attention" ends up holding the scores.
+    stages = [
+        ("audio", audio, []),
+        ("transcript", transcript, ["audio"]),
+        ("frames", frames, ["audio"]),
+        ("attention", attention, ["frames"]),
+    ]
+    if with_feedback:
+        stages.append(("feedback", feedback, ["transcript"]))
+    return stages
 
-        cap.release()
+def _run_stages(stages: list):
+    """
+    Runs a contact-score graph and returns (context, timings, None), or
+    (None, None, error response) if a stage raised a ValueError (e.g. an unreadable video).
+    """
+    context = {}
+    try:
+        timings = run_dag(stages, context)
+    except StageFailedError as e:
+        if isinstance(e.error, ValueError):
+            return None, None, (jsonify({"error": str(e.error), "stage": e.stage}), 500)
+        raise e.error
+    return context, timings, None
 
-        if attention_scores:
-            avg_attention_score = sum(attention_scores) / len(attention_scores)
-        else:
-            avg_attention_score = 0.0
+def _contact_score_response(context: dict, timings: dict):
+    return jsonify({
+        "attention_score": context["attention"]["average"],
+        "attention_timeline": context["attention"]["timeline"],
+        "gaze_loss": context["attention"]["gaze_loss"],
+        # Per-frame measurements, base64 of attention_model.FRAME_DTYPE (8 bytes per frame).
+        "attention_frames": context["attention"]["frames"],
+        "feedback": context["feedback"],
+        # Per-stage start offsets and durations in seconds; stages that overlap ran in parallel.
+        "timings": timings,
+    }), 200
 
-        # Extract the transcript from the video
-        transcript_text = get_transcription(temp_video_path)
+@contact_score.route("", methods=["POST"])
+def calculate_average_attention_score():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # Stream the upload straight into the temp dir, hashing it on the way in.
+        upload = receive_upload(temp_dir)
+        if upload["path"] is None:
+            return jsonify({"error": "No video file provided"}), 400
 
-        # Generate a summarized feedback response based on the transcript
-        feedback = generate_feedback(transcript_text)
+        # Attention scoring, transcription and feedback run as one dependency graph.
+        context, timings, error = _run_stages(upload_contact_score_stages(upload["path"], upload["sha256"], temp_dir))
+        if error is not None:
+            return error
 
         # Return both the attention score and the summarized feedback.
-        return jsonify({
-            "attention_score": avg_attention_score,
-            "feedback": feedback
-        }), 200
+        return _contact_score_response(context, timings)
+
+@contact_score.route("/<media_id>", methods=["POST"])
+def calculate_media_attention_score(media_id):
+    # Same as above, for a video already stored through POST /media. Each step is memoized per media ID.
+    if get_media(media_id) is None:
+        return jsonify({"error": "Unknown media ID"}), 404
+
+    context, timings, error = _run_stages(media_contact_score_stages(media_id))
+    if error is not None:
+        return error
+    return _contact_score_response(context, timings)
+
+@contact_score.route("/<media_id>/attention-frames", methods=["GET"])
+def get_attention_frames(media_id):
+    # The raw per-frame array for UI overlays, once the media has been scored.
+    attention = find_artifact(media_id, "attention")
+    if attention is None or "frames" not in attention:
+        return jsonify({"error": "Attention has not been scored for this media"}), 404
+    return Response(decode_frames(attention["frames"]).tobytes(), mimetype="application/octet-stream",
+                    headers={"X-Frame-Dtype": str(FRAME_DTYPE.descr)})
+
+def _attention_event(attention: dict) -> str:
+    return sse_event("attention", {
+        "attention_score": attention["average"],
+        "attention_timeline": attention["timeline"],
+        "gaze_loss": attention["gaze_loss"],
+    })
+
+@contact_score.route("/stream", methods=["POST"])
+def stream_average_attention_score():
+    # Streaming variant: the attention score is sent as soon as it is known, then the
+    # feedback token by token ("delta" events) and finally a "done" event with the full text.
+    with tempfile.TemporaryDirectory() as temp_dir:
+        upload = receive_upload(temp_dir)
+        if upload["path"] is None:
+            return jsonify({"error": "No video file provided"}), 400
+
+        context, _, error = _run_stages(
+            upload_contact_score_stages(upload["path"], upload["sha256"], temp_dir, with_feedback=False)
+        )
+        if error is not None:
+            return error
+
+    def events():
+        yield _attention_event(context["attention"])
+        yield from stream_text_events(stream_chat(feedback_messages(context["transcript"]), "gpt-4o", similar_to=context["transcript"], max_tokens=300))
+
+    return sse_response(events())
+
+@contact_score.route("/<media_id>/stream", methods=["POST"])
+def stream_media_attention_score(media_id):
+    if get_media(media_id) is None:
+        return jsonify({"error": "Unknown media ID"}), 404
+
+    context, _, error = _run_stages(media_contact_score_stages(media_id, with_feedback=False))
+    if error is not None:
+        return error
+
+    def events():
+        yield _attention_event(context["attention"])
+        feedback = find_artifact(media_id, "feedback")
+        if feedback is not None:
+            yield sse_event("done", {"text": feedback})
+            return
+        # The streamed feedback is stored like the non-streaming route's, so both reuse it.
+        yield from stream_text_events(
+            stream_chat(feedback_messages(context["transcript"]), "gpt-4o", similar_to=context["transcript"], max_tokens=300),
+            on_done=lambda text: get_artifact(media_id, "feedback", lambda meta: text),
+        )
+
+    return sse_response(events())
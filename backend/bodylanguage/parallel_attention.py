@@ -0,0 +1,142 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import cache
+
+import cv2
+import numpy as np
+
+from media.frame_sampler import (
+    choose_method,
+    probe_keyframes,
+    probe_video,
+    sample_frames,
+    sample_times,
+)
+from resources import face_detector, get_setting
+from telemetry.tracing import record_span, span
+
+from .attention_model import frames_array, summarize_attention
+from .detectors import FACE_DETECTOR, FACE_DETECTOR_BATCH
+from .tracking import FACE_TRACKING, FaceTracker
+
+# Attention scoring split into time ranges that are scored in a process pool. Each worker
+# loads its face detector once and opens its own cv2.VideoCapture per range, then the
+# per-range frame arrays are merged and summarized (see bodylanguage.attention_model).
+ATTENTION_WORKERS = get_setting("ATTENTION_WORKERS", os.cpu_count() or 1, int)
+ATTENTION_CHUNK_SECONDS = get_setting("ATTENTION_CHUNK_SECONDS", 30.0, float)
+FRAME_SIZE = (640, 480)
+
+_pool_guard = threading.Lock()
+
+
+def _init_worker():
+    # Each process already gets its own core; stop OpenCV spawning threads on top of that.
+    cv2.setNumThreads(1)
+    with face_detector():
+        pass
+
+
+def _score_segment(video_path, rate, method, start, end):
+    """
+    Returns (frame indices, FRAME_DTYPE measurements, seconds taken) for the sampled
+    frames in [start, end).
+    """
+    started = time.perf_counter()
+    with face_detector() as detector:
+        indices, frames = _measure_segment(detector, video_path, rate, method, start, end)
+    return indices, frames, time.perf_counter() - started
+
+
+def _measure_segment(detector, video_path, rate, method, start, end):
+    if FACE_TRACKING:
+        # Tracking state only holds within one contiguous range of samples.
+        detector = FaceTracker(detector)
+    indices, timestamps, measurements, batch = [], [], [], []
+    for frame_index, timestamp, frame in sample_frames(
+        video_path, rate=rate, size=FRAME_SIZE, grayscale=detector.grayscale, method=method, start=start, end=end
+    ):
+        indices.append(frame_index)
+        timestamps.append(timestamp)
+        batch.append(frame)
+        # DNN backends run a whole batch per forward pass; only a batch of frames is held in memory.
+        if len(batch) == FACE_DETECTOR_BATCH:
+            measurements.extend(detector.measure(batch))
+            batch = []
+    measurements.extend(detector.measure(batch))
+    samples = [(timestamp, *measurement) for timestamp, measurement in zip(timestamps, measurements)]
+    return np.array(indices, dtype=np.int64), frames_array(samples)
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """
+    Returns the shared scoring pool of ATTENTION_WORKERS processes, started on first
+    use. "spawn" is used so workers never inherit locks from the threaded Flask
+    process, and it behaves the same on Windows.
+    """
+    with _pool_guard:
+        return _create_pool()
+
+
+@cache
+def _create_pool() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=ATTENTION_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+    )
+
+
+def shutdown_pool():
+    with _pool_guard:
+        if _create_pool.cache_info().currsize:
+            _create_pool().shutdown(wait=True, cancel_futures=True)
+            _create_pool.cache_clear()
+
+
+def plan_attention(video_path: str, rate: float, chunk_seconds: float = ATTENTION_CHUNK_SECONDS) -> dict:
+    """
+    Probes the video and splits it into time ranges of `chunk_seconds`. The decode
+    method is chosen once for the whole video so every range samples exactly the
+    frames the single-process path would.
+    """
+    with span("attention.plan"):
+        info = probe_video(video_path)
+        method = choose_method(sample_times(info["duration"], rate), probe_keyframes(video_path), rate)
+
+    segments = []
+    start = 0.0
+    while start < info["duration"]:
+        end = min(start + chunk_seconds, info["duration"])
+        segments.append((start, end))
+        start = end
+    return {"video_path": video_path, "rate": rate, "method": method, "segments": segments}
+
+
+def score_attention_plan(plan: dict, workers: int = ATTENTION_WORKERS) -> dict:
+    """
+    Scores every range of an attention plan and merges the results into one
+    summary (see attention_model.summarize_attention). With workers > 1 the ranges
+    go to the shared pool, otherwise they are scored in this process.
+    """
+    args = [(plan["video_path"], plan["rate"], plan["method"], start, end) for start, end in plan["segments"]]
+    with span("attention.score", segments=len(args)) as stage:
+        if workers > 1 and len(args) > 1:
+            pool = get_pool()
+            segment_results = list(pool.map(_score_segment, *zip(*args)))
+        else:
+            segment_results = [_score_segment(*segment_args) for segment_args in args]
+        stage.set(frames=sum(len(frames) for _, frames, _ in segment_results))
+    # Decode and detection ran in the worker processes; record each range's time here.
+    for _, frames, seconds in segment_results:
+        record_span("attention.segment", seconds, frames=len(frames))
+
+    indices = np.concatenate([indices for indices, _, _ in segment_results] or [np.empty(0, dtype=np.int64)])
+    frames = np.concatenate([frames for _, frames, _ in segment_results] or [frames_array([])])
+    # A keyframe near a range boundary can be picked by both neighbours; count it once.
+    _, first = np.unique(indices, return_index=True)
+    summary = summarize_attention(frames[first], plan["rate"])
+    summary["detector"] = FACE_DETECTOR + ("+tracking" if FACE_TRACKING else "")
+    return summary
@@ -0,0 +1,109 @@
+import cv2
+import numpy as np
+
+from resources import get_setting
+
+from .attention import clip_box, summarize_faces
+
+# Detect-then-track: the full-frame face detector only runs every
+# FACE_TRACKING_REDETECT_FRAMES samples, or sooner when tracking is lost. In between, the
+# face boxes are moved with Lucas-Kanade optical flow on corner points inside each box,
+# and eyes are only looked for inside the tracked boxes. A presenter barely moves, so
+# this makes higher sample rates (e.g. ATTENTION_SAMPLE_RATE=5) affordable.
+FACE_TRACKING = get_setting("FACE_TRACKING", False, lambda value: value == "1")
+FACE_TRACKING_REDETECT_FRAMES = get_setting("FACE_TRACKING_REDETECT_FRAMES", 10, int)
+# Tracking of a box is lost when fewer points than this survive the forward-backward check.
+FACE_TRACKING_MIN_POINTS = get_setting("FACE_TRACKING_MIN_POINTS", 8, int)
+# Forward-backward error (pixels) above which a tracked point is dropped.
+FACE_TRACKING_MAX_ERROR = 1.5
+
+_LK_PARAMS = {"winSize": (21, 21), "maxLevel": 3,
+              "criteria": (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03)}
+
+
+def _seed_points(gray, box):
+    x, y, w, h = clip_box(box, gray.shape)
+    if w < 8 or h < 8:
+        return None
+    mask = np.zeros(gray.shape, dtype=np.uint8)
+    mask[y:y+h, x:x+w] = 255
+    return cv2.goodFeaturesToTrack(gray, maxCorners=60, qualityLevel=0.01, minDistance=4, mask=mask)
+
+
+class FaceTracker:
+    """
+    Wraps a detector from bodylanguage.detectors with the same measure(frames)
+    interface. Frames must be consecutive samples of one video range; use a new
+    tracker per range.
+    """
+
+    def __init__(self, detector, redetect_frames: int = FACE_TRACKING_REDETECT_FRAMES):
+        self.detector = detector
+        self.grayscale = detector.grayscale
+        self.redetect_frames = redetect_frames
+        self.previous_gray = None
+        self.tracks = []    # [box, points] per face
+        self.since_detection = 0
+        self.detections = 0
+        self.tracked = 0
+
+    def measure(self, frames: list) -> list:
+        results = []
+        for frame in frames:
+            gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            boxes = None
+            # No face last time means there is nothing to track; detect until one shows up.
+            if self.tracks and self.since_detection < self.redetect_frames:
+                boxes = self._track(gray)
+
+            if boxes is None:
+                boxes, eyes = self.detector.detect([frame])[0]
+                self.tracks = [[box, _seed_points(gray, box)] for box in boxes]
+                self.tracks = [track for track in self.tracks if track[1] is not None]
+                self.since_detection = 0
+                self.detections += 1
+            else:
+                eyes = [self.detector.count_eyes(frame, box) for box in boxes]
+                self.since_detection += 1
+                self.tracked += 1
+
+            self.previous_gray = gray
+            results.append(summarize_faces(boxes, eyes, gray.shape))
+        return results
+
+    def _track(self, gray):
+        """
+        Moves every tracked box to the current frame. Returns the new boxes, or None if
+        any face was lost, so the caller re-detects.
+        """
+        boxes = []
+        for track in self.tracks:
+            box, points = track
+            moved, status, _ = cv2.calcOpticalFlowPyrLK(self.previous_gray, gray, points, None, **_LK_PARAMS)
+            back, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self.previous_gray, moved, None, **_LK_PARAMS)
+            error = np.linalg.norm((points - back).reshape(-1, 2), axis=1)
+            good = (status.ravel() == 1) & (back_status.ravel() == 1) & (error < FACE_TRACKING_MAX_ERROR)
+            if good.sum() < FACE_TRACKING_MIN_POINTS:
+                return None
+
+            before, after = points.reshape(-1, 2)[good], moved.reshape(-1, 2)[good]
+            # Median shift for the position, median spread ratio for the scale.
+            shift = np.median(after - before, axis=0)
+            spread_before = np.linalg.norm(before - before.mean(axis=0), axis=1)
+            spread_after = np.linalg.norm(after - after.mean(axis=0), axis=1)
+            scale = float(np.median(spread_after / np.maximum(spread_before, 1e-3)))
+            x, y, w, h = box
+            center_x, center_y = x + w / 2 + shift[0], y + h / 2 + shift[1]
+            box = (center_x - w * scale / 2, center_y - h * scale / 2, w * scale, h * scale)
+            box = clip_box(box, gray.shape)
+            if box[2] < 8 or box[3] < 8:
+                return None
+
+            track[0], track[1] = box, after.reshape(-1, 1, 2)
+            # Top the points back up once too many have been dropped.
+            if good.sum() < 2 * FACE_TRACKING_MIN_POINTS:
+                track[1] = _seed_points(gray, box)
+                if track[1] is None:
+                    return None
+            boxes.append(box)
+        return boxes
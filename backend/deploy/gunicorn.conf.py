@@ -0,0 +1,63 @@
+# Gunicorn settings for production. Run one pool per route group (see app.ROUTE_GROUPS)
+# from the backend directory, behind nginx (deploy/nginx.conf):
+#
+#     APP_ROUTES=vision gunicorn -c deploy/gunicorn.conf.py
+#     APP_ROUTES=llm gunicorn -c deploy/gunicorn.conf.py
+#
+# or APP_ROUTES=all (the default) for a single pool with every route.
+#
+# Both pools use threaded workers (gthread), for different reasons:
+#   - vision: ONE worker process. The job queue (jobs/) and the media artifact memo live in
+#     process memory, so every /jobs poll must reach the process that took the upload.
+#     CPU-heavy attention scoring already runs in its own process pool
+#     (ATTENTION_WORKERS, one per core by default), so the worker's threads mostly stream
+#     uploads and wait on ffmpeg, Whisper and that pool. A live recording WebSocket
+#     (/live/session) holds one thread for the whole recording, so raise
+#     GUNICORN_THREADS with the number of concurrent live sessions you expect.
+#   - llm: several processes with many threads each; requests spend nearly all their
+#     time waiting on the OpenAI API. The response cache and transcript cache are SQLite
+#     files shared by all processes. LLM_RATE_LIMIT_OPENAI_RPM applies per process.
+#
+# With gthread, Gunicorn's `timeout` only catches a worker whose main loop is stuck; a
+# single slow request is bounded by OPENAI_TIMEOUT_SECONDS and nginx's proxy timeouts.
+import os
+
+POOLS = {
+    "vision": {"bind": "127.0.0.1:8001", "workers": 1, "threads": 8, "graceful_timeout": 120},
+    "llm": {"bind": "127.0.0.1:8002", "workers": 2, "threads": 32, "graceful_timeout": 30},
+    "all": {"bind": "127.0.0.1:8000", "workers": 1, "threads": 16, "graceful_timeout": 120},
+}
+pool = POOLS[os.environ.setdefault("APP_ROUTES", "all")]
+
+wsgi_app = "app:app"
+bind = os.environ.get("GUNICORN_BIND", pool["bind"])
+worker_class = "gthread"
+workers = int(os.environ.get("GUNICORN_WORKERS", pool["workers"]))
+threads = int(os.environ.get("GUNICORN_THREADS", pool["threads"]))
+
+# On SIGTERM, stop accepting connections and give in-flight requests (and queued
+# contact-score jobs) this long to finish before workers are killed.
+graceful_timeout = pool["graceful_timeout"]
+timeout = 60
+keepalive = 5
+
+# Small, fixed header limits; body size is capped by MAX_UPLOAD_BYTES in the app.
+limit_request_line = 8190
+limit_request_fields = 100
+limit_request_field_size = 8190
+
+# Recycle LLM workers now and then to bound memory growth. Never the vision worker:
+# restarting it would lose the in-memory job queue.
+if os.environ["APP_ROUTES"] == "llm":
+    max_requests = 2000
+    max_requests_jitter = 200
+
+accesslog = "-"
+errorlog = "-"
+
+
+def worker_exit(server, worker):
+    # Let queued jobs finish and stop the attention process pool and judge threads.
+    from app import shutdown_app
+
+    shutdown_app(wait=True)
@@ -1,5 +1,9 @@
 from flask import Blueprint, request, jsonify
-from .script_evaluation import get_feedback
+from werkzeug.utils import secure_filename
+from .script_evaluation import get_feedback, stream_evaluation
+from .pitch_analysis import ANALYSIS_DEFAULT_PITCH_TYPE, get_pitch_analysis
+from media.media_store import get_media, get_artifact, get_transcript
+from llm.streaming import sse_response
 
 evaluation = Blueprint("evaluation", __name__)
 
@@ -9,7 +13,45 @@ def evaluate_transcript():
         return {"error": "No transcription provided"}, 400
 
     try:
-        feedback = get_feedback(request.files["transcription"], request.form["pitch_type"])
+        pitch_text = request.files["transcription"].read().decode("utf-8", "replace")
+        feedback = get_feedback(pitch_text, request.form["pitch_type"])
         return feedback
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+@evaluation.route("/evaluate_transcript/stream", methods=["POST"])
+def stream_evaluate_transcript():
+    # Streaming variant: each section of the evaluation is sent as soon as the model closes it.
+    if "transcription" not in request.files:
+        return {"error": "No transcription provided"}, 400
+
+    pitch_text = request.files["transcription"].read().decode("utf-8", "replace")
+    return sse_response(stream_evaluation(pitch_text, request.form.get("pitch_type", "")))
+
+@evaluation.route("/analysis", methods=["POST"])
+def analyse_transcript():
+    # Feedback, rubric evaluation and questions from one completion.
+    if "transcription" not in request.files:
+        return {"error": "No transcription provided"}, 400
+
+    try:
+        pitch_text = request.files["transcription"].read().decode("utf-8", "replace")
+        return get_pitch_analysis(pitch_text, request.form.get("pitch_type") or ANALYSIS_DEFAULT_PITCH_TYPE)
+    except Exception as e:  # noqa: BLE001
+        return jsonify({"error": str(e)}), 500
+
+@evaluation.route("/analysis/<media_id>", methods=["POST"])
+def analyse_media(media_id):
+    # Same for a video stored through POST /media, kept as an artifact per pitch type.
+    if get_media(media_id) is None:
+        return jsonify({"error": "Unknown media ID"}), 404
+
+    pitch_type = request.form.get("pitch_type") or ANALYSIS_DEFAULT_PITCH_TYPE
+    try:
+        transcript_text = get_transcript(media_id)
+        return get_artifact(
+            media_id, f"analysis_{secure_filename(pitch_type.lower())}",
+            lambda meta: get_pitch_analysis(transcript_text, pitch_type),
+        )
+    except Exception as e:  # noqa: BLE001
+        return jsonify({"error": str(e)}), 500
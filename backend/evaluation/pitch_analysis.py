@@ -0,0 +1,186 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from llm.chat import chat_completion
+from llm.gateway import CHARS_PER_TOKEN, estimate_tokens
+from resources import get_setting
+
+from .script_evaluation import evaluation_criteria
+
+# One structured-output completion per transcript that returns the written feedback
+# (/contact-score), the rubric evaluation (/evaluation) and the investor questions
+# (/question_generation) together, instead of sending the transcript three times.
+# The model is held to ANALYSIS_SCHEMA with response_format=json_schema, and the
+# result is checked again by validate_analysis before anything uses it.
+#
+# LLM_COMBINED_ANALYSIS=0 goes back to three separate completions. The /stream routes
+# always use their own completions, since they forward tokens as they are generated.
+LLM_COMBINED_ANALYSIS = get_setting("LLM_COMBINED_ANALYSIS", True, lambda value: value != "0")
+ANALYSIS_MODEL = get_setting("ANALYSIS_MODEL", "gpt-4o")
+# Rubric used when the caller has no pitch type (feedback, questions).
+ANALYSIS_DEFAULT_PITCH_TYPE = get_setting("ANALYSIS_DEFAULT_PITCH_TYPE", "pitch deck")
+# Transcripts longer than this are trimmed in the middle (see trim_transcript).
+LLM_TRANSCRIPT_TOKEN_BUDGET = get_setting("LLM_TRANSCRIPT_TOKEN_BUDGET", 12000, int)
+ANALYSIS_MAX_TOKENS = 3000
+# Finished analyses kept in memory per process, so the three routes share one result.
+MEMO_SIZE = 256
+
+_STRING_LIST = {"type": "array", "items": {"type": "string"}}
+ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "feedback": {"type": "string"},
+        "evaluation": {
+            "type": "object",
+            "properties": {
+                "score": {"type": "integer"},
+                "strengths": _STRING_LIST,
+                "areas_for_improvement": _STRING_LIST,
+                "suggestions": _STRING_LIST,
+                "line_references": _STRING_LIST,
+                "summary": {"type": "string"},
+            },
+            "required": ["score", "strengths", "areas_for_improvement", "suggestions", "line_references", "summary"],
+            "additionalProperties": False,
+        },
+        "questions": _STRING_LIST,
+    },
+    "required": ["feedback", "evaluation", "questions"],
+    "additionalProperties": False,
+}
+RESPONSE_FORMAT = {"type": "json_schema", "json_schema": {"name": "pitch_analysis", "strict": True,
+                                                          "schema": ANALYSIS_SCHEMA}}
+
+ANALYSIS_PROMPT_TEMPLATE = (
+    "Analyse the following {pitch_type} pitch transcript and return three things.\n\n"
+    "1. feedback: a concise summary and direct feedback in a friendly, first-person tone, as an experienced "
+    "venture capitalist. Briefly summarise the pitch, highlight its strengths and suggest areas for improvement, "
+    "in one complete, coherent paragraph of under 150 words.\n\n"
+    "2. evaluation: {criteria_text}\n"
+    "Give the strengths, areas for improvement, specific suggestions for each aspect, references to specific "
+    "lines that could be improved, a short summary, and a score out of 100 for the overall quality.\n\n"
+    "3. questions: 10 highly relevant and insightful questions that experienced investors or a panel of judges "
+    "might ask the presenter. Cover the business model, scalability, market validation, competitive landscape, "
+    "financial projections and risk management where applicable, examine both strengths and weaknesses, and "
+    "challenge the presenter to back up their claims.\n\n"
+    "Transcript:\n\n{transcript}"
+)
+
+_memo = OrderedDict()
+_memo_locks = {}
+_memo_guard = threading.Lock()
+
+
+def trim_transcript(transcript: str, max_tokens: int = LLM_TRANSCRIPT_TOKEN_BUDGET) -> str:
+    """
+    Returns the transcript unchanged if it fits in `max_tokens`, otherwise its opening
+    two thirds and closing third of the budget, cut at sentence ends, with a marker
+    where the middle was left out. Openings and closings (problem, ask) matter most.
+    """
+    if estimate_tokens(transcript) <= max_tokens:
+        return transcript
+    budget = max_tokens * CHARS_PER_TOKEN
+    head = transcript[:budget * 2 // 3]
+    tail = transcript[-(budget // 3):]
+    head = head[:head.rfind(". ") + 1] or head
+    tail = tail[tail.find(". ") + 2:] if ". " in tail else tail
+    return f"{head}\n[... middle of the transcript left out ...]\n{tail}"
+
+
+def analysis_messages(transcript: str, pitch_type: str) -> list:
+    prompt = ANALYSIS_PROMPT_TEMPLATE.format(
+        pitch_type=pitch_type, criteria_text=evaluation_criteria(pitch_type), transcript=transcript
+    )
+    return [
+        {"role": "system", "content": "You are an experienced venture capitalist who reviews pitches."},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def validate_analysis(data) -> dict:
+    """
+    Checks a parsed analysis against ANALYSIS_SCHEMA and returns it; raises ValueError
+    naming the first field that doesn't match.
+    """
+    def check(value, schema, path):
+        expected = schema["type"]
+        if expected == "object":
+            if not isinstance(value, dict):
+                raise ValueError(f"{path or 'analysis'} must be an object")
+            for key in schema["required"]:
+                if key not in value:
+                    raise ValueError(f"{path + '.' if path else ''}{key} is missing")
+                check(value[key], schema["properties"][key], f"{path + '.' if path else ''}{key}")
+        elif expected == "array":
+            if not isinstance(value, list):
+                raise ValueError(f"{path} must be a list")
+            for index, item in enumerate(value):
+                check(item, schema["items"], f"{path}[{index}]")
+        elif expected == "integer":
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise ValueError(f"{path} must be an integer")
+        elif not isinstance(value, str):
+            raise ValueError(f"{path} must be a string")
+
+    check(data, ANALYSIS_SCHEMA, "")
+    return data
+
+
+def _parse(text: str) -> dict:
+    return validate_analysis(json.loads(text))
+
+
+def analyse_pitch(transcript: str, pitch_type: str = ANALYSIS_DEFAULT_PITCH_TYPE) -> dict:
+    """
+    Runs the combined completion and returns {"feedback", "evaluation", "questions"}.
+    Raises ValueError if the answer doesn't match the schema.
+    """
+    transcript = trim_transcript(transcript)
+    text = chat_completion(
+        analysis_messages(transcript, pitch_type),
+        ANALYSIS_MODEL,
+        similar_to=transcript,
+        validate=_parse,
+        response_format=RESPONSE_FORMAT,
+        max_tokens=ANALYSIS_MAX_TOKENS,
+    )
+    try:
+        return _parse(text)
+    except (json.JSONDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid pitch analysis from the model: {e}")
+
+
+def get_pitch_analysis(transcript: str, pitch_type: str | None = None) -> dict:
+    """
+    Returns the combined analysis of a transcript, running the completion at most once
+    per transcript and pitch type in this process, however many routes ask at the same
+    time. Without a pitch type, an analysis already made with any rubric is reused.
+    """
+    transcript_key = hashlib.sha256(transcript.encode("utf-8")).hexdigest()
+    with _memo_guard:
+        if pitch_type is None:
+            cached = next((value for (key, _), value in _memo.items() if key == transcript_key), None)
+            if cached is not None:
+                return cached
+            pitch_type = ANALYSIS_DEFAULT_PITCH_TYPE
+        key = (transcript_key, pitch_type.lower())
+        lock = _memo_locks.setdefault(key, threading.Lock())
+
+    with lock:
+        with _memo_guard:
+            if key in _memo:
+                _memo.move_to_end(key)
+                return _memo[key]
+        try:
+            analysis = analyse_pitch(transcript, pitch_type)
+            with _memo_guard:
+                _memo[key] = analysis
+                while len(_memo) > MEMO_SIZE:
+                    _memo.popitem(last=False)
+        finally:
+            # Dropped whether or not the analysis succeeded, so failures don't leak locks.
+            with _memo_guard:
+                _memo_locks.pop(key, None)
+        return analysis
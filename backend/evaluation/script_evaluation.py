@@ -1,19 +1,7 @@
-import os
 import sys
 import json
-from dotenv import load_dotenv
-from openai import OpenAI
-
-root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
-dotenv_path = os.path.join(root_dir, ".env")
-load_dotenv(dotenv_path)
-
-openai_api_key = os.getenv("OPENAI_API_KEY")
-if not openai_api_key:
-    print("Error: OPENAI_API_KEY not found in .env file.")
-    sys.exit(1)
-
-client = OpenAI(api_key=openai_api_key)
+from llm.chat import chat_completion
+from llm.streaming import stream_chat, stream_json_events
 
 HACKATHON_CRITERIA = (
     "Evaluate the pitch based on the following hackathon criteria:\n"
@@ -70,53 +58,74 @@ def load_pitch_text(args):
         print("No pitch text provided.")
         sys.exit(1)
 
-def create_prompt(pitch_text, pitch_type):
+def evaluation_criteria(pitch_type):
     """
-    Create a prompt for the OpenAI model that instructs it to evaluate the pitch
-    based on predefined criteria for the specified pitch type.
+    Returns the criteria text for the specified pitch type.
     """
-    # Choose criteria text based on the pitch type
     if pitch_type.lower() == "hackathon":
-        criteria_text = HACKATHON_CRITERIA
+        return HACKATHON_CRITERIA
     elif pitch_type.lower() in ["pitchdeck", "pitch deck"]:
-        criteria_text = PITCHDECK_CRITERIA
+        return PITCHDECK_CRITERIA
     else:
-        criteria_text = "Unknown pitch type. Please choose either 'hackathon' or 'pitch deck'."
+        return "Unknown pitch type. Please choose either 'hackathon' or 'pitch deck'."
 
+def create_prompt(pitch_text, pitch_type):
+    """
+    Create a prompt for the OpenAI model that instructs it to evaluate the pitch
+    based on predefined criteria for the specified pitch type.
+    """
     prompt = EVALUATION_PROMPT_TEMPLATE.format(
         pitch_type=pitch_type,
-        criteria_text=criteria_text,
+        criteria_text=evaluation_criteria(pitch_type),
         pitch_text=pitch_text
     )
     return prompt
 
+def evaluation_messages(pitch_text, pitch_type):
+    prompt = create_prompt(pitch_text, pitch_type)
+    return [
+        {"role": "system", "content": "You are a helpful assistant that evaluates pitch quality."},
+        {"role": "user", "content": prompt}
+    ]
+
 def evaluate_pitch(pitch_text, pitch_type):
     """
     Call the OpenAI API to evaluate the pitch and return a JSON object containing the evaluation.
     """
-    prompt = create_prompt(pitch_text, pitch_type)
+    # Imported here: pitch_analysis builds its prompt from this module's criteria.
+    from .pitch_analysis import LLM_COMBINED_ANALYSIS, get_pitch_analysis
+    if LLM_COMBINED_ANALYSIS:
+        return get_pitch_analysis(pitch_text, pitch_type)["evaluation"]
+
+    result_text = chat_completion(
+        evaluation_messages(pitch_text, pitch_type),
+        "gpt-4o-mini",
+        similar_to=pitch_text,
+        validate=json.loads,
+        response_format={"type": "json_object"},
+        temperature=0.7,
+        max_tokens=2000,
+    ).strip()
     try:
-        completion = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that evaluates pitch quality."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=2000,
-        )
-        
-        result_text = completion.choices[0].message.content.strip()
-        try:
-            result_json = json.loads(result_text)
-        except json.JSONDecodeError:
-            print("Failed to parse JSON. Raw response:")
-            print(result_text)
-            sys.exit(1)
-        return result_json
-    except Exception as e:
-        print(f"Error evaluating pitch: {e}")
-        sys.exit(1)
+        return json.loads(result_text)
+    except json.JSONDecodeError:
+        raise ValueError(f"Could not parse the evaluation as JSON: {result_text[:200]}")
 
 def get_feedback(transcription: str, pitch_type: str):
     return evaluate_pitch(transcription, pitch_type)
+
+def section_event(path, value):
+    # One "section" event per top-level key (score, strengths, ...) as soon as it closes.
+    if len(path) == 1:
+        return "section", {"key": path[0], "value": value}
+    return None
+
+def stream_evaluation(pitch_text, pitch_type):
+    """
+    Streaming version of evaluate_pitch: yields SSE "section" events, then "done" with the full JSON.
+    """
+    deltas = stream_chat(
+        evaluation_messages(pitch_text, pitch_type), "gpt-4o-mini",
+        similar_to=pitch_text, validate=json.loads, temperature=0.7, max_tokens=2000,
+    )
+    return stream_json_events(deltas, section_event)
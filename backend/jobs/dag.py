@@ -0,0 +1,96 @@
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# A small dependency-graph executor for request pipelines. Stages are
+# (name, func, dependencies) tuples; a stage starts on a thread as soon as all of its
+# dependencies have finished, so independent work (CPU-bound vision, network-bound
+# transcription) overlaps instead of running back to back. Each func takes the shared
+# context dict and its return value is stored in the context under the stage's name.
+
+
+class StageFailedError(Exception):
+    def __init__(self, stage: str, error: Exception):
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+def _check_graph(stages: list):
+    names = [name for name, _, _ in stages]
+    if len(set(names)) != len(names):
+        raise ValueError("Stage names must be unique")
+    for name, _, dependencies in stages:
+        for dependency in dependencies:
+            if dependency not in names:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dependency}'")
+
+    # Kahn's algorithm: if some stages can never become ready there is a cycle.
+    remaining = {name: set(dependencies) for name, _, dependencies in stages}
+    while remaining:
+        ready = [name for name, dependencies in remaining.items() if not dependencies]
+        if not ready:
+            raise ValueError(f"Stage dependencies form a cycle: {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for dependencies in remaining.values():
+            dependencies.difference_update(ready)
+
+
+def run_dag(stages: list, context: dict, on_update=None) -> dict:
+    """
+    Runs the stages and returns their timings as
+    {name: {"start": seconds after the graph started, "seconds": duration}}.
+
+    `on_update(name, status, seconds)` is called when a stage starts ("running") and
+    ends ("done" / "failed"). If a stage raises, stages that have not started yet are
+    skipped, running ones are waited for, and StageFailedError is raised.
+    """
+    _check_graph(stages)
+    funcs = {name: func for name, func, _ in stages}
+    waiting = {name: set(dependencies) for name, _, dependencies in stages}
+    timings = {}
+    started = time.perf_counter()
+    failure = None
+
+    def run_stage(name):
+        stage_started = time.perf_counter()
+        timings[name] = {"start": round(stage_started - started, 3), "seconds": None}
+        if on_update is not None:
+            on_update(name, "running", None)
+        try:
+            return funcs[name](context)
+        finally:
+            timings[name]["seconds"] = round(time.perf_counter() - stage_started, 3)
+
+    with ThreadPoolExecutor(max_workers=len(stages) or 1, thread_name_prefix="stage") as executor:
+        running = {}
+
+        def start_ready():
+            for name in [name for name, dependencies in waiting.items() if not dependencies]:
+                del waiting[name]
+                # A copy of the caller's context, so tracing spans inside the stage reach its request.
+                running[executor.submit(contextvars.copy_context().run, run_stage, name)] = name
+
+        start_ready()
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                try:
+                    context[name] = future.result()
+                except Exception as e:  # noqa: BLE001
+                    if on_update is not None:
+                        on_update(name, "failed", timings[name]["seconds"])
+                    failure = failure or StageFailedError(name, e)
+                    continue
+                if on_update is not None:
+                    on_update(name, "done", timings[name]["seconds"])
+                for dependencies in waiting.values():
+                    dependencies.discard(name)
+            if failure is None:
+                start_ready()
+
+    if failure is not None:
+        raise failure
+    return timings
@@ -0,0 +1,156 @@
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from resources import get_setting
+
+from .dag import StageFailedError, run_dag
+
+# Jobs run on a bounded in-process thread pool, so no Redis or external broker is needed.
+# Finished jobs are kept for JOB_RETENTION_SECONDS so clients can still poll the result.
+JOB_WORKERS = get_setting("JOB_WORKERS", 2, int)
+JOB_MAX_PENDING = get_setting("JOB_MAX_PENDING", 20, int)
+JOB_RETENTION_SECONDS = get_setting("JOB_RETENTION_SECONDS", 60 * 60, int)
+QUEUE_FULL_MESSAGE = "Too many jobs in progress, please retry shortly"
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class Job:
+    """
+    A unit of work made of named stages, given as (name, func, dependencies) and run
+    with jobs.dag.run_dag: each stage starts as soon as its dependencies are done. Each
+    func takes the shared context dict; its return value is stored in the context under
+    the stage name so later stages can use it.
+    """
+
+    def __init__(self, kind: str, stages: list, context: dict, result_keys: list):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "queued"
+        self.stages = [{"name": name, "status": "pending", "seconds": None} for name, _, _ in stages]
+        self.context = context
+        self.result_keys = result_keys
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        # Bumped on every change so SSE subscribers can wait for the next update.
+        self.version = 0
+        self._graph = stages
+        self._changed = threading.Condition()
+
+    def _update(self, **fields):
+        with self._changed:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self.version += 1
+            self._changed.notify_all()
+
+    def _set_stage(self, index: int, status: str, seconds: float | None = None):
+        with self._changed:
+            self.stages[index]["status"] = status
+            if seconds is not None:
+                self.stages[index]["seconds"] = round(seconds, 3)
+            self.version += 1
+            self._changed.notify_all()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def run(self):
+        self._update(status="running")
+        indexes = {stage["name"]: index for index, stage in enumerate(self.stages)}
+        try:
+            run_dag(
+                self._graph,
+                self.context,
+                on_update=lambda name, status, seconds: self._set_stage(indexes[name], status, seconds),
+            )
+        except StageFailedError as e:
+            print(f"Job {self.id} failed in stage '{e.stage}': {e.error}")
+            traceback.print_exception(e.error)
+            self._update(status="failed", error=str(e.error), finished=time.time())
+            return
+        except Exception as e:  # noqa: BLE001
+            # An invalid stage graph or a failing on_update callback; the job must still
+            # finish, or pollers would see it "running" forever.
+            print(f"Job {self.id} failed: {e}")
+            traceback.print_exception(e)
+            self._update(status="failed", error=str(e), finished=time.time())
+            return
+
+        result = {key: self.context.get(key) for key in self.result_keys}
+        self._update(status="done", result=result, finished=time.time())
+
+    def wait_for_update(self, last_version: int, timeout: float) -> bool:
+        """
+        Blocks until the job changes after `last_version` or the timeout passes.
+        Returns True if there is a newer version to report.
+        """
+        with self._changed:
+            return self._changed.wait_for(lambda: self.version > last_version, timeout=timeout)
+
+    def to_dict(self) -> dict:
+        with self._changed:
+            return {
+                "job_id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "stages": [dict(stage) for stage in self.stages],
+                "result": self.result,
+                "error": self.error,
+                "version": self.version,
+            }
+
+
+class JobQueue:
+    def __init__(self, max_workers: int, max_pending: int, retention_seconds: int):
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, stages: list, context: dict, result_keys: list) -> Job:
+        with self._lock:
+            if self._full():
+                raise QueueFullError(QUEUE_FULL_MESSAGE)
+
+            job = Job(kind, stages, context, result_keys)
+            self._jobs[job.id] = job
+        self._executor.submit(job.run)
+        return job
+
+    def is_full(self) -> bool:
+        """
+        True when submit() would raise QueueFullError right now, so callers can refuse
+        a request before reading its upload.
+        """
+        with self._lock:
+            return self._full()
+
+    def _full(self) -> bool:
+        self._drop_expired()
+        return sum(1 for job in self._jobs.values() if not job.done) >= self.max_pending
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _drop_expired(self):
+        cutoff = time.time() - self.retention_seconds
+        expired = [job_id for job_id, job in self._jobs.items() if job.done and job.finished < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+job_queue = JobQueue(JOB_WORKERS, JOB_MAX_PENDING, JOB_RETENTION_SECONDS)
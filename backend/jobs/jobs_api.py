@@ -0,0 +1,78 @@
+from flask import Blueprint, jsonify, request
+
+from bodylanguage.eyecontactscore import media_contact_score_stages
+from llm.streaming import sse_event, sse_response
+from media.media_store import get_media, save_upload
+
+from .job_queue import QUEUE_FULL_MESSAGE, QueueFullError, job_queue
+
+jobs = Blueprint("jobs", __name__)
+
+# How long an SSE connection waits for progress before sending a keep-alive comment.
+SSE_KEEPALIVE_SECONDS = 15
+
+@jobs.route("/contact-score", methods=["POST"])
+def submit_contact_score_job():
+    # Accept either a fresh upload or a media_id from POST /media, then return at once.
+    # A full queue is refused before the video is read and stored.
+    if job_queue.is_full():
+        return jsonify({"error": QUEUE_FULL_MESSAGE}), 503
+
+    meta, form = save_upload()
+    if meta is not None:
+        media_id = meta["media_id"]
+    else:
+        media_id = form.get("media_id") or request.args.get("media_id")
+        if not media_id:
+            return jsonify({"error": "No video file provided"}), 400
+        if get_media(media_id) is None:
+            return jsonify({"error": "Unknown media ID"}), 404
+
+    try:
+        job = job_queue.submit(
+            "contact-score",
+            media_contact_score_stages(media_id),
+            context={"media_id": media_id},
+            result_keys=["media_id", "attention", "feedback"],
+        )
+    except QueueFullError as e:
+        # Filled up while the upload was streaming; the media_id lets the client retry
+        # without sending the video again.
+        return jsonify({"error": str(e), "media_id": media_id}), 503
+
+    return jsonify({
+        "job_id": job.id,
+        "media_id": media_id,
+        "status_url": f"/jobs/{job.id}",
+        "events_url": f"/jobs/{job.id}/events",
+    }), 202
+
+@jobs.route("/<job_id>", methods=["GET"])
+def get_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job ID"}), 404
+    return jsonify(job.to_dict())
+
+@jobs.route("/<job_id>/events", methods=["GET"])
+def stream_job_events(job_id):
+    # Server-Sent Events: one "progress" event per stage change, then a final "done"/"failed" event.
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job ID"}), 404
+
+    def events():
+        last_version = -1
+        while True:
+            if job.wait_for_update(last_version, timeout=SSE_KEEPALIVE_SECONDS):
+                state = job.to_dict()
+                last_version = state["version"]
+                finished = state["status"] in ("done", "failed")
+                event = state["status"] if finished else "progress"
+                yield sse_event(event, state)
+                if finished:
+                    return
+            else:
+                yield ": keep-alive\n\n"
+
+    return sse_response(events())
@@ -0,0 +1,100 @@
+import json
+import queue
+import sqlite3
+
+from flask import Blueprint
+
+from media.retention import maybe_sweep
+from media.upload_stream import UploadTooLargeError
+
+from .live_session import LiveSession
+
+live = Blueprint("live", __name__)
+
+# WebSocket /live/session, served by flask-sock (simple-websocket underneath), which
+# works with both the Werkzeug dev server and Gunicorn's gthread workers. Protocol:
+#   client -> {"type": "start", "filename": "pitch.webm", "audio": true}   (text, once)
+#   client -> binary MediaRecorder chunks, in order
+#   server -> {"type": "ready", "media_id"}, then "attention" / "transcript" updates
+#   client -> {"type": "stop"}
+#   server -> {"type": "final", ...} (see LiveSession.finish), then closes; if finishing
+#              fails, {"type": "error", "stage": "finish", "media_id"} names the kept recording
+# A start or control message that isn't a JSON object in a text frame gets {"type": "error"}.
+# Each session holds one server thread for as long as it records.
+try:
+    from flask_sock import Sock
+except ImportError:
+    Sock = None
+    print("Warning: flask-sock is not installed; the live recording WebSocket (/live/session) is disabled.")
+
+# How long receive() waits before sending queued updates from the analysis threads.
+POLL_SECONDS = 0.1
+
+
+def _control_message(message) -> dict | None:
+    # Control messages are JSON objects in text frames; anything else is None.
+    if not isinstance(message, str):
+        return None
+    try:
+        value = json.loads(message)
+    except ValueError:
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def run_session(ws):
+    """
+    Runs one live recording over an open WebSocket until the client stops or leaves.
+    """
+    outbox = queue.Queue()
+    start = _control_message(ws.receive())
+    if start is None or start.get("type") != "start":
+        ws.send(json.dumps({"type": "error", "stage": "start", "error": "Expected a start message"}))
+        return
+
+    maybe_sweep()
+    session = LiveSession(outbox.put, filename=start.get("filename") or "recording.webm",
+                          audio=start.get("audio", True))
+    ws.send(json.dumps({"type": "ready", "media_id": session.media_id}))
+    finished = False
+    try:
+        while True:
+            message = ws.receive(timeout=POLL_SECONDS)
+            # simple-websocket sends from one thread only, so updates are queued and sent here.
+            while not outbox.empty():
+                ws.send(json.dumps(outbox.get()))
+            if message is None:
+                continue
+            if isinstance(message, bytes):
+                session.feed(message)
+                continue
+            control = _control_message(message)
+            if control is None:
+                ws.send(json.dumps({"type": "error", "stage": "recording", "error": "Expected a JSON object"}))
+            elif control.get("type") == "stop":
+                break
+
+        try:
+            session.finish()
+        except (OSError, sqlite3.Error) as e:
+            # Storing the results failed (e.g. a full disk): keep the take so it isn't lost.
+            print(f"Error finishing live session {session.media_id}: {e}")
+            kept = session.keep()
+            outbox.put({"type": "error", "stage": "finish", "error": str(e),
+                        "media_id": session.media_id if kept else None})
+        finished = True
+        while not outbox.empty():
+            ws.send(json.dumps(outbox.get()))
+    except (UploadTooLargeError, ValueError) as e:
+        ws.send(json.dumps({"type": "error", "stage": "recording", "error": str(e)}))
+    finally:
+        if not finished:
+            session.abort()
+
+
+if Sock is not None:
+    sock = Sock()
+
+    @sock.route("/session", bp=live)
+    def live_session(ws):
+        run_session(ws)
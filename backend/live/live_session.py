@@ -0,0 +1,311 @@
+import csv
+import hashlib
+import os
+import shutil
+import subprocess
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+
+import imageio_ffmpeg
+import numpy as np
+from werkzeug.utils import secure_filename
+
+from bodylanguage.attention_model import frames_array, summarize_attention
+from bodylanguage.detectors import FACE_DETECTOR
+from bodylanguage.eyecontactscore import ATTENTION_SAMPLE_RATE, generate_feedback
+from bodylanguage.parallel_attention import FRAME_SIZE
+from bodylanguage.tracking import FACE_TRACKING, FaceTracker
+from media.media_store import media_dir, register_media, store_artifact
+from media.upload_stream import MAX_UPLOAD_BYTES, UploadTooLargeError
+from resources import face_detector, get_setting
+from telemetry.tracing import span
+from transcription.chunked_transcription import transcribe_chunk
+from transcription.extractaudio import AUDIO_SAMPLE_RATE, ENCODE_SETTINGS
+from transcription.transcript_cache import get_transcript_cache
+
+# A recording analysed while it is being made. The browser's MediaRecorder chunks are
+# appended to the media file and piped into one long-running ffmpeg process, which
+#   - samples frames at ATTENTION_SAMPLE_RATE and writes them as raw pixels to stdout,
+#     where a thread scores them with the same detector (and tracker) as /contact-score;
+#   - cuts the audio into LIVE_WINDOW_SECONDS Opus files with the segment muxer, each
+#     sent to Whisper as soon as ffmpeg closes it.
+# Partial attention and transcript updates go back through `send`. When the recording
+# stops, only the last audio window and the feedback completion are left to do. The
+# recording is then stored as a media upload with its attention, transcript and
+# feedback artifacts, so the /<media_id> routes (questions, evaluation) answer at once.
+#
+# Windows are cut at fixed times, so a word on a boundary can be split; upload the file
+# again through POST /media for a transcript that uses silence-aware chunking.
+LIVE_WINDOW_SECONDS = get_setting("LIVE_WINDOW_SECONDS", 15.0, float)
+# How often (in seconds of recording) partial attention results are sent.
+LIVE_UPDATE_SECONDS = get_setting("LIVE_UPDATE_SECONDS", 2.0, float)
+LIVE_TRANSCRIBE_CONCURRENCY = get_setting("LIVE_TRANSCRIBE_CONCURRENCY", 2, int)
+# Whisper rejects audio shorter than this.
+MIN_WINDOW_SECONDS = 0.1
+WINDOW_POLL_SECONDS = 0.2
+
+
+class LiveSession:
+    """
+    One live recording. Call feed() with each media chunk in order, then finish() once
+    the recording stops (or abort() if the client goes away). `send(message)` is called
+    with JSON-serialisable dicts from worker threads:
+        {"type": "attention", "seconds", "average", "samples", "longest_gaze_loss",
+         "timeline": {...new seconds only...}}
+        {"type": "transcript", "window", "start", "end", "text", "segments"}
+        {"type": "error", "stage", "error"}
+    """
+
+    def __init__(self, send, filename: str = "recording.webm", audio: bool = True,
+                 rate: float = ATTENTION_SAMPLE_RATE, window_seconds: float = LIVE_WINDOW_SECONDS):
+        self.send = send
+        self.audio = audio
+        self.rate = rate
+        self.window_seconds = window_seconds
+        self.media_id = uuid.uuid4().hex
+        self.folder = media_dir(self.media_id)
+        self.filename = filename
+        extension = os.path.splitext(secure_filename(filename))[-1] or ".webm"
+        self.path = os.path.join(self.folder, f"source{extension}")
+        self.windows_dir = os.path.join(self.folder, "live")
+        os.makedirs(self.windows_dir)
+
+        self.size = 0
+        self.stopped_at = None
+        self._digest = hashlib.sha256()
+        # The two files stay open for the whole recording; finish(), keep() or abort() closes them.
+        self._file = open(self.path, "wb")  # noqa: SIM115
+        self._samples = []
+        self._sent_seconds = 0
+        self._windows = {}
+        self._transcriber = ThreadPoolExecutor(max_workers=LIVE_TRANSCRIBE_CONCURRENCY,
+                                               thread_name_prefix="live-whisper")
+        self._futures = []
+        self._stderr = open(os.path.join(self.windows_dir, "ffmpeg.log"), "wb")  # noqa: SIM115
+        self._process = subprocess.Popen(self._command(), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         stderr=self._stderr)
+        self._threads = [threading.Thread(target=self._read_frames, daemon=True)]
+        if audio:
+            self._threads.append(threading.Thread(target=self._watch_windows, daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def _command(self) -> list:
+        width, height = FRAME_SIZE
+        with face_detector() as detector:
+            pixel_format = "gray" if detector.grayscale else "bgr24"
+        command = [
+            imageio_ffmpeg.get_ffmpeg_exe(), "-v", "error", "-i", "pipe:0",
+            "-map", "0:v:0", "-an", "-vf", f"fps={self.rate},scale={width}:{height},format={pixel_format}",
+            "-f", "rawvideo", "pipe:1",
+        ]
+        if self.audio:
+            command += [
+                "-map", "0:a:0", "-vn", "-ac", "1", "-ar", str(AUDIO_SAMPLE_RATE), *ENCODE_SETTINGS["opus"]["args"],
+                "-f", "segment", "-segment_time", str(self.window_seconds), "-reset_timestamps", "1",
+                "-segment_list", os.path.join(self.windows_dir, "windows.csv"), "-segment_list_type", "csv",
+                os.path.join(self.windows_dir, "window_%04d.ogg"),
+            ]
+        return command
+
+    def feed(self, data: bytes):
+        """
+        Appends a media chunk. Raises UploadTooLargeError past MAX_UPLOAD_BYTES, and
+        ValueError if ffmpeg has stopped reading (e.g. the stream isn't a video).
+        """
+        self.size += len(data)
+        if self.size > MAX_UPLOAD_BYTES:
+            raise UploadTooLargeError(f"Recording exceeds the {MAX_UPLOAD_BYTES} byte limit")
+        self._digest.update(data)
+        self._file.write(data)
+        try:
+            self._process.stdin.write(data)
+            self._process.stdin.flush()
+        except (BrokenPipeError, OSError):
+            raise ValueError(f"Could not decode the recording: {self._ffmpeg_error()}")
+
+    def _ffmpeg_error(self) -> str:
+        if not self._stderr.closed:
+            self._stderr.flush()
+        with open(self._stderr.name, "rb") as f:
+            return f.read().decode("utf-8", "replace").strip()[-500:] or "ffmpeg stopped"
+
+    def _read_frames(self):
+        # Holds one detector from the process's pool for the whole recording.
+        with face_detector() as detector:
+            self._score_frames(detector)
+
+    def _score_frames(self, detector):
+        if FACE_TRACKING:
+            detector = FaceTracker(detector)
+        width, height = FRAME_SIZE
+        channels = 1 if detector.grayscale else 3
+        frame_bytes = width * height * channels
+        shape = (height, width) if channels == 1 else (height, width, channels)
+        last_update = 0.0
+
+        while True:
+            data = self._process.stdout.read(frame_bytes)
+            if len(data) < frame_bytes:
+                break
+            timestamp = len(self._samples) / self.rate
+            frame = np.frombuffer(data, np.uint8).reshape(shape)
+            with span("live.frame", frames=1):
+                measurement = detector.measure([frame])[0]
+            self._samples.append((timestamp, *measurement))
+            if timestamp - last_update >= LIVE_UPDATE_SECONDS:
+                last_update = timestamp
+                self._send_attention()
+
+    def _send_attention(self):
+        summary = summarize_attention(frames_array(self._samples), self.rate)
+        timeline = summary["timeline"]
+        # Only seconds that are complete and not sent before; the client appends them.
+        start = next((index for index, second in enumerate(timeline["second"]) if second >= self._sent_seconds),
+                     len(timeline["second"]))
+        end = len(timeline["second"]) - 1
+        new = {key: values[start:end] for key, values in timeline.items()}
+        if new["second"]:
+            self._sent_seconds = new["second"][-1] + 1
+        self.send({
+            "type": "attention",
+            "seconds": len(self._samples) / self.rate,
+            "average": summary["average"],
+            "samples": summary["samples"],
+            "longest_gaze_loss": summary["longest_gaze_loss"],
+            "timeline": new,
+        })
+
+    def _watch_windows(self):
+        list_path = os.path.join(self.windows_dir, "windows.csv")
+        seen = 0
+        while True:
+            running = self._process.poll() is None
+            if os.path.exists(list_path):
+                with open(list_path, newline="") as f:
+                    rows = [row for row in csv.reader(f) if len(row) == 3]
+                for index, (name, start, end) in enumerate(rows[seen:], start=seen):
+                    self._futures.append(self._transcriber.submit(
+                        self._transcribe_window, index, os.path.join(self.windows_dir, name), float(start), float(end)))
+                seen = len(rows)
+            if not running:
+                return
+            time.sleep(WINDOW_POLL_SECONDS)
+
+    def _transcribe_window(self, index: int, path: str, start: float, end: float):
+        if end - start < MIN_WINDOW_SECONDS:
+            return
+        try:
+            result = transcribe_chunk(path)
+        except Exception as e:  # noqa: BLE001
+            print(f"Error transcribing live window {index}: {e}")
+            self._windows[index] = None
+            self.send({"type": "error", "stage": "transcript", "window": index, "error": str(e)})
+            return
+        segments = [{"start": round(start + segment["start"], 2), "end": round(start + segment["end"], 2),
+                     "text": segment["text"]} for segment in result["segments"]]
+        self._windows[index] = {"start": start, "end": end, "text": result["text"].strip(), "segments": segments}
+        self.send({"type": "transcript", "window": index, **self._windows[index]})
+
+    def finish(self) -> dict:
+        """
+        Ends the recording: lets ffmpeg flush the last frames and audio window, waits
+        for the outstanding Whisper calls, writes the feedback and stores everything as
+        a media upload. Returns the final result, also sent as {"type": "final", ...}.
+        """
+        self.stopped_at = time.perf_counter()
+        self._file.close()
+        with suppress(OSError):
+            self._process.stdin.close()
+        self._process.wait()
+        for thread in self._threads:
+            thread.join()
+        for future in self._futures:
+            future.result()
+        self._transcriber.shutdown()
+        self._stderr.close()
+        if not self._samples:
+            error = self._ffmpeg_error()
+            self.abort()
+            raise ValueError(f"No video frames could be decoded: {error}")
+
+        attention = summarize_attention(frames_array(self._samples), self.rate)
+        attention["detector"] = FACE_DETECTOR + ("+tracking" if FACE_TRACKING else "")
+        windows = [self._windows[index] for index in sorted(self._windows)]
+        transcript = " ".join(window["text"] for window in windows if window and window["text"])
+        failed = [index for index in sorted(self._windows) if self._windows[index] is None]
+        errors = {}
+        try:
+            feedback = generate_feedback(transcript) if transcript else ""
+        except Exception as e:  # noqa: BLE001
+            # The recording and its analysis are kept; /contact-score/<media_id> retries the feedback.
+            print(f"Error generating live feedback for {self.media_id}: {e}")
+            feedback = None
+            errors["feedback"] = str(e)
+            self.send({"type": "error", "stage": "feedback", "error": str(e)})
+
+        sha256 = self._digest.hexdigest()
+        register_media(self.media_id, self.path, self.filename, self.size, sha256)
+        store_artifact(self.media_id, "attention", attention)
+        if feedback is not None:
+            store_artifact(self.media_id, "feedback", feedback)
+        if self.audio and not failed:
+            store_artifact(self.media_id, "transcript", transcript)
+            if transcript:
+                cache = get_transcript_cache()
+                cache.put(cache.make_key(sha256), transcript)
+        shutil.rmtree(self.windows_dir, ignore_errors=True)
+
+        result = {
+            "type": "final",
+            "media_id": self.media_id,
+            "attention_score": attention["average"],
+            "attention_timeline": attention["timeline"],
+            "gaze_loss": attention["gaze_loss"],
+            "attention_frames": attention["frames"],
+            "transcript": transcript,
+            "segments": [segment for window in windows if window for segment in window["segments"]],
+            "failed_windows": failed,
+            "feedback": feedback,
+            "errors": errors,
+            # Time from the end of the recording to this result.
+            "seconds_after_stop": round(time.perf_counter() - self.stopped_at, 3),
+        }
+        self.send(result)
+        return result
+
+    def keep(self) -> bool:
+        """
+        After finish() failed: stops everything and stores what was recorded as a media
+        upload without artifacts, so it can still be analysed through the /<media_id>
+        routes. Returns False (and deletes the folder) if nothing was recorded.
+        """
+        if not self._file.closed:
+            self._file.close()
+        if self._process.poll() is None:
+            self._process.kill()
+            self._process.wait()
+        self._transcriber.shutdown(wait=False, cancel_futures=True)
+        if not self._stderr.closed:
+            self._stderr.close()
+        shutil.rmtree(self.windows_dir, ignore_errors=True)
+        if not self.size:
+            shutil.rmtree(self.folder, ignore_errors=True)
+            return False
+        register_media(self.media_id, self.path, self.filename, self.size, self._digest.hexdigest())
+        return True
+
+    def abort(self):
+        """Stops everything and deletes what was recorded."""
+        if not self._file.closed:
+            self._file.close()
+        if self._process.poll() is None:
+            self._process.kill()
+            self._process.wait()
+        self._transcriber.shutdown(wait=False, cancel_futures=True)
+        if not self._stderr.closed:
+            self._stderr.close()
+        shutil.rmtree(self.folder, ignore_errors=True)
@@ -0,0 +1,54 @@
+from resources import get_openai_client
+from telemetry.tracing import LLM_REQUESTS, record_tokens, span
+
+from .gateway import call, estimate_tokens, request_key
+from .response_cache import get_response_cache
+
+# The one place the blocking routes call chat.completions.create, so every completion
+# goes through the response cache (see llm.response_cache) and then the gateway
+# (see llm.gateway), which coalesces, rate-limits and retries it.
+
+
+def chat_completion(messages: list, model: str, similar_to: str | None = None, validate=None, **params) -> str:
+    """
+    Returns the text of a chat completion, from the cache when the same prompt was sent
+    before. `similar_to` is the transcript the prompt is built around, for opt-in
+    near-duplicate matching. `validate(text)` can reject a completion (return False or
+    raise ValueError) so a malformed answer isn't cached and re-served.
+    """
+    with span("llm.chat", model=model) as stage:
+        cache = get_response_cache()
+        if cache is not None:
+            cached = cache.get(model, messages, params, similar_to)
+            if cached is not None:
+                stage.set(cached=True)
+                LLM_REQUESTS.inc(model=model, cached="true")
+                return cached
+
+        def create():
+            LLM_REQUESTS.inc(model=model, cached="false")
+            completion = get_openai_client().chat.completions.create(model=model, messages=messages, **params)
+            record_tokens(model, completion.usage)
+            return completion
+
+        completion = call("chat", create, key=request_key(model, messages, params),
+                          tokens=chat_tokens(messages, params))
+        text = completion.choices[0].message.content
+        if cache is not None and text and is_valid(text, validate):
+            cache.put(model, messages, params, text, similar_to)
+        return text
+
+
+def is_valid(text: str, validate) -> bool:
+    if validate is None:
+        return True
+    try:
+        return bool(validate(text))
+    except ValueError:
+        return False
+
+
+def chat_tokens(messages: list, params: dict) -> int:
+    """Estimated prompt plus completion tokens of a request, for the token rate limit."""
+    prompt = sum(estimate_tokens(message["content"]) for message in messages)
+    return prompt + params.get("max_tokens", 0)
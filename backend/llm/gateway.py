@@ -0,0 +1,151 @@
+import hashlib
+import json
+import random
+import threading
+import time
+
+from resources import get_setting
+from telemetry.metrics import Counter, Gauge, Histogram
+
+from .rate_limit import get_rate_limiter, get_token_limiter
+
+# Every OpenAI call (chat completions, streams and Whisper) goes through call(), which
+#   - coalesces identical calls: while one is in flight, the same request from another
+#     tab or user waits for its result instead of being sent again;
+#   - waits for the provider's request and token buckets (llm.rate_limit) and for one of
+#     LLM_MAX_CONCURRENCY slots, so bursts queue here instead of becoming 429s;
+#   - retries rate limits, timeouts and server errors with jittered exponential backoff,
+#     honouring Retry-After, and slows the buckets down after every 429.
+# A call that can't start within LLM_QUEUE_TIMEOUT_SECONDS raises LLMBusyError.
+# Queue depth, wait time, retries and coalesced calls are exported on /metrics.
+LLM_MAX_CONCURRENCY = get_setting("LLM_MAX_CONCURRENCY", 8, int)
+LLM_MAX_RETRIES = get_setting("LLM_MAX_RETRIES", 4, int)
+LLM_RETRY_BASE_SECONDS = get_setting("LLM_RETRY_BASE_SECONDS", 1.0, float)
+LLM_QUEUE_TIMEOUT_SECONDS = get_setting("LLM_QUEUE_TIMEOUT_SECONDS", 300.0, float)
+RETRY_MAX_SECONDS = 60.0
+# Roughly four characters per token for English text; close enough for a budget.
+CHARS_PER_TOKEN = 4
+
+QUEUE_DEPTH = Gauge("pitch_llm_queue_depth", "OpenAI calls waiting for a rate limit or a free slot.", ("kind",))
+IN_FLIGHT = Gauge("pitch_llm_in_flight", "OpenAI calls currently being sent.", ("kind",))
+WAIT_SECONDS = Histogram("pitch_llm_wait_seconds", "Time OpenAI calls waited before being sent.", ("kind",))
+RETRIES = Counter("pitch_llm_retries_total", "OpenAI calls retried, by what went wrong.", ("kind", "reason"))
+COALESCED = Counter("pitch_llm_coalesced_total", "Calls answered by an identical call already in flight.",
+                    ("kind",))
+
+_slots = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+_pending = {}
+_pending_guard = threading.Lock()
+
+
+class LLMBusyError(RuntimeError):
+    pass
+
+
+class _Pending:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def request_key(*parts) -> str:
+    """Returns a digest of everything that makes two calls identical."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def is_retryable(error: Exception) -> bool:
+    import openai
+
+    if isinstance(error, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code in (408, 409, 429)
+
+
+def _retry_after(error: Exception) -> float:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after", 0))
+    except ValueError:
+        return 0.0
+
+
+def _wait_for_capacity(kind: str, tokens: int, provider: str):
+    started = time.perf_counter()
+    deadline = started + LLM_QUEUE_TIMEOUT_SECONDS
+    QUEUE_DEPTH.inc(kind=kind)
+    try:
+        ready = (get_rate_limiter(provider).acquire(timeout=LLM_QUEUE_TIMEOUT_SECONDS)
+                 and (not tokens or get_token_limiter(provider).acquire(
+                     timeout=max(0.0, deadline - time.perf_counter()), amount=tokens))
+                 and _slots.acquire(timeout=max(0.0, deadline - time.perf_counter())))
+    finally:
+        QUEUE_DEPTH.dec(kind=kind)
+        WAIT_SECONDS.observe(time.perf_counter() - started, kind=kind)
+    if not ready:
+        raise LLMBusyError(f"Too many {provider} requests queued, please retry shortly")
+
+
+def _send(kind: str, func, tokens: int, provider: str, max_retries: int):
+    for attempt in range(max_retries + 1):
+        _wait_for_capacity(kind, tokens, provider)
+        IN_FLIGHT.inc(kind=kind)
+        try:
+            result = func()
+            get_rate_limiter(provider).speed_up()
+            get_token_limiter(provider).speed_up()
+            return result
+        except Exception as e:
+            if attempt == max_retries or not is_retryable(e):
+                raise
+            status = getattr(e, "status_code", None)
+            RETRIES.inc(kind=kind, reason=status or type(e).__name__)
+            if status == 429:
+                get_rate_limiter(provider).slow_down()
+                get_token_limiter(provider).slow_down()
+            delay = LLM_RETRY_BASE_SECONDS * 2 ** attempt
+            delay = max(min(delay + random.uniform(0, delay), RETRY_MAX_SECONDS), _retry_after(e))
+            print(f"OpenAI {kind} call failed ({e}), retrying in {delay:.1f}s")
+        finally:
+            IN_FLIGHT.dec(kind=kind)
+            _slots.release()
+        time.sleep(delay)
+
+
+def call(kind: str, func, key: str | None = None, tokens: int = 0, provider: str = "openai",
+         max_retries: int = LLM_MAX_RETRIES):
+    """
+    Runs `func()` (one API request) through the gateway and returns its result. Calls
+    with the same `key` (see request_key) while one is in flight share its result or
+    error. `tokens` is the estimated prompt plus completion size, for the TPM limit.
+    """
+    if key is None:
+        return _send(kind, func, tokens, provider, max_retries)
+
+    with _pending_guard:
+        pending = _pending.get(key)
+        leader = pending is None
+        if leader:
+            pending = _pending[key] = _Pending()
+
+    if not leader:
+        COALESCED.inc(kind=kind)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    try:
+        pending.result = _send(kind, func, tokens, provider, max_retries)
+        return pending.result
+    except BaseException as e:
+        pending.error = e
+        raise
+    finally:
+        with _pending_guard:
+            _pending.pop(key, None)
+        pending.done.set()
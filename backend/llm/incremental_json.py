@@ -0,0 +1,112 @@
+import json
+
+# An incremental JSON scanner for streamed completions. Text is fed in as it arrives and
+# every value that has just been closed is reported with its path, e.g.
+#   {"questions": ["A?", "B?"]}  ->  (("questions", 0), "A?"), (("questions", 1), "B?"),
+#                                    (("questions",), [...]), ((), {...})
+# so a route can forward each question or section as soon as the model finishes it.
+# Anything before the first "{" or "[" (such as a ```json fence) and after the closing
+# bracket is ignored.
+
+WHITESPACE = " \t\r\n"
+
+
+class _Container:
+    def __init__(self, kind: str, start: int):
+        self.kind = kind
+        self.start = start
+        self.key = None
+        self.index = -1
+        self.expecting_key = kind == "{"
+
+    @property
+    def slot(self):
+        return self.key if self.kind == "{" else self.index
+
+
+class IncrementalJSONParser:
+    def __init__(self, max_depth: int = 2):
+        # Values nested deeper than max_depth are not reported (their parents still are).
+        self.max_depth = max_depth
+        self.done = False
+        self._text = ""
+        self._position = 0
+        self._stack = []
+        self._started = False
+        self._string_start = None
+        self._string_is_key = False
+        self._escaped = False
+        self._scalar_start = None
+
+    def feed(self, text: str) -> list:
+        """
+        Adds `text` and returns [(path, value), ...] for the values completed by it, in
+        the order they closed. Raises json.JSONDecodeError on malformed JSON.
+        """
+        self._text += text
+        completed = []
+        while self._position < len(self._text) and not self.done:
+            self._step(self._text[self._position], self._position, completed)
+            self._position += 1
+        return completed
+
+    def _path(self) -> tuple:
+        return tuple(container.slot for container in self._stack)
+
+    def _begin_value(self):
+        if self._stack and self._stack[-1].kind == "[":
+            self._stack[-1].index += 1
+
+    def _complete(self, start: int, end: int, completed: list):
+        path = self._path()
+        if len(path) <= self.max_depth:
+            completed.append((path, json.loads(self._text[start:end])))
+        if not self._stack:
+            self.done = True
+
+    def _step(self, char: str, position: int, completed: list):
+        if self._string_start is not None:
+            if self._escaped:
+                self._escaped = False
+            elif char == "\\":
+                self._escaped = True
+            elif char == '"':
+                start, self._string_start = self._string_start, None
+                if self._string_is_key:
+                    self._stack[-1].key = json.loads(self._text[start:position + 1])
+                else:
+                    self._complete(start, position + 1, completed)
+            return
+
+        if not self._started:
+            if char not in "{[":
+                return
+            self._started = True
+
+        if self._scalar_start is not None and (char in WHITESPACE or char in ",]}"):
+            start, self._scalar_start = self._scalar_start, None
+            self._complete(start, position, completed)
+            if self.done:
+                return
+
+        if char in WHITESPACE:
+            return
+        if char == '"':
+            self._string_start = position
+            self._string_is_key = bool(self._stack) and self._stack[-1].expecting_key
+            if not self._string_is_key:
+                self._begin_value()
+        elif char in "{[":
+            self._begin_value()
+            self._stack.append(_Container(char, position))
+        elif char in "}]":
+            container = self._stack.pop()
+            self._complete(container.start, position + 1, completed)
+        elif char == ":":
+            self._stack[-1].expecting_key = False
+        elif char == ",":
+            if self._stack[-1].kind == "{":
+                self._stack[-1].expecting_key = True
+        elif self._scalar_start is None:
+            self._begin_value()
+            self._scalar_start = position
@@ -0,0 +1,13 @@
+from flask import Blueprint, jsonify
+
+from .response_cache import get_response_cache
+
+llm = Blueprint("llm", __name__)
+
+@llm.route("/cache-stats", methods=["GET"])
+def cache_stats():
+    # Hit rate and size of the chat completion cache (see llm/response_cache.py).
+    cache = get_response_cache()
+    if cache is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **cache.stats()})
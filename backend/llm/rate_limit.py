@@ -0,0 +1,111 @@
+import threading
+import time
+
+from resources import get_setting
+
+# Client-side rate limits per LLM provider, so fan-out endpoints slow down before the
+# provider starts answering 429. Configured as requests per minute with
+# LLM_RATE_LIMIT_<PROVIDER>_RPM and (estimated) tokens per minute with
+# LLM_RATE_LIMIT_<PROVIDER>_TPM; 0 disables a limit.
+#
+# The limits adapt: a 429 from the provider halves the rate (down to MIN_RATE_FRACTION
+# of the configured one), at most once per SLOW_DOWN_SECONDS so a burst of concurrent
+# 429s counts once, and each successful call wins back RECOVERY_FRACTION of it.
+DEFAULT_RPM = {"openai": 500}
+DEFAULT_TPM = {"openai": 200000}
+MIN_RATE_FRACTION = 0.1
+RECOVERY_FRACTION = 0.05
+SLOW_DOWN_SECONDS = 5.0
+
+_limiters = {}
+_limiters_guard = threading.Lock()
+
+
+class RateLimiter:
+    """
+    A token bucket: `per_minute` units per minute on average, with bursts of up to
+    `burst` units when the bucket is full.
+    """
+
+    def __init__(self, per_minute: float, burst: int | None = None):
+        self.max_rate = per_minute / 60.0
+        self.rate = self.max_rate
+        self.capacity = burst or max(1, int(per_minute / 60))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._slowed = float("-inf")
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout: float | None = None, amount: float = 1) -> bool:
+        """
+        Takes `amount` units (at most a full bucket), sleeping until they are available.
+        Returns False if that would take longer than `timeout` seconds.
+        """
+        amount = min(amount, self.capacity)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return True
+                wait = (amount - self._tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def slow_down(self):
+        """Halves the rate after the provider answered 429."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._slowed < SLOW_DOWN_SECONDS:
+                return
+            self._slowed = now
+            self._refill(now)
+            self.rate = max(self.rate / 2, self.max_rate * MIN_RATE_FRACTION)
+
+    def speed_up(self):
+        """Moves the rate back towards the configured one after a successful call."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = min(self.rate + self.max_rate * RECOVERY_FRACTION, self.max_rate)
+
+
+class _Unlimited:
+    def acquire(self, timeout: float | None = None, amount: float = 1) -> bool:
+        return True
+
+    def slow_down(self):
+        pass
+
+    def speed_up(self):
+        pass
+
+
+def _get_limiter(name: str, per_minute: float, burst: int | None = None):
+    with _limiters_guard:
+        if name not in _limiters:
+            _limiters[name] = RateLimiter(per_minute, burst) if per_minute > 0 else _Unlimited()
+        return _limiters[name]
+
+
+def get_rate_limiter(provider: str = "openai"):
+    """
+    Returns the process-wide request limiter for `provider`.
+    """
+    per_minute = get_setting(f"LLM_RATE_LIMIT_{provider.upper()}_RPM", DEFAULT_RPM.get(provider, 0), float)
+    return _get_limiter(provider, per_minute)
+
+
+def get_token_limiter(provider: str = "openai"):
+    """
+    Returns the process-wide tokens-per-minute limiter for `provider`. Its bucket holds
+    ten seconds' worth of tokens, so one long prompt doesn't use up the whole minute.
+    """
+    per_minute = get_setting(f"LLM_RATE_LIMIT_{provider.upper()}_TPM", DEFAULT_TPM.get(provider, 0), float)
+    return _get_limiter(f"{provider}:tokens", per_minute, max(1, int(per_minute / 6)))
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import re
+import time
+import unicodedata
+
+import numpy as np
+
+from resources import get_setting, root_dir
+from sqlite_cache import SQLiteCache, process_wide
+
+# Chat completions are cached on local disk, keyed by model, sampling parameters and the
+# normalized messages, so re-submitting the same transcript or re-judging the same
+# answer (page refreshes, demo re-runs) doesn't pay for another multi-second GPT call.
+#
+# With LLM_CACHE_NEAR_DUPLICATES=1, call sites that pass `similar_to` (the transcript a
+# prompt is built around) can also hit on an earlier call with the same model, parameters
+# and prompt template whose transcript is nearly identical: MinHash estimate of the
+# Jaccard similarity of word 5-grams >= LLM_CACHE_SIMILARITY, e.g. the same pitch
+# transcribed with a few words different. Only the transcript is compared, never the
+# template around it, which would make every prompt look alike.
+MINHASH_PERMUTATIONS = 128
+SHINGLE_WORDS = 5
+_MERSENNE_PRIME = (1 << 31) - 1
+_permutation_rng = np.random.default_rng(36)
+_PERM_A = _permutation_rng.integers(1, _MERSENNE_PRIME, MINHASH_PERMUTATIONS, dtype=np.uint64)
+_PERM_B = _permutation_rng.integers(0, _MERSENNE_PRIME, MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+
+def normalize_text(text: str) -> str:
+    # Unicode NFC and collapsed whitespace: prompts that only differ in spacing share an entry.
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+def minhash(text: str) -> np.ndarray:
+    """
+    Returns the MinHash signature (MINHASH_PERMUTATIONS uint32 values) of the word
+    5-grams of `text`.
+    """
+    words = normalize_text(text).lower().split(" ")
+    shingles = {" ".join(words[index:index + SHINGLE_WORDS]) for index in range(max(1, len(words) - SHINGLE_WORDS + 1))}
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little") & _MERSENNE_PRIME
+         for shingle in shingles],
+        dtype=np.uint64,
+    )
+    # Universal hashing (a * x + b) mod p for every permutation at once; a, x < 2^31 so
+    # the product fits in 64 bits.
+    permuted = (np.outer(_PERM_A, hashes) + _PERM_B[:, None]) % _MERSENNE_PRIME
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+class ResponseCache(SQLiteCache):
+    """
+    A cache of completion texts on local disk (see sqlite_cache.SQLiteCache for the
+    expiry, size budget and counters). Entries also record their scope and, with
+    near_duplicates, the MinHash signature of their `similar_to` text.
+    """
+
+    file_name = "responses.sqlite3"
+    table = "responses"
+    columns = ("scope TEXT NOT NULL", "signature BLOB")
+    indexes = ("scope",)
+    counters = ("hits", "near_hits", "misses", "evictions")
+
+    def __init__(self, cache_dir: str, max_bytes: int, max_age: int,
+                 near_duplicates: bool = False, similarity: float = 0.9):
+        super().__init__(cache_dir, max_bytes, max_age)
+        self.near_duplicates = near_duplicates
+        self.similarity = similarity
+
+    @staticmethod
+    def make_keys(model: str, messages: list, params: dict, similar_to: str | None = None) -> tuple:
+        """
+        Returns (key, scope): the key covers everything sent to the model, the scope
+        everything except the `similar_to` text (what near-duplicate matches must share).
+        """
+        def digest(contents):
+            payload = {"model": model, "params": params, "messages": [
+                [message["role"], normalize_text(content)] for message, content in zip(messages, contents)
+            ]}
+            return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+        contents = [message["content"] for message in messages]
+        key = digest(contents)
+        if not similar_to:
+            return key, key
+        return key, digest([content.replace(similar_to, "\x00") for content in contents])
+
+    def get(self, model: str, messages: list, params: dict, similar_to: str | None = None) -> str | None:
+        key, scope = self.make_keys(model, messages, params, similar_to)
+        now = time.time()
+        with self._connect() as conn:
+            text = self._lookup(conn, key, now)
+            if text is not None:
+                self._count(conn, "hits")
+                return text
+
+            if self.near_duplicates and similar_to:
+                match = self._find_near_duplicate(conn, scope, similar_to, now)
+                if match is not None:
+                    self._touch(conn, match[0], now)
+                    self._count(conn, "near_hits")
+                    return match[1]
+
+            self._count(conn, "misses")
+            return None
+
+    def _find_near_duplicate(self, conn, scope: str, similar_to: str, now: float):
+        rows = conn.execute(
+            "SELECT key, text, signature FROM responses WHERE scope = ? AND created >= ? AND signature IS NOT NULL",
+            (scope, now - self.max_age),
+        ).fetchall()
+        if not rows:
+            return None
+        signature = minhash(similar_to)
+        signatures = np.frombuffer(b"".join(row[2] for row in rows), dtype=np.uint32).reshape(len(rows), -1)
+        similarities = (signatures == signature).mean(axis=1)
+        best = int(similarities.argmax())
+        if similarities[best] < self.similarity:
+            return None
+        return rows[best][0], rows[best][1]
+
+    def put(self, model: str, messages: list, params: dict, text: str, similar_to: str | None = None):
+        key, scope = self.make_keys(model, messages, params, similar_to)
+        signature = None
+        if self.near_duplicates and similar_to:
+            signature = minhash(similar_to).tobytes()
+        self._store(key, text, (scope, signature))
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        hits = stats["hits"] + stats["near_hits"]
+        lookups = hits + stats["misses"]
+        return {**stats, "near_duplicates": self.near_duplicates, "hit_rate": hits / lookups if lookups else 0.0}
+
+
+@process_wide
+def _shared_response_cache() -> ResponseCache:
+    return ResponseCache(
+        cache_dir=get_setting("LLM_CACHE_DIR", os.path.join(root_dir, "cache", "llm")),
+        max_bytes=get_setting("LLM_CACHE_MAX_BYTES", 20 * 1024 * 1024, int),
+        max_age=get_setting("LLM_CACHE_MAX_AGE", 24 * 60 * 60, int),
+        near_duplicates=get_setting("LLM_CACHE_NEAR_DUPLICATES", False, lambda value: value == "1"),
+        similarity=get_setting("LLM_CACHE_SIMILARITY", 0.9, float),
+    )
+
+
+def get_response_cache() -> ResponseCache | None:
+    """
+    Returns the process-wide response cache, creating it on first use, or None when
+    LLM_CACHE_ENABLED=0. Configured through LLM_CACHE_DIR, LLM_CACHE_MAX_BYTES,
+    LLM_CACHE_MAX_AGE (seconds), LLM_CACHE_NEAR_DUPLICATES and LLM_CACHE_SIMILARITY.
+    """
+    if not get_setting("LLM_CACHE_ENABLED", True, lambda value: value != "0"):
+        return None
+    return _shared_response_cache()
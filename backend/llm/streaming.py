@@ -0,0 +1,125 @@
+import json
+
+from flask import Response, stream_with_context
+
+from resources import get_openai_client
+from telemetry.tracing import LLM_REQUESTS, record_tokens, span
+
+from .chat import chat_tokens, is_valid
+from .gateway import call
+from .incremental_json import IncrementalJSONParser
+from .response_cache import get_response_cache
+
+# Helpers for the "/stream" variants of the LLM routes: completions are requested with
+# stream=True and forwarded to the browser as Server-Sent Events while they are being
+# generated, instead of after the last token.
+
+
+def sse_event(event: str, data) -> str:
+    """
+    Formats one Server-Sent Event with a JSON payload.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def sse_response(events) -> Response:
+    """
+    Wraps a generator of sse_event() strings in a streaming response. The headers stop
+    caches and proxies such as nginx from buffering the stream.
+    """
+    return Response(
+        stream_with_context(events),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def stream_chat(messages: list, model: str, similar_to: str | None = None, validate=None, **options):
+    """
+    Runs a chat completion with stream=True and yields the text deltas as they arrive.
+    A cached completion (see llm.chat.chat_completion) is yielded as a single delta, and
+    a completed stream is added to the cache.
+    """
+    with span("llm.stream", model=model) as stage:
+        cache = get_response_cache()
+        if cache is not None:
+            cached = cache.get(model, messages, options, similar_to)
+            if cached is not None:
+                stage.set(cached=True)
+                LLM_REQUESTS.inc(model=model, cached="true")
+                yield cached
+                return
+
+        LLM_REQUESTS.inc(model=model, cached="false")
+        # include_usage adds a final chunk with no choices that carries the token counts.
+        # Streams aren't coalesced, and are retried only if the request itself fails.
+        stream = call("chat.stream", lambda: get_openai_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True},
+            **options,
+        ), tokens=chat_tokens(messages, options))
+        parts = []
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+                yield chunk.choices[0].delta.content
+            if getattr(chunk, "usage", None) is not None:
+                record_tokens(model, chunk.usage)
+
+        text = "".join(parts)
+        if cache is not None and text and is_valid(text, validate):
+            cache.put(model, messages, options, text, similar_to)
+
+
+def stream_text_events(deltas, on_done=None):
+    """
+    SSE events for a plain-text completion: a "delta" event per chunk of text, then a
+    "done" event with the whole text, or an "error" event if the completion fails.
+    `on_done` is called with the whole text before the "done" event, e.g. to store it.
+    """
+    parts = []
+    # The response has started by now, so every failure has to become an "error" event.
+    try:
+        for delta in deltas:
+            parts.append(delta)
+            yield sse_event("delta", {"text": delta})
+    except Exception as e:  # noqa: BLE001
+        print(f"Error streaming completion: {e}")
+        yield sse_event("error", {"error": str(e)})
+        return
+    text = "".join(parts).strip()
+    if on_done is not None:
+        on_done(text)
+    yield sse_event("done", {"text": text})
+
+
+def stream_json_events(deltas, item_event, on_done=None):
+    """
+    SSE events for a completion that returns a JSON object. The text is parsed as it
+    streams in and `item_event(path, value)` is called for each value that closes (see
+    llm.incremental_json); it returns an (event, data) pair to send, or None to skip the
+    value. The whole object follows in a "done" event, or an "error" event is sent if
+    the completion fails or isn't valid JSON.
+    """
+    parser = IncrementalJSONParser()
+    result = None
+    try:
+        for delta in deltas:
+            for path, value in parser.feed(delta):
+                if path == ():
+                    result = value
+                    continue
+                item = item_event(path, value)
+                if item is not None:
+                    yield sse_event(*item)
+        if result is None:
+            raise ValueError("The model did not return a complete JSON object")
+    except Exception as e:  # noqa: BLE001
+        print(f"Error streaming JSON completion: {e}")
+        yield sse_event("error", {"error": str(e)})
+        return
+    if on_done is not None:
+        on_done(result)
+    yield sse_event("done", result)
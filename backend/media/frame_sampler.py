@@ -0,0 +1,223 @@
+import subprocess
+
+import cv2
+import imageio_ffmpeg
+import numpy as np
+
+from resources import get_setting
+
+# Frame sampling shared by the attention scorer and the snapshot extractor.
+#
+# Decoding is what dominates the cost of reading a video, so instead of cap.read()-ing
+# every frame and throwing most of them away we pick one of two strategies:
+#   - "keyframes": when the video has a keyframe close to every sample point (typical
+#     for phone recordings), ffmpeg decodes *only* keyframes (-skip_frame nokey) and
+#     also scales/converts them, which skips the decoder work for every other frame.
+#   - "grab": otherwise OpenCV walks the stream with grab(), which demuxes and decodes
+#     without the colour conversion and copy, and only retrieve()s the frames we keep.
+# "auto" probes the keyframe layout (a demux-only pass, no decoding) and picks one.
+SAMPLE_METHODS = ("auto", "keyframes", "grab")
+
+# A keyframe counts as "close" to a sample point if it is within this fraction of the
+# sampling interval, e.g. +/-0.5s when sampling once per second.
+KEYFRAME_TOLERANCE = get_setting("FRAME_SAMPLER_KEYFRAME_TOLERANCE", 0.5, float)
+# Share of sample points that must have a close keyframe before the keyframe path is used.
+KEYFRAME_MIN_COVERAGE = get_setting("FRAME_SAMPLER_KEYFRAME_MIN_COVERAGE", 0.9, float)
+
+
+def probe_video(video_path: str) -> dict:
+    """
+    Returns fps, frame count and duration (seconds) as reported by OpenCV.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError("Could not open video file")
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    if fps <= 0:
+        raise ValueError("Invalid FPS, video might be corrupted")
+    return {"fps": fps, "frame_count": frame_count, "duration": frame_count / fps}
+
+
+def probe_keyframes(video_path: str) -> list:
+    """
+    Returns the presentation timestamps (seconds) of every keyframe in the first video
+    stream. This only demuxes packets, so it takes milliseconds even for long videos.
+    """
+    result = subprocess.run(
+        [imageio_ffmpeg.get_ffmpeg_exe(), "-v", "error", "-i", video_path,
+         "-map", "0:v:0", "-c", "copy", "-f", "framecrc", "-"],
+        capture_output=True, text=True, check=False,
+    )
+    if result.returncode != 0:
+        return []
+
+    time_base = None
+    keyframes = []
+    for line in result.stdout.splitlines():
+        if line.startswith("#tb 0:"):
+            num, den = line.split(":", 1)[1].strip().split("/")
+            time_base = int(num) / int(den)
+        elif line and not line.startswith("#") and time_base is not None:
+            # Non-key packets carry an ", F=0x.." flags column; keyframes do not.
+            if "F=0x" in line:
+                continue
+            fields = [field.strip() for field in line.split(",")]
+            keyframes.append(int(fields[2]) * time_base)
+    return sorted(keyframes)
+
+
+def sample_times(duration: float, rate: float, start: float = 0.0, end: float | None = None) -> np.ndarray:
+    """
+    Returns the sample points (seconds) at `rate` samples per second within [start, end).
+    """
+    end = duration if end is None else min(end, duration)
+    if end <= start:
+        return np.empty(0)
+    first = np.ceil(start * rate - 1e-9)
+    return np.arange(first, end * rate - 1e-9) / rate
+
+
+def _nearest_keyframes(targets: np.ndarray, keyframes: list, tolerance: float):
+    keyframe_times = np.asarray(keyframes)
+    if len(keyframe_times) == 1:
+        nearest = np.zeros(len(targets), dtype=int)
+        return nearest, np.abs(keyframe_times[0] - targets) <= tolerance
+    positions = np.clip(np.searchsorted(keyframe_times, targets), 1, len(keyframe_times) - 1)
+    before = keyframe_times[positions - 1]
+    after = keyframe_times[positions]
+    nearest = np.where(targets - before <= after - targets, positions - 1, positions)
+    distances = np.abs(keyframe_times[nearest] - targets)
+    return nearest, distances <= tolerance
+
+
+def choose_method(targets: np.ndarray, keyframes: list, rate: float) -> str:
+    """
+    Picks "keyframes" when nearly every sample point has a keyframe close to it,
+    otherwise "grab".
+    """
+    if len(targets) == 0 or len(keyframes) < 2:
+        return "grab"
+    _, close = _nearest_keyframes(targets, keyframes, KEYFRAME_TOLERANCE / rate)
+    return "keyframes" if close.mean() >= KEYFRAME_MIN_COVERAGE else "grab"
+
+
+def sample_frames(video_path: str, rate: float = 1.0, size: tuple | None = None, grayscale: bool = False,
+                  method: str = "auto", start: float = 0.0, end: float | None = None):
+    """
+    Yields (frame_index, timestamp, frame) tuples at `rate` frames per second between
+    `start` and `end` seconds. Frames are BGR (or grayscale), resized to `size`
+    (width, height) when given.
+
+    Raises ValueError straight away if the video can't be opened, before the first
+    frame is requested.
+    """
+    if method not in SAMPLE_METHODS:
+        raise ValueError(f"Unknown sampling method '{method}'")
+    if rate <= 0:
+        raise ValueError("Sampling rate must be positive")
+
+    info = probe_video(video_path)
+    targets = sample_times(info["duration"], rate, start, end)
+    keyframes = probe_keyframes(video_path) if method != "grab" else []
+    if method == "auto":
+        method = choose_method(targets, keyframes, rate)
+
+    if method == "keyframes":
+        return _sample_keyframes(video_path, info, targets, keyframes, rate, size, grayscale)
+    return _sample_grab(video_path, info, targets, size, grayscale)
+
+
+def _convert(frame, size, grayscale):
+    if size is not None and (frame.shape[1], frame.shape[0]) != tuple(size):
+        frame = cv2.resize(frame, size)
+    if grayscale:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return frame
+
+
+def _sample_grab(video_path, info, targets, size, grayscale):
+    fps = info["fps"]
+    # Several sample points can round to the same frame on low-fps clips; keep each once.
+    target_indices = sorted({round(t * fps) for t in targets})
+    if not target_indices:
+        return
+
+    cap = cv2.VideoCapture(video_path)
+    try:
+        frame_index = 0
+        if target_indices[0] > 0:
+            # One seek to the start of the range; within the range we only grab().
+            cap.set(cv2.CAP_PROP_POS_FRAMES, target_indices[0])
+            frame_index = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+
+        for target in target_indices:
+            while frame_index < target:
+                if not cap.grab():
+                    return
+                frame_index += 1
+            if not cap.grab():
+                return
+            ret, frame = cap.retrieve()
+            frame_index += 1
+            if ret:
+                yield target, target / fps, _convert(frame, size, grayscale)
+    finally:
+        cap.release()
+
+
+def frame_size(video_path) -> tuple:
+    """
+    Returns the (width, height) of decoded frames. OpenCV applies the rotation metadata
+    the same way ffmpeg does, so this is also the shape ffmpeg will output.
+    """
+    cap = cv2.VideoCapture(video_path)
+    ret, frame = cap.read()
+    cap.release()
+    if not ret:
+        raise ValueError("Could not read video frames")
+    return frame.shape[1], frame.shape[0]
+
+
+def _sample_keyframes(video_path, info, targets, keyframes, rate, size, grayscale):
+    if len(targets) == 0 or not keyframes:
+        return
+    nearest, _ = _nearest_keyframes(targets, keyframes, KEYFRAME_TOLERANCE / rate)
+    wanted = sorted({int(position) for position in nearest})
+
+    width, height = size if size is not None else frame_size(video_path)
+    channels = 1 if grayscale else 3
+    frame_bytes = width * height * channels
+    first, last = wanted[0], wanted[-1]
+
+    command = [
+        imageio_ffmpeg.get_ffmpeg_exe(), "-v", "error",
+        "-skip_frame", "nokey",
+        # Start exactly on the first keyframe we need (nudged back to avoid float rounding).
+        "-ss", f"{max(keyframes[first] - 0.001, 0):.6f}",
+        "-i", video_path,
+        "-map", "0:v:0", "-an",
+        "-fps_mode", "passthrough",
+        "-frames:v", str(last - first + 1),
+        "-vf", f"scale={width}:{height},format={'gray' if grayscale else 'bgr24'}",
+        "-f", "rawvideo", "-",
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    wanted_set = set(wanted)
+    try:
+        position = first
+        while position <= last:
+            data = process.stdout.read(frame_bytes)
+            if len(data) < frame_bytes:
+                break
+            if position in wanted_set:
+                shape = (height, width) if grayscale else (height, width, 3)
+                frame = np.frombuffer(data, np.uint8).reshape(shape)
+                timestamp = keyframes[position]
+                yield round(timestamp * info["fps"]), timestamp, frame
+            position += 1
+    finally:
+        process.stdout.close()
+        process.kill()
+        process.wait()
@@ -0,0 +1,151 @@
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+
+import cv2
+import numpy as np
+
+from resources import get_setting
+from telemetry.tracing import span
+
+from .frame_sampler import frame_size, sample_frames
+
+# Sampled video frames kept in one flat file per video instead of a JPEG per frame:
+#   frames/<store_id>/frames.u8    raw BGR frames back to back (count x height x width x 3, uint8)
+#   frames/<store_id>/index.json   frame shape, timestamps and source frame numbers
+#   frames/<store_id>/thumbs/      JPEG thumbnails, encoded the first time each is requested
+# Readers np.memmap the frames file, so a frame is a zero-copy view of the page cache and
+# nothing has to be re-decoded. Frames wider than FRAME_STORE_MAX_WIDTH are scaled down
+# (640x360 is ~0.7 MB per frame); old stores are removed by media.retention.
+FRAMES_FOLDER = "frames"
+os.makedirs(FRAMES_FOLDER, exist_ok=True)
+
+FRAME_STORE_MAX_WIDTH = get_setting("FRAME_STORE_MAX_WIDTH", 640, int)
+THUMBNAIL_QUALITY = get_setting("FRAME_STORE_THUMBNAIL_QUALITY", 80, int)
+
+STORE_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+
+def store_dir(store_id: str) -> str:
+    return os.path.join(FRAMES_FOLDER, store_id)
+
+
+def _scaled_size(video_path: str, max_width: int) -> tuple:
+    width, height = frame_size(video_path)
+    if width <= max_width:
+        return width, height
+    # Even dimensions keep ffmpeg's scaler and the JPEG encoder happy.
+    return max_width, max(2, round(height * max_width / width / 2) * 2)
+
+
+def create_frame_store(video_path: str, store_id: str, rate: float = 1.0,
+                       max_width: int = FRAME_STORE_MAX_WIDTH) -> dict:
+    """
+    Samples `rate` frames per second from the video into a new frame store and returns
+    its index. The store is written to a temporary folder and renamed into place, so it
+    is never seen half-written; an existing store with the same ID is replaced.
+    """
+    width, height = _scaled_size(video_path, max_width)
+    final_dir = store_dir(store_id)
+    temp_dir = f"{final_dir}.{uuid.uuid4().hex}.tmp"
+    os.makedirs(temp_dir)
+    try:
+        timestamps, frame_indices = [], []
+        with span("frames.store", bytes=os.path.getsize(video_path)) as stage, \
+                open(os.path.join(temp_dir, "frames.u8"), "wb") as f:
+            for frame_index, timestamp, frame in sample_frames(video_path, rate=rate, size=(width, height)):
+                f.write(np.ascontiguousarray(frame).data)
+                timestamps.append(round(float(timestamp), 3))
+                frame_indices.append(int(frame_index))
+            stage.set(frames=len(timestamps))
+
+        index = {
+            "store_id": store_id,
+            "rate": rate,
+            "count": len(timestamps),
+            "width": width,
+            "height": height,
+            "timestamps": timestamps,
+            "frame_indices": frame_indices,
+            "created": time.time(),
+        }
+        with open(os.path.join(temp_dir, "index.json"), "w", encoding="utf-8") as f:
+            json.dump(index, f)
+
+        shutil.rmtree(final_dir, ignore_errors=True)
+        os.replace(temp_dir, final_dir)
+    except BaseException:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise
+    return index
+
+
+class FrameStore:
+    """
+    Read access to a frame store. `frames` is a read-only (count, height, width, 3)
+    memory map; indexing it never copies or decodes.
+    """
+
+    def __init__(self, store_id: str):
+        self.store_id = store_id
+        self.path = store_dir(store_id)
+        with open(os.path.join(self.path, "index.json"), "r", encoding="utf-8") as f:
+            self.index = json.load(f)
+        shape = (self.index["count"], self.index["height"], self.index["width"], 3)
+        if self.index["count"]:
+            self.frames = np.memmap(os.path.join(self.path, "frames.u8"), dtype=np.uint8, mode="r", shape=shape)
+        else:
+            self.frames = np.empty(shape, dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return self.index["count"]
+
+    def __iter__(self):
+        """
+        Yields (timestamp, frame) pairs; every frame is a view into the memory map.
+        """
+        return zip(self.index["timestamps"], self.frames)
+
+    def thumbnail(self, position: int, width: int = 160) -> bytes:
+        """
+        Returns frame `position` as a JPEG `width` pixels wide, encoding it the first
+        time and reusing the file after that.
+        """
+        width = max(16, min(int(width), self.index["width"]))
+        thumbs_dir = os.path.join(self.path, "thumbs")
+        thumb_path = os.path.join(thumbs_dir, f"{position:05d}-{width}.jpg")
+        if os.path.exists(thumb_path):
+            with open(thumb_path, "rb") as f:
+                return f.read()
+
+        frame = self.frames[position]
+        if width != frame.shape[1]:
+            height = max(1, round(frame.shape[0] * width / frame.shape[1]))
+            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+        ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, THUMBNAIL_QUALITY])
+        if not ok:
+            raise ValueError("Could not encode thumbnail")
+
+        data = encoded.tobytes()
+        os.makedirs(thumbs_dir, exist_ok=True)
+        temp_path = f"{thumb_path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, thumb_path)
+        return data
+
+
+def open_frame_store(store_id: str) -> FrameStore | None:
+    """
+    Returns the frame store with this ID, or None if there is none.
+    """
+    if not STORE_ID_PATTERN.fullmatch(store_id) or not os.path.exists(os.path.join(store_dir(store_id), "index.json")):
+        return None
+    return FrameStore(store_id)
+
+
+def delete_frame_store(store_id: str):
+    shutil.rmtree(store_dir(store_id), ignore_errors=True)
@@ -0,0 +1,44 @@
+from flask import Blueprint, jsonify
+
+from .media_store import get_media, list_artifacts, save_upload
+from .retention import maybe_sweep
+from .upload_stream import UploadError, UploadTooLargeError
+
+media = Blueprint("media", __name__)
+
+# Registered app-wide, since every upload route streams through media.upload_stream.
+@media.app_errorhandler(UploadTooLargeError)
+def upload_too_large(e):
+    return jsonify({"error": str(e)}), 413
+
+@media.app_errorhandler(UploadError)
+def bad_upload(e):
+    return jsonify({"error": str(e)}), 400
+
+@media.route("", methods=["POST"])
+def upload_media():
+    # Store the video once; the analysis routes can then be called with the returned media_id.
+    maybe_sweep()
+    meta, _ = save_upload()
+    if meta is None:
+        return jsonify({"error": "No video file provided"}), 400
+
+    return jsonify({
+        "media_id": meta["media_id"],
+        "size": meta["size"],
+        "sha256": meta["sha256"],
+    }), 201
+
+@media.route("/<media_id>", methods=["GET"])
+def describe_media(media_id):
+    meta = get_media(media_id)
+    if meta is None:
+        return jsonify({"error": "Unknown media ID"}), 404
+
+    return jsonify({
+        "media_id": media_id,
+        "filename": meta["filename"],
+        "size": meta["size"],
+        "sha256": meta["sha256"],
+        "artifacts": list_artifacts(media_id),
+    })
@@ -0,0 +1,205 @@
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+
+from transcription.extractaudio import extract_audio_from_file
+from transcription.get_transcription import get_transcription
+
+from .upload_stream import receive_upload
+
+# Each uploaded video lives in its own folder, next to the artifacts derived from it:
+#   uploads/media/<media_id>/source.mp4
+#   uploads/media/<media_id>/meta.json
+#   uploads/media/<media_id>/<artifact>.json
+MEDIA_FOLDER = os.path.join("uploads", "media")
+os.makedirs(MEDIA_FOLDER, exist_ok=True)
+
+MEDIA_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+_memo = {}
+_memo_locks = {}
+_memo_guard = threading.Lock()
+
+
+def media_dir(media_id: str) -> str:
+    return os.path.join(MEDIA_FOLDER, media_id)
+
+
+def _write_json(path: str, data):
+    # Write to a temp file and rename so readers never see a half-written artifact.
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(temp_path, path)
+
+
+def save_upload(field: str = "video") -> tuple:
+    """
+    Streams the current request's video straight into a new media folder and returns
+    (meta, form). `meta` includes the media ID that the `/<media_id>` variants of the
+    analysis routes accept, or is None if the request had no file; `form` holds the
+    other fields sent with the upload.
+    """
+    media_id = uuid.uuid4().hex
+    folder = media_dir(media_id)
+    try:
+        upload = receive_upload(folder, field=field, stem="source")
+    except BaseException:
+        shutil.rmtree(folder, ignore_errors=True)
+        raise
+    if upload["path"] is None:
+        shutil.rmtree(folder, ignore_errors=True)
+        return None, upload["form"]
+
+    meta = register_media(media_id, upload["path"], upload["filename"], upload["size"], upload["sha256"])
+    return meta, upload["form"]
+
+
+def register_media(media_id: str, path: str, filename: str | None, size: int, sha256: str) -> dict:
+    """
+    Records a video already written into media_dir(media_id) (e.g. by a live recording
+    session) and returns its metadata. Until this is called, get_media doesn't see it.
+    """
+    meta = {
+        "media_id": media_id,
+        "filename": filename,
+        "path": path,
+        "size": size,
+        "sha256": sha256,
+        "created": time.time(),
+    }
+    _write_json(os.path.join(media_dir(media_id), "meta.json"), meta)
+    return meta
+
+
+def get_media(media_id: str) -> dict | None:
+    """
+    Returns the stored metadata for a media ID, or None if it does not exist.
+    """
+    if not MEDIA_ID_PATTERN.fullmatch(media_id):
+        return None
+    meta_path = os.path.join(media_dir(media_id), "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def list_artifacts(media_id: str) -> list:
+    folder = media_dir(media_id)
+    return sorted(
+        os.path.splitext(name)[0]
+        for name in os.listdir(folder)
+        if name.endswith(".json") and name != "meta.json"
+    )
+
+
+def find_artifact(media_id: str, name: str):
+    """
+    Returns an artifact if it has already been computed, without computing it.
+    """
+    with _memo_guard:
+        if (media_id, name) in _memo:
+            return _memo[(media_id, name)]
+    artifact_path = os.path.join(media_dir(media_id), f"{name}.json")
+    if not os.path.exists(artifact_path):
+        return None
+    return get_artifact(media_id, name, None)
+
+
+def get_artifact(media_id: str, name: str, compute):
+    """
+    Returns a derived artifact for a media ID, computing it at most once.
+
+    `compute` is called with the media metadata the first time the artifact is
+    requested. The JSON result is kept in memory and written next to the video, so
+    later requests (and other workers) reuse it instead of decoding the video again.
+    """
+    key = (media_id, name)
+    with _memo_guard:
+        if key in _memo:
+            return _memo[key]
+        lock = _memo_locks.setdefault(key, threading.Lock())
+
+    with lock:
+        if key in _memo:
+            return _memo[key]
+
+        artifact_path = os.path.join(media_dir(media_id), f"{name}.json")
+        if os.path.exists(artifact_path):
+            with open(artifact_path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        else:
+            value = compute(get_media(media_id))
+            if value is None:
+                # Nothing to keep: the next request computes it again.
+                return None
+            _write_json(artifact_path, value)
+
+        with _memo_guard:
+            _memo[key] = value
+        return value
+
+
+def store_artifact(media_id: str, name: str, value):
+    """
+    Saves an artifact computed elsewhere, replacing any earlier one.
+    """
+    _write_json(os.path.join(media_dir(media_id), f"{name}.json"), value)
+    with _memo_guard:
+        _memo[(media_id, name)] = value
+
+
+def drop_artifact(media_id: str, name: str):
+    """
+    Forgets a computed artifact so the next get_artifact call computes it again.
+    """
+    with _memo_guard:
+        _memo.pop((media_id, name), None)
+    artifact_path = os.path.join(media_dir(media_id), f"{name}.json")
+    if os.path.exists(artifact_path):
+        os.remove(artifact_path)
+
+
+def delete_media(media_id: str):
+    """
+    Removes a stored video with everything derived from it.
+    """
+    with _memo_guard:
+        for key in [key for key in _memo if key[0] == media_id]:
+            del _memo[key]
+        for key in [key for key in _memo_locks if key[0] == media_id]:
+            del _memo_locks[key]
+    shutil.rmtree(media_dir(media_id), ignore_errors=True)
+
+
+def get_audio_track(media_id: str) -> str:
+    """
+    Extracts the audio track of a stored video once and returns its path.
+    """
+    def extract(meta):
+        audio_path = extract_audio_from_file(meta["path"], os.path.join(media_dir(media_id), "audio"))
+        if audio_path is None:
+            raise ValueError("Could not extract audio from the video")
+        return audio_path
+
+    return get_artifact(media_id, "audio", extract)
+
+
+def get_transcript(media_id: str) -> str:
+    """
+    Returns the transcript of a stored video, reusing its extracted audio track and
+    the content hash computed at upload time.
+    """
+    def transcribe(meta):
+        return get_transcription(
+            meta["path"],
+            content_hash=meta["sha256"],
+            audio_path_provider=lambda: get_audio_track(media_id),
+        )
+
+    return get_artifact(media_id, "transcript", transcribe)
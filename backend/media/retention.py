@@ -0,0 +1,149 @@
+import os
+import shutil
+import threading
+import time
+from contextlib import suppress
+
+from resources import get_setting
+
+from .frame_store import FRAMES_FOLDER
+from .media_store import MEDIA_FOLDER, MEDIA_ID_PATTERN, delete_media
+
+# Retention for everything written under uploads/ and frames/, which used to grow without
+# bound. Each kind of entry has a maximum age in seconds (0 keeps it forever), and frame
+# stores also have a total size budget, past which the oldest are removed first:
+#   UPLOAD_RETENTION_SECONDS        loose files in uploads/ (default 1 day)
+#   MEDIA_RETENTION_SECONDS         uploads/media/<id>, counted from the last artifact written (7 days)
+#   FRAME_STORE_RETENTION_SECONDS   frames/<id> (1 day)
+#   FRAME_STORE_MAX_BYTES           all of frames/ (2 GB)
+# Routes that write files call maybe_sweep(), which runs a sweep in the background at most
+# every RETENTION_SWEEP_SECONDS; `python -m media.retention` runs one from cron.
+UPLOADS_FOLDER = "uploads"
+UPLOAD_RETENTION_SECONDS = get_setting("UPLOAD_RETENTION_SECONDS", 24 * 60 * 60, int)
+MEDIA_RETENTION_SECONDS = get_setting("MEDIA_RETENTION_SECONDS", 7 * 24 * 60 * 60, int)
+FRAME_STORE_RETENTION_SECONDS = get_setting("FRAME_STORE_RETENTION_SECONDS", 24 * 60 * 60, int)
+FRAME_STORE_MAX_BYTES = get_setting("FRAME_STORE_MAX_BYTES", 2 * 1024 * 1024 * 1024, int)
+RETENTION_SWEEP_SECONDS = get_setting("RETENTION_SWEEP_SECONDS", 10 * 60, int)
+# Temp folders of writes still in progress are left alone for this long.
+_TEMP_GRACE_SECONDS = 60 * 60
+
+
+
+def _tree_size(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for folder, _, files in os.walk(path):
+        for name in files:
+            with suppress(OSError):
+                total += os.path.getsize(os.path.join(folder, name))
+    return total
+
+
+def _last_modified(path: str) -> float:
+    # A media folder's own mtime changes whenever an artifact is added to it.
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return time.time()
+
+
+def _remove(path: str):
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        with suppress(OSError):
+            os.remove(path)
+
+
+def sweep(now: float | None = None) -> dict:
+    """
+    Removes expired uploads, media and frame stores. Returns how many of each were removed.
+    """
+    now = time.time() if now is None else now
+    removed = {"uploads": 0, "media": 0, "frame_stores": 0}
+
+    if UPLOAD_RETENTION_SECONDS and os.path.isdir(UPLOADS_FOLDER):
+        for name in os.listdir(UPLOADS_FOLDER):
+            path = os.path.join(UPLOADS_FOLDER, name)
+            if os.path.abspath(path) == os.path.abspath(MEDIA_FOLDER):
+                continue
+            if now - _last_modified(path) > UPLOAD_RETENTION_SECONDS:
+                _remove(path)
+                removed["uploads"] += 1
+
+    if MEDIA_RETENTION_SECONDS and os.path.isdir(MEDIA_FOLDER):
+        for name in os.listdir(MEDIA_FOLDER):
+            path = os.path.join(MEDIA_FOLDER, name)
+            if not MEDIA_ID_PATTERN.fullmatch(name):
+                # Leftovers of an upload that never finished.
+                if now - _last_modified(path) > _TEMP_GRACE_SECONDS:
+                    _remove(path)
+                continue
+            if now - _last_modified(path) > MEDIA_RETENTION_SECONDS:
+                delete_media(name)
+                # The media's frame store goes with it.
+                _remove(os.path.join(FRAMES_FOLDER, name))
+                removed["media"] += 1
+
+    if os.path.isdir(FRAMES_FOLDER):
+        stores = []
+        for name in os.listdir(FRAMES_FOLDER):
+            path = os.path.join(FRAMES_FOLDER, name)
+            if not os.path.exists(path):
+                continue
+            age = now - _last_modified(path)
+            if name.endswith(".tmp"):
+                if age > _TEMP_GRACE_SECONDS:
+                    _remove(path)
+                continue
+            if FRAME_STORE_RETENTION_SECONDS and age > FRAME_STORE_RETENTION_SECONDS:
+                _remove(path)
+                removed["frame_stores"] += 1
+            else:
+                stores.append((_last_modified(path), _tree_size(path), path))
+
+        total = sum(size for _, size, _ in stores)
+        for _, size, path in sorted(stores):
+            if not FRAME_STORE_MAX_BYTES or total <= FRAME_STORE_MAX_BYTES:
+                break
+            _remove(path)
+            total -= size
+            removed["frame_stores"] += 1
+
+    return removed
+
+
+class _SweepSchedule:
+    # Remembers when maybe_sweep() last started a sweep.
+
+    def __init__(self, interval: int):
+        self.interval = interval
+        self._last_started = 0.0
+        self._lock = threading.Lock()
+
+    def claim(self) -> bool:
+        """
+        True (and the next sweep is due `interval` seconds from now) if a sweep is due.
+        """
+        with self._lock:
+            now = time.time()
+            if now - self._last_started < self.interval:
+                return False
+            self._last_started = now
+            return True
+
+
+_schedule = _SweepSchedule(RETENTION_SWEEP_SECONDS)
+
+
+def maybe_sweep():
+    """
+    Starts a background sweep if the last one was more than RETENTION_SWEEP_SECONDS ago.
+    """
+    if _schedule.claim():
+        threading.Thread(target=sweep, name="retention-sweep", daemon=True).start()
+
+
+if __name__ == "__main__":
+    print(sweep())
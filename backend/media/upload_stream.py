@@ -0,0 +1,195 @@
+import hashlib
+import os
+import uuid
+
+from flask import request
+from werkzeug.sansio.multipart import (
+    Data,
+    Epilogue,
+    Field,
+    File,
+    MultipartDecoder,
+    NeedData,
+)
+from werkzeug.utils import secure_filename
+
+from resources import get_setting
+from telemetry.tracing import span
+
+# Streams an uploaded video from the request body straight to its final location.
+#
+# request.files makes Werkzeug spool the whole upload to a temp file (or RAM) before the
+# view runs, and FileStorage.save() then copies it again. Here the multipart body is
+# decoded chunk by chunk as it arrives: file bytes go directly into the destination file
+# and into a SHA-256, so the content hash is ready without re-reading the file.
+# Raw (non-multipart) bodies are supported too, with the filename in X-Filename.
+MAX_UPLOAD_BYTES = get_setting("MAX_UPLOAD_BYTES", 1024 * 1024 * 1024, int)
+UPLOAD_CHUNK_SIZE = get_setting("UPLOAD_CHUNK_SIZE", 1024 * 1024, int)
+# Limit for the small text fields sent alongside the file (e.g. media_id, pitch_type).
+MAX_FIELD_BYTES = 64 * 1024
+
+
+class UploadTooLargeError(Exception):
+    pass
+
+
+class UploadError(ValueError):
+    pass
+
+
+class _FileSink:
+    def __init__(self, path: str):
+        self.path = path
+        self.size = 0
+        self.digest = hashlib.sha256()
+        # Stays open across write() calls until the caller is done with the upload.
+        self._file = open(path, "wb")  # noqa: SIM115
+
+    def write(self, data: bytes):
+        self.size += len(data)
+        if self.size > MAX_UPLOAD_BYTES:
+            raise UploadTooLargeError(f"Upload exceeds the {MAX_UPLOAD_BYTES} byte limit")
+        self.digest.update(data)
+        self._file.write(data)
+
+    def close(self):
+        self._file.close()
+
+
+def _destination(dest_dir: str, stem: str | None, filename: str | None) -> str:
+    file_extension = os.path.splitext(secure_filename(filename or ""))[-1] or ".mp4"
+    return os.path.join(dest_dir, f"{stem or uuid.uuid4().hex}{file_extension}")
+
+
+def receive_upload(dest_dir: str, field: str = "video", stem: str | None = None) -> dict:
+    """
+    Streams the current request's upload into `dest_dir` and returns
+    {"path", "filename", "size", "sha256", "form"}.
+
+    "path" is None when the request carries no file in `field` (e.g. a plain form or
+    JSON body with just a media_id); "form" holds any other text fields. Raises
+    UploadTooLargeError as soon as the declared or received size passes
+    MAX_UPLOAD_BYTES (nothing is left on disk), and UploadError for bodies that aren't
+    multipart or a raw upload, or that end in the middle of a multipart body.
+    """
+    if request.content_length is not None and request.content_length > MAX_UPLOAD_BYTES:
+        raise UploadTooLargeError(f"Upload exceeds the {MAX_UPLOAD_BYTES} byte limit")
+    os.makedirs(dest_dir, exist_ok=True)
+
+    with span("upload") as stage:
+        upload = _receive(dest_dir, field, stem)
+        stage.set(bytes=upload["size"])
+    return upload
+
+
+def _receive(dest_dir, field, stem):
+    if request.mimetype == "multipart/form-data":
+        return _receive_multipart(dest_dir, field, stem)
+    if request.mimetype.startswith("video/") or request.mimetype == "application/octet-stream":
+        return _receive_raw(dest_dir, stem)
+    if request.mimetype == "application/x-www-form-urlencoded":
+        return _no_file(request.form.to_dict())
+    if request.mimetype == "application/json":
+        body = request.get_json(silent=True)
+        return _no_file(body if isinstance(body, dict) else {})
+    if not request.mimetype and not request.content_length:
+        return _no_file(request.args.to_dict())
+    raise UploadError("Expected a multipart/form-data or raw video upload")
+
+
+def _no_file(form):
+    return {"path": None, "filename": None, "size": 0, "sha256": None, "form": form}
+
+
+def _receive_raw(dest_dir, stem):
+    filename = request.headers.get("X-Filename") or request.args.get("filename")
+    sink = _FileSink(_destination(dest_dir, stem, filename))
+    try:
+        for chunk in iter(lambda: request.stream.read(UPLOAD_CHUNK_SIZE), b""):
+            sink.write(chunk)
+    except BaseException:
+        sink.close()
+        os.remove(sink.path)
+        raise
+    sink.close()
+
+    if sink.size == 0:
+        os.remove(sink.path)
+        return _no_file(request.args.to_dict())
+    return {
+        "path": sink.path,
+        "filename": filename,
+        "size": sink.size,
+        "sha256": sink.digest.hexdigest(),
+        "form": request.args.to_dict(),
+    }
+
+
+def _next_event(decoder):
+    try:
+        return decoder.next_event()
+    except ValueError as e:
+        # werkzeug raises a plain ValueError when the body ends in the middle of a part.
+        raise UploadError("Incomplete multipart upload") from e
+
+
+def _receive_multipart(dest_dir, field, stem):
+    boundary = request.mimetype_params.get("boundary")
+    if not boundary:
+        raise UploadError("Missing multipart boundary")
+
+    # The decoder's own max_form_memory_size would cap the whole receive buffer, file
+    # data included, so text field sizes are checked below instead.
+    decoder = MultipartDecoder(boundary.encode("latin-1"))
+    form = {}
+    sink = None
+    filename = None
+    # What the current part's Data events go to: a list for text fields, the sink
+    # for our file, or None for parts we ignore.
+    target = None
+    current = None
+
+    try:
+        while True:
+            chunk = request.stream.read(UPLOAD_CHUNK_SIZE)
+            decoder.receive_data(chunk or None)
+            event = _next_event(decoder)
+            while not isinstance(event, (NeedData, Epilogue)):
+                if isinstance(event, Field):
+                    current, target = event, []
+                elif isinstance(event, File):
+                    current = event
+                    if event.name == field and sink is None and event.filename:
+                        filename = event.filename
+                        sink = _FileSink(_destination(dest_dir, stem, filename))
+                        target = sink
+                    else:
+                        target = None
+                elif isinstance(event, Data):
+                    if isinstance(target, list):
+                        target.append(event.data)
+                        if sum(len(part) for part in target) > MAX_FIELD_BYTES:
+                            raise UploadTooLargeError(f"Form field '{current.name}' is too large")
+                        if not event.more_data:
+                            form[current.name] = b"".join(target).decode("utf-8", "replace")
+                    elif target is not None:
+                        target.write(event.data)
+                event = _next_event(decoder)
+            if isinstance(event, Epilogue) or not chunk:
+                break
+    except BaseException:
+        if sink is not None:
+            sink.close()
+            os.remove(sink.path)
+        raise
+
+    if sink is None:
+        return _no_file(form)
+    sink.close()
+    return {
+        "path": sink.path,
+        "filename": filename,
+        "size": sink.size,
+        "sha256": sink.digest.hexdigest(),
+        "form": form,
+    }
@@ -1,17 +1,23 @@
-from flask import Blueprint, request, jsonify
-from openai import OpenAI
-import os
-from dotenv import load_dotenv
-import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from flask import Blueprint, jsonify, request
+
+from llm.chat import chat_completion
+from llm.streaming import sse_event, sse_response, stream_chat, stream_text_events
+from resources import get_setting
 
 answer_feedback = Blueprint("answer-feedback", __name__)
 
-def judge_response(question: str, answer: str) -> str:
-    """
-    Given a single question and its corresponding answer, this function constructs
-    a prompt to have the OpenAI API evaluate the response. It returns the evaluator's feedback
-    as a plain text string.
-    """
+# Batch judging fans out over one shared pool, so JUDGE_BATCH_CONCURRENCY caps the
+# number of GPT calls in flight across all batch requests, not per request.
+JUDGE_BATCH_CONCURRENCY = get_setting("JUDGE_BATCH_CONCURRENCY", 5, int)
+JUDGE_BATCH_MAX_ITEMS = get_setting("JUDGE_BATCH_MAX_ITEMS", 50, int)
+_judge_pool = ThreadPoolExecutor(max_workers=JUDGE_BATCH_CONCURRENCY, thread_name_prefix="judge")
+
+def shutdown_judge_pool(wait: bool = True):
+    _judge_pool.shutdown(wait=wait, cancel_futures=not wait)
+
+def judge_messages(question: str, answer: str) -> list:
     prompt_lines = [
         "Below is a question along with the answer provided. Please evaluate the answer by highlighting its strengths,",
         "identifying any weaknesses, and suggesting improvements.",
@@ -28,34 +34,24 @@ def judge_response(question: str, answer: str) -> str:
     ]
     prompt_text = "\n".join(prompt_lines)
 
-    # Load environment variables from the root directory
-    root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
-    dotenv_path = os.path.join(root_dir, ".env")
-    load_dotenv(dotenv_path)
-
-    openai_api_key = os.getenv("OPENAI_API_KEY")
-    if not openai_api_key:
-        print("Error: OPENAI_API_KEY not found in .env file.")
-        sys.exit(1)
-
-    client = OpenAI(api_key=openai_api_key)
-
-    completion = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[
-            {
-                "role": "system",
-                "content": "You are an experienced evaluator who provides detailed, constructive feedback on answers to questions."
-            },
-            {
-                "role": "user",
-                "content": prompt_text
-            }
-        ],
-        max_tokens=250,
-    )
-
-    feedback = completion.choices[0].message.content.strip()
+    return [
+        {
+            "role": "system",
+            "content": "You are an experienced evaluator who provides detailed, constructive feedback on answers to questions."
+        },
+        {
+            "role": "user",
+            "content": prompt_text
+        }
+    ]
+
+def judge_response(question: str, answer: str) -> str:
+    """
+    Given a single question and its corresponding answer, this function constructs
+    a prompt to have the OpenAI API evaluate the response. It returns the evaluator's feedback
+    as a plain text string.
+    """
+    feedback = chat_completion(judge_messages(question, answer), "gpt-4o", max_tokens=250).strip()
     return feedback
 
 @answer_feedback.route("/judge-responses", methods=["POST"])
@@ -69,3 +65,62 @@ def judge_responses_route():
     feedback = judge_response(question, answer)
     
     return jsonify({"feedback": feedback}), 200
+
+@answer_feedback.route("/judge-responses/stream", methods=["POST"])
+def stream_judge_responses_route():
+    # Same request body; the feedback comes back as Server-Sent Events ("delta" per chunk, then "done").
+    data = request.get_json()
+    if not data or "question" not in data or "answer" not in data:
+        return jsonify({"error": "Missing required fields 'question' and 'answer'."}), 400
+
+    deltas = stream_chat(judge_messages(data["question"], data["answer"]), "gpt-4o", max_tokens=250)
+    return sse_response(stream_text_events(deltas))
+
+def _judge_item(index: int, item: dict) -> dict:
+    # Each call waits for the provider's rate limits in the gateway, and a failure only fails its own item.
+    try:
+        return {"index": index, "feedback": judge_response(item["question"], item["answer"])}
+    except Exception as e:  # noqa: BLE001
+        print(f"Error judging response {index}: {e}")
+        return {"index": index, "error": str(e)}
+
+def _parse_batch(data):
+    """
+    Accepts {"items": [{"question", "answer"}, ...]} or the bare list. Returns (items, error message).
+    """
+    items = data.get("items") if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return None, "Expected a non-empty list of {'question', 'answer'} items."
+    if len(items) > JUDGE_BATCH_MAX_ITEMS:
+        return None, f"At most {JUDGE_BATCH_MAX_ITEMS} items can be judged per request."
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or "question" not in item or "answer" not in item:
+            return None, f"Item {index} is missing the required fields 'question' and 'answer'."
+    return items, None
+
+@answer_feedback.route("/judge-responses/batch", methods=["POST"])
+def judge_responses_batch_route():
+    # Judges a whole Q&A session at once; results come back in the order of the items.
+    items, error = _parse_batch(request.get_json(silent=True))
+    if error:
+        return jsonify({"error": error}), 400
+
+    futures = [_judge_pool.submit(_judge_item, index, item) for index, item in enumerate(items)]
+    return jsonify({"results": [future.result() for future in futures]}), 200
+
+@answer_feedback.route("/judge-responses/batch/stream", methods=["POST"])
+def stream_judge_responses_batch_route():
+    # Streaming variant: a "result" event per item as soon as it is judged (in completion
+    # order, with its index), then "done" with all results in item order.
+    items, error = _parse_batch(request.get_json(silent=True))
+    if error:
+        return jsonify({"error": error}), 400
+
+    futures = [_judge_pool.submit(_judge_item, index, item) for index, item in enumerate(items)]
+
+    def events():
+        for future in as_completed(futures):
+            yield sse_event("result", future.result())
+        yield sse_event("done", {"results": [future.result() for future in futures]})
+
+    return sse_response(events())
@@ -1,55 +1,27 @@
-import sys
-import os
 import tempfile
 import json
-import re
-from flask import Blueprint, request, jsonify
-from dotenv import load_dotenv
-from openai import OpenAI
+from flask import Blueprint, jsonify
+from llm.chat import chat_completion
+from evaluation.pitch_analysis import LLM_COMBINED_ANALYSIS, get_pitch_analysis
 from transcription.get_transcription import get_transcription  # Helper for audio extraction & transcription
+from media.media_store import get_media, get_artifact, find_artifact, get_transcript
+from media.upload_stream import receive_upload
+from llm.streaming import sse_event, sse_response, stream_chat, stream_json_events
 
 question_generation = Blueprint("question_generation", __name__)
 
-def extract_json_from_markdown(markdown_str: str) -> dict:
+def parse_questions(text: str) -> list:
     """
-    Extracts JSON content from a markdown code block.
-    It looks for content wrapped between ```json and ``` markers.
+    Returns the questions list from a completion requested with response_format
+    json_object. Raises ValueError if the answer has no such list.
     """
-    pattern = r"```json\s*(.*?)\s*```"
-    match = re.search(pattern, markdown_str, re.DOTALL)
-    if match:
-        json_str = match.group(1)
-    else:
-        # If not found, assume the entire string is JSON.
-        json_str = markdown_str.strip()
-
-    try:
-        return json.loads(json_str)
-    except Exception as e:
-        print("Error parsing JSON from markdown:", e)
-        print("Attempted JSON string:", json_str)
-        return None
-
-
-def generate_questions(transcript: str) -> str:
-    """
-    Given a pitch transcript, uses the GPT-4o model to generate a JSON-formatted
-    numbered list of 10 questions that investors or judges might ask.
-    """
-    # Load the .env file from the root directory (one level up)
-    root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
-    dotenv_path = os.path.join(root_dir, ".env")
-    load_dotenv(dotenv_path)
-
-    # Retrieve the OpenAI API key from the .env file
-    openai_api_key = os.getenv("OPENAI_API_KEY")
-    if not openai_api_key:
-        print("Error: OPENAI_API_KEY not found in .env file.")
-        sys.exit(1)
-
-    # Initialize the OpenAI client with the API key
-    client = OpenAI(api_key=openai_api_key)
+    answer = json.loads(text)
+    questions = answer.get("questions") if isinstance(answer, dict) else None
+    if not isinstance(questions, list):
+        raise ValueError("The model did not return a list of questions")
+    return questions
 
+def questions_messages(transcript: str) -> list:
     prompt = (
         "Based on the following pitch transcript, generate a numbered list of 10 highly relevant and insightful questions "
         "that experienced investors or a panel of judges might ask the presenter. The questions should critically assess key aspects of the business, focusing on the following dimensions if applicable:\n\n"
@@ -64,58 +36,132 @@ def generate_questions(transcript: str) -> str:
         "and challenge the presenter to substantiate their claims with data, market insights, or strategic foresight. "
         "Format the output as a JSON object with a key 'questions' that contains the list of questions."
     )
-
-    completion = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[
-            {
-                "role": "system",
-                "content": "You are an experienced venture capitalist, skilled at analyzing pitches and asking challenging questions."
-            },
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ],
+    return [
+        {
+            "role": "system",
+            "content": "You are an experienced venture capitalist, skilled at analyzing pitches and asking challenging questions."
+        },
+        {
+            "role": "user",
+            "content": prompt
+        }
+    ]
+
+def generate_questions(transcript: str) -> list:
+    """
+    Given a pitch transcript, uses the GPT-4o model to generate a list of 10
+    questions that investors or judges might ask.
+    """
+    if LLM_COMBINED_ANALYSIS:
+        # Shares one completion with the feedback and evaluation (see evaluation.pitch_analysis).
+        return get_pitch_analysis(transcript)["questions"]
+
+    # Cached per prompt (see llm/response_cache.py); unparsable answers are not cached.
+    return parse_questions(chat_completion(
+        questions_messages(transcript),
+        "gpt-4o",
+        similar_to=transcript,
+        validate=parse_questions,
+        response_format={"type": "json_object"},
         max_tokens=2000,
-    )
-
-    # Return the ChatCompletionMessage object as a string
-    return completion.choices[0].message.content
+    ))
 
 @question_generation.route("/generate-questions", methods=["POST"])
 def generate_questions_route():
-    # Check that a video file is provided
-    if "video" not in request.files:
-        return jsonify({"error": "No video file provided"}), 400
+    # Stream the uploaded video into a temporary directory
+    with tempfile.TemporaryDirectory() as temp_dir:
+        upload = receive_upload(temp_dir)
+        # Check that a video file is provided
+        if upload["path"] is None:
+            return jsonify({"error": "No video file provided"}), 400
+
+        try:
+            # Extract transcript from the video using your helper function
+            transcript_text = get_transcription(upload["path"], content_hash=upload["sha256"])
+        except Exception as e:  # noqa: BLE001
+            return jsonify({"error": str(e)}), 500
+
+    try:
+        # Generate questions based on the transcript
+        questions = generate_questions(transcript_text)
+    except Exception as e:
+        return jsonify({"error": f"Error generating questions: {str(e)}"}), 500
 
-    video_file = request.files["video"]
+    # Return the generated questions as JSON
+    return jsonify({"questions": questions}), 200
 
-    # Save the uploaded video to a temporary file
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as temp_video:
-        video_path = temp_video.name
-        video_file.save(video_path)
+@question_generation.route("/generate-questions/<media_id>", methods=["POST"])
+def generate_media_questions_route(media_id):
+    # Questions for a video stored through POST /media reuse its transcript and are generated once.
+    if get_media(media_id) is None:
+        return jsonify({"error": "Unknown media ID"}), 404
 
     try:
-        # Extract transcript from the video using your helper function
-        transcript_text = get_transcription(video_path)
-    except Exception as e:
-        if os.path.exists(video_path):
-            os.remove(video_path)
+        transcript_text = get_transcript(media_id)
+    except Exception as e:  # noqa: BLE001
         return jsonify({"error": str(e)}), 500
-    finally:
-        if os.path.exists(video_path):
-            os.remove(video_path)
+
+    def compute(meta):
+        # A malformed answer raises, which keeps it out of the media store, so the next
+        # request generates the questions again.
+        return {"questions": generate_questions(transcript_text)}
 
     try:
-        # Generate questions based on the transcript
-        questions_result = generate_questions(transcript_text)
-        # Extract and parse the JSON from the markdown formatted response
-        questions_json = extract_json_from_markdown(questions_result)
-        if questions_json is None:
-            return jsonify({"error": "Failed to parse questions JSON"}), 500
-    except Exception as e:
-        return jsonify({"error": f"Error generating questions: {str(e)}"}), 500
+        questions_json = get_artifact(media_id, "questions", compute)
+    except Exception as e:  # noqa: BLE001
+        return jsonify({"error": f"Error generating questions: {e}"}), 500
 
-    # Return the generated questions as JSON
     return jsonify(questions_json), 200
+
+def question_event(path, value):
+    # One "question" event per entry of the "questions" list, sent as soon as it closes.
+    if len(path) == 2 and path[0] == "questions":
+        return "question", {"index": path[1], "question": value}
+    return None
+
+def stream_questions(transcript_text: str, on_done=None):
+    deltas = stream_chat(
+        questions_messages(transcript_text), "gpt-4o",
+        similar_to=transcript_text, validate=parse_questions,
+        response_format={"type": "json_object"}, max_tokens=2000,
+    )
+    return stream_json_events(deltas, question_event, on_done)
+
+@question_generation.route("/generate-questions/stream", methods=["POST"])
+def stream_questions_route():
+    # Streaming variant: "question" events as each question is generated, then "done" with the full JSON.
+    with tempfile.TemporaryDirectory() as temp_dir:
+        upload = receive_upload(temp_dir)
+        if upload["path"] is None:
+            return jsonify({"error": "No video file provided"}), 400
+
+        try:
+            transcript_text = get_transcription(upload["path"], content_hash=upload["sha256"])
+        except Exception as e:  # noqa: BLE001
+            return jsonify({"error": str(e)}), 500
+
+    return sse_response(stream_questions(transcript_text))
+
+@question_generation.route("/generate-questions/<media_id>/stream", methods=["POST"])
+def stream_media_questions_route(media_id):
+    if get_media(media_id) is None:
+        return jsonify({"error": "Unknown media ID"}), 404
+
+    try:
+        transcript_text = get_transcript(media_id)
+    except Exception as e:  # noqa: BLE001
+        return jsonify({"error": str(e)}), 500
+
+    def events():
+        questions_json = find_artifact(media_id, "questions")
+        if questions_json is not None:
+            for index, question in enumerate(questions_json.get("questions", [])):
+                yield sse_event("question", {"index": index, "question": question})
+            yield sse_event("done", questions_json)
+            return
+        yield from stream_questions(
+            transcript_text,
+            on_done=lambda result: get_artifact(media_id, "questions", lambda meta: result),
+        )
+
+    return sse_response(events())
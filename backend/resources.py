@@ -0,0 +1,119 @@
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from functools import cache
+
+from dotenv import load_dotenv
+
+# Process-wide resources shared by every blueprint: configuration from backend/.env,
+# the OpenAI client and the OpenCV detectors. Everything is created lazily on first use
+# and then reused, so requests don't pay for model loading or new TLS connections.
+root_dir = os.path.dirname(os.path.abspath(__file__))
+dotenv_path = os.path.join(root_dir, ".env")
+
+_config_lock = threading.Lock()
+_client_lock = threading.Lock()
+# Idle face detectors. OpenCV's cascades, DNN nets and FaceDetectorYN all keep scratch
+# buffers per instance, so no backend can be used by two threads at once; a thread
+# borrows one for a block of work (see face_detector) and then returns it.
+_face_detectors = queue.SimpleQueue()
+
+
+class MissingAPIKeyError(RuntimeError):
+    pass
+
+
+def load_config():
+    """
+    Loads backend/.env into the environment once. Values already set in the real
+    environment win over the file.
+    """
+    with _config_lock:
+        _load_dotenv()
+
+
+@cache
+def _load_dotenv():
+    load_dotenv(dotenv_path)
+
+
+def get_setting(name: str, default=None, cast=str):
+    """
+    Returns a configuration value from the environment (or .env), converted with `cast`.
+    """
+    load_config()
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return cast(value)
+
+
+def get_openai_client():
+    """
+    Returns the shared OpenAI client. The client is thread-safe and keeps its HTTP
+    connection pool between requests. Raises MissingAPIKeyError (instead of exiting
+    the worker) when OPENAI_API_KEY is not configured.
+    """
+    with _client_lock:
+        return _create_openai_client()
+
+
+@cache
+def _create_openai_client():
+    # Not cached when it raises, so setting the key later still works.
+    from openai import OpenAI
+
+    openai_api_key = get_setting("OPENAI_API_KEY")
+    if not openai_api_key:
+        raise MissingAPIKeyError("OPENAI_API_KEY not found in .env file.")
+    # Bounded so a stuck API call can't hold a worker thread past the server's own limits.
+    timeout = get_setting("OPENAI_TIMEOUT_SECONDS", 120.0, float)
+    # Retries happen in llm.gateway, which also slows the rate limits down after a 429.
+    max_retries = get_setting("OPENAI_MAX_RETRIES", 0, int)
+    return OpenAI(api_key=openai_api_key, timeout=timeout, max_retries=max_retries)
+
+
+@contextmanager
+def face_detector():
+    """
+    Lends an idle face detector (FACE_DETECTOR, see bodylanguage.detectors) to the
+    calling thread for the duration of the block, loading a new one only when all of
+    them are in use. Request threads created after start-up (threaded dev server,
+    Gunicorn gthread workers) reuse the ones already loaded, starting with warm_up's.
+    """
+    try:
+        detector = _face_detectors.get_nowait()
+    except queue.Empty:
+        from bodylanguage.detectors import load_detector
+
+        detector = load_detector()
+    try:
+        yield detector
+    finally:
+        _face_detectors.put(detector)
+
+
+def warm_up():
+    """
+    Loads configuration, the detectors and the OpenAI client up front so the first
+    request doesn't pay for them. Set WARMUP_OPENAI_CONNECTION=1 to also open the
+    TLS connection to the API with a cheap models.list() call.
+    """
+    load_config()
+    with face_detector():
+        pass
+
+    try:
+        client = get_openai_client()
+    except MissingAPIKeyError as e:
+        print(f"Warning: {e} LLM and transcription routes will fail until it is set.")
+        return
+
+    if get_setting("WARMUP_OPENAI_CONNECTION", False, lambda value: value == "1"):
+        from openai import OpenAIError
+
+        try:
+            client.models.list()
+        except OpenAIError as e:
+            print(f"Warning: could not warm up the OpenAI connection: {e}")
@@ -1,58 +1,91 @@
-from flask import Blueprint, request, jsonify
-import cv2
-import os
+from flask import Blueprint, Response, jsonify, request, url_for
+import tempfile
 import uuid
+from media.media_store import get_media, get_artifact, drop_artifact
+from media.frame_store import create_frame_store, open_frame_store
+from media.retention import maybe_sweep
+from media.upload_stream import receive_upload
 
 snapshots = Blueprint('snapshots', __name__)
-UPLOAD_FOLDER = "uploads"
-OUTPUT_FOLDER = "frames"
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+
+def extract_frames_from_video(video_path, store_id, interval_seconds=1):
+    """
+    Samples one frame every `interval_seconds` of the video into the frame store
+    `store_id` (see media.frame_store) and returns the store's index.
+    """
+    # Only the frames we keep are decoded (see media.frame_sampler).
+    return create_frame_store(video_path, store_id, rate=1 / interval_seconds)
+
+def _frames_response(index):
+    # Thumbnails are only encoded when a client actually asks for one.
+    store_id = index["store_id"]
+    return jsonify({
+        "message": "Frames extracted successfully",
+        "store_id": store_id,
+        "count": index["count"],
+        "width": index["width"],
+        "height": index["height"],
+        "timestamps": index["timestamps"],
+        "frames": [
+            url_for("snapshots.get_thumbnail", store_id=store_id, position=position)
+            for position in range(index["count"])
+        ],
+    })
 
 @snapshots.route('/extract-frames', methods=['POST'])
 def extract_frames():
-    # Check to see that the vide is sent in the payload.
-    if 'video' not in request.files:
-        return jsonify({"error": "No video file provided"}), 400
-
-    video_file = request.files['video']
     interval_seconds = 1 # We can adjust this to whatever amount needed
-    
-    # Generate a unique filename to avoid conflicts
-    file_extension = os.path.splitext(video_file.filename)[-1]
-    video_filename = f"{uuid.uuid4()}{file_extension}"
-    video_path = os.path.join(UPLOAD_FOLDER, video_filename)
-    video_file.save(video_path)
-    
-    # Open the video file
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        return jsonify({"error": "Could not open video file"}), 500
-    
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    if fps <= 0:
-        cap.release()
-        return jsonify({"error": "Invalid FPS, video might be corrupted"}), 500
-    
-    frame_interval = int(fps * interval_seconds)
-    frame_count = 0
-    saved_count = 0
-    video_frames_folder = os.path.join(OUTPUT_FOLDER, os.path.splitext(video_filename)[0])
-    os.makedirs(video_frames_folder, exist_ok=True)
-    
-    extracted_frames = []
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        if frame_count % frame_interval == 0:
-            frame_filename = os.path.join(video_frames_folder, f"frame_{saved_count:04d}.jpg")
-            cv2.imwrite(frame_filename, frame)
-            extracted_frames.append(frame_filename)
-            saved_count += 1
-        frame_count += 1
-    
-    cap.release()
-    cv2.destroyAllWindows()
-    
-    return jsonify({"message": "Frames extracted successfully", "frames": extracted_frames})
+    maybe_sweep()
+
+    # The frames end up in the frame store, so the upload itself only needs to live
+    # until they are extracted.
+    with tempfile.TemporaryDirectory() as temp_dir:
+        upload = receive_upload(temp_dir)
+        # Check to see that the vide is sent in the payload.
+        if upload["path"] is None:
+            return jsonify({"error": "No video file provided"}), 400
+
+        try:
+            index = extract_frames_from_video(upload["path"], uuid.uuid4().hex, interval_seconds)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 500
+
+    return _frames_response(index)
+
+@snapshots.route('/extract-frames/<media_id>', methods=['POST'])
+def extract_media_frames(media_id):
+    # Frames for a video stored through POST /media are only extracted once.
+    if get_media(media_id) is None:
+        return jsonify({"error": "Unknown media ID"}), 404
+    maybe_sweep()
+
+    def extract(meta):
+        return extract_frames_from_video(meta["path"], media_id)
+
+    try:
+        index = get_artifact(media_id, "frames", extract)
+        if open_frame_store(media_id) is None:
+            # The store expired (media.retention) after the artifact was recorded.
+            drop_artifact(media_id, "frames")
+            index = get_artifact(media_id, "frames", extract)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 500
+
+    return _frames_response(index)
+
+@snapshots.route('/frames/<store_id>', methods=['GET'])
+def get_frame_index(store_id):
+    store = open_frame_store(store_id)
+    if store is None:
+        return jsonify({"error": "Unknown frame store"}), 404
+    return jsonify(store.index)
+
+@snapshots.route('/frames/<store_id>/<int:position>.jpg', methods=['GET'])
+def get_thumbnail(store_id, position):
+    store = open_frame_store(store_id)
+    if store is None or position >= len(store):
+        return jsonify({"error": "Unknown frame"}), 404
+
+    width = request.args.get("width", 160, type=int)
+    return Response(store.thumbnail(position, width), mimetype="image/jpeg",
+                    headers={"Cache-Control": "public, max-age=86400"})
@@ -0,0 +1,130 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import cache, wraps
+
+# The SQLite store under the transcript cache (transcription.transcript_cache) and the
+# LLM response cache (llm.response_cache): texts with a maximum age and a size budget,
+# plus lookup counters that survive restarts. Each cache only adds its key scheme.
+
+
+class SQLiteCache:
+    """
+    A SQLite-backed store of texts on local disk.
+
+    Entries older than max_age seconds are dropped, and once the stored text exceeds
+    max_bytes the least recently used entries are evicted. The counters are persisted
+    alongside the entries so they survive restarts. Subclasses name the file and table,
+    and can add columns (stored between the key and the text) and counters.
+    """
+
+    file_name = "cache.sqlite3"
+    table = "entries"
+    columns = ()
+    indexes = ()
+    counters = ("hits", "misses", "evictions")
+
+    def __init__(self, cache_dir: str, max_bytes: int, max_age: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.db_path = os.path.join(cache_dir, self.file_name)
+
+        os.makedirs(cache_dir, exist_ok=True)
+        extra = "".join(f"{column}, " for column in self.columns)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} (key TEXT PRIMARY KEY, {extra}text TEXT NOT NULL, "
+                "size INTEGER NOT NULL, created REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            for column in ("last_access", *self.indexes):
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_{column} ON {self.table} ({column})")
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.executemany("INSERT OR IGNORE INTO counters VALUES (?, 0)", [(name,) for name in self.counters])
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _lookup(self, conn, key: str, now: float) -> str | None:
+        # The text of a live entry, marked as just used; doesn't touch the counters.
+        row = conn.execute(f"SELECT text, created FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        if row is None or now - row[1] > self.max_age:
+            return None
+        self._touch(conn, key, now)
+        return row[0]
+
+    def _touch(self, conn, key: str, now: float):
+        conn.execute(f"UPDATE {self.table} SET last_access = ? WHERE key = ?", (now, key))
+
+    def _count(self, conn, name: str, amount: int = 1):
+        conn.execute("UPDATE counters SET value = value + ? WHERE name = ?", (amount, name))
+
+    def _store(self, key: str, text: str, columns: tuple = ()):
+        now = time.time()
+        size = len(text.encode("utf-8"))
+        placeholders = ", ".join("?" * (len(columns) + 5))
+        with self._connect() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} VALUES ({placeholders})",
+                (key, *columns, text, size, now, now),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn, now: float):
+        evicted = conn.execute(f"DELETE FROM {self.table} WHERE created < ?", (now - self.max_age,)).rowcount
+
+        total = conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+        if total > self.max_bytes:
+            # Walk entries from least to most recently used until we are under budget.
+            rows = conn.execute(f"SELECT key, size FROM {self.table} ORDER BY last_access").fetchall()
+            stale_keys = []
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                stale_keys.append((key,))
+                total -= size
+            conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", stale_keys)
+            evicted += len(stale_keys)
+
+        if evicted:
+            self._count(conn, "evictions", evicted)
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+            entries, size = conn.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}").fetchone()
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "max_age": self.max_age,
+            **{name: counters[name] for name in self.counters},
+            "hit_rate": counters["hits"] / lookups if lookups else 0.0,
+        }
+
+
+def process_wide(create):
+    """
+    Turns a no-argument factory into a getter that creates the instance on first use and
+    then returns it to every caller. The lock makes sure concurrent first callers share
+    one instance (and its locks).
+    """
+    create = cache(create)
+    guard = threading.Lock()
+
+    @wraps(create)
+    def get():
+        with guard:
+            return create()
+
+    return get
@@ -0,0 +1,10 @@
+from flask import Blueprint, Response
+
+from .metrics import render_metrics
+
+metrics = Blueprint("metrics", __name__)
+
+@metrics.route("/metrics", methods=["GET"])
+def get_metrics():
+    # Prometheus scrape endpoint: stage and request histograms, bytes, frames and tokens.
+    return Response(render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
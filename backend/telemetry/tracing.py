@@ -0,0 +1,154 @@
+import contextvars
+import functools
+import json
+import time
+import uuid
+from contextlib import contextmanager
+
+from flask import g, request
+
+from resources import get_setting
+
+from .metrics import Counter, Histogram
+
+# Lightweight tracing: `with span("whisper", bytes=size):` around each pipeline stage
+# (upload, decode, detection, audio extraction, Whisper, every LLM call) records its
+# duration in a histogram per stage, adds any "bytes" / "frames" attributes to counters,
+# and, while a request is being served, appends the span to that request's trace.
+#
+# The trace lives in a context variable, so spans opened in stage threads (jobs.dag,
+# chunked transcription) land in the right request. With REQUEST_LOG_JSON=1 each
+# request is logged as one JSON line with its spans, after the last byte of the
+# response (so streamed responses are timed to the end).
+REQUEST_LOG_JSON = get_setting("REQUEST_LOG_JSON", False, lambda value: value == "1")
+
+STAGE_SECONDS = Histogram("pitch_stage_seconds", "Time spent in each pipeline stage.", ("stage",))
+STAGE_ERRORS = Counter("pitch_stage_errors_total", "Pipeline stages that raised.", ("stage",))
+STAGE_BYTES = Counter("pitch_stage_bytes_total", "Bytes read by each pipeline stage.", ("stage",))
+STAGE_FRAMES = Counter("pitch_stage_frames_total", "Video frames decoded or scored by each stage.", ("stage",))
+LLM_TOKENS = Counter("pitch_llm_tokens_total", "Tokens reported by the OpenAI API.", ("model", "type"))
+LLM_REQUESTS = Counter("pitch_llm_requests_total", "Chat completions, by whether the cache answered.",
+                       ("model", "cached"))
+HTTP_SECONDS = Histogram("pitch_http_request_seconds", "Time to serve each request, streamed bodies included.",
+                         ("method", "route", "status"))
+
+_trace = contextvars.ContextVar("trace", default=None)
+
+
+class Span:
+    def __init__(self, name: str, attributes: dict):
+        self.name = name
+        self.attributes = attributes
+
+    def set(self, **attributes):
+        """Adds attributes known only once the stage has run, e.g. bytes written."""
+        self.attributes.update(attributes)
+
+
+def record_span(name: str, seconds: float, error: str | None = None, started: float | None = None, **attributes):
+    """
+    Records a stage that was timed elsewhere, e.g. in an attention worker process whose
+    own metrics never reach /metrics.
+    """
+    STAGE_SECONDS.observe(seconds, stage=name)
+    if error is not None:
+        STAGE_ERRORS.inc(stage=name)
+    if attributes.get("bytes"):
+        STAGE_BYTES.inc(attributes["bytes"], stage=name)
+    if attributes.get("frames"):
+        STAGE_FRAMES.inc(attributes["frames"], stage=name)
+
+    trace = _trace.get()
+    if trace is not None:
+        entry = {"name": name, "start": round((started or time.perf_counter() - seconds) - trace["started"], 3),
+                 "seconds": round(seconds, 3), **attributes}
+        if error is not None:
+            entry["error"] = error
+        trace["spans"].append(entry)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Times the block as stage `name`. Yields a Span whose set() adds attributes.
+    """
+    current = Span(name, attributes)
+    started = time.perf_counter()
+    error = None
+    try:
+        yield current
+    except GeneratorExit:
+        # A streamed response the client stopped reading: not the stage's fault.
+        raise
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        record_span(name, time.perf_counter() - started, error, started, **current.attributes)
+
+
+def traced(name: str):
+    """Decorator form of span() for functions that are one stage end to end."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_tokens(model: str, usage):
+    """Adds a completion's `usage` (may be None, e.g. from a stub) to the token counters."""
+    if usage is None:
+        return
+    LLM_TOKENS.inc(getattr(usage, "prompt_tokens", 0) or 0, model=model, type="prompt")
+    LLM_TOKENS.inc(getattr(usage, "completion_tokens", 0) or 0, model=model, type="completion")
+
+
+def init_app(app):
+    """
+    Starts a trace for every request, times it into pitch_http_request_seconds and
+    returns its ID in X-Request-ID (the caller's own X-Request-ID is kept).
+    """
+    @app.before_request
+    def start_trace():
+        g.trace = {
+            "id": request.headers.get("X-Request-ID") or uuid.uuid4().hex,
+            "started": time.perf_counter(),
+            "spans": [],
+        }
+        _trace.set(g.trace)
+
+    @app.after_request
+    def finish_trace(response):
+        trace = g.get("trace")
+        if trace is None:
+            return response
+        response.headers["X-Request-ID"] = trace["id"]
+        method = request.method
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        path = request.path
+        bytes_in = request.content_length
+
+        # Runs once the body has been sent, which for SSE is after the last event; spans
+        # opened while streaming still belong to this request until then.
+        def on_close():
+            _trace.set(None)
+            seconds = time.perf_counter() - trace["started"]
+            HTTP_SECONDS.observe(seconds, method=method, route=route, status=response.status_code)
+            if REQUEST_LOG_JSON:
+                print(json.dumps({
+                    "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                    "request_id": trace["id"],
+                    "method": method,
+                    "path": path,
+                    "route": route,
+                    "status": response.status_code,
+                    "seconds": round(seconds, 3),
+                    "bytes_in": bytes_in,
+                    "spans": trace["spans"],
+                }), flush=True)
+
+        response.call_on_close(on_close)
+        return response
@@ -0,0 +1,198 @@
+import contextvars
+import os
+import re
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from itertools import pairwise
+
+import imageio_ffmpeg
+
+from llm.gateway import call, request_key
+from resources import get_openai_client, get_setting
+from telemetry.tracing import span
+
+from .extractaudio import (
+    AUDIO_SAMPLE_RATE,
+    COPYABLE_CODECS,
+    ENCODE_SETTINGS,
+    probe_audio_stream,
+)
+from .transcript_cache import hash_file
+
+# Long recordings are split at silences into overlapping chunks that are sent to Whisper
+# concurrently, then stitched back together on the chunks' timestamps. This keeps every
+# request well under the 25 MB API limit and turns one long serial call into a few
+# short parallel ones.
+CHUNK_SECONDS = get_setting("TRANSCRIBE_CHUNK_SECONDS", 120.0, float)
+CHUNK_OVERLAP_SECONDS = get_setting("TRANSCRIBE_CHUNK_OVERLAP_SECONDS", 2.0, float)
+MAX_CONCURRENCY = get_setting("TRANSCRIBE_MAX_CONCURRENCY", 4, int)
+MAX_RETRIES = get_setting("TRANSCRIBE_MAX_RETRIES", 4, int)
+# Files at or under both limits still go to Whisper in one request.
+SINGLE_REQUEST_MAX_BYTES = get_setting("TRANSCRIBE_SINGLE_REQUEST_MAX_BYTES", 24 * 1024 * 1024, int)
+SINGLE_REQUEST_MAX_SECONDS = get_setting("TRANSCRIBE_SINGLE_REQUEST_MAX_SECONDS", 180.0, float)
+
+SILENCE_NOISE = "-35dB"
+SILENCE_MIN_SECONDS = 0.3
+# A cut is moved back to the latest silence in the last part of the chunk; if there is
+# none (e.g. music or constant background noise) the chunk is cut at its full length.
+SILENCE_SEARCH_FRACTION = 0.4
+
+DURATION_RE = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+SILENCE_START_RE = re.compile(r"silence_start: (-?\d+(?:\.\d+)?)")
+SILENCE_END_RE = re.compile(r"silence_end: (\d+(?:\.\d+)?)")
+
+
+def probe_duration(audio_file: str) -> float:
+    # ffmpeg exits with an error when given no output; the header on stderr is all we need.
+    result = subprocess.run(
+        [imageio_ffmpeg.get_ffmpeg_exe(), "-hide_banner", "-i", audio_file],
+        capture_output=True, text=True, check=False,
+    )
+    match = DURATION_RE.search(result.stderr)
+    if not match:
+        raise ValueError(f"Could not read the duration of {audio_file}")
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def detect_silences(audio_file: str) -> list:
+    """
+    Returns the midpoints (in seconds) of the silent stretches in `audio_file`, found
+    with ffmpeg's silencedetect filter in one decode pass.
+    """
+    result = subprocess.run(
+        [imageio_ffmpeg.get_ffmpeg_exe(), "-hide_banner", "-nostats", "-i", audio_file, "-vn",
+         "-af", f"silencedetect=noise={SILENCE_NOISE}:d={SILENCE_MIN_SECONDS}", "-f", "null", "-"],
+        capture_output=True, text=True, check=False,
+    )
+    if result.returncode != 0:
+        # Without silences every chunk is simply cut at its full length.
+        return []
+    starts = [max(float(value), 0.0) for value in SILENCE_START_RE.findall(result.stderr)]
+    ends = [float(value) for value in SILENCE_END_RE.findall(result.stderr)]
+    return [(start + end) / 2 for start, end in zip(starts, ends)]
+
+
+def plan_chunks(duration: float, silences: list, chunk_seconds: float = CHUNK_SECONDS,
+                overlap: float = CHUNK_OVERLAP_SECONDS) -> list:
+    """
+    Splits [0, duration] into chunks of at most `chunk_seconds`, cutting at silences
+    where possible. Returns [{"start", "end", "own_start", "own_end"}, ...]: each chunk
+    is transcribed from start to end (which reach `overlap` seconds into its
+    neighbours) but only owns the text between own_start and own_end.
+    """
+    cuts = [0.0]
+    while duration - cuts[-1] > chunk_seconds:
+        latest = cuts[-1] + chunk_seconds
+        earliest = latest - chunk_seconds * SILENCE_SEARCH_FRACTION
+        candidates = [point for point in silences if earliest <= point <= latest]
+        cuts.append(candidates[-1] if candidates else latest)
+    cuts.append(duration)
+
+    return [
+        {
+            "start": max(own_start - overlap, 0.0),
+            "end": min(own_end + overlap, duration),
+            "own_start": own_start,
+            "own_end": own_end,
+        }
+        for own_start, own_end in pairwise(cuts)
+    ]
+
+
+def cut_chunk(audio_file: str, chunk: dict, output_base: str, codec: str | None = None) -> str:
+    """
+    Writes chunk["start"]..chunk["end"] of `audio_file` to `output_base` plus the right
+    extension. Compact codecs are stream-copied: every audio packet can be decoded on
+    its own, so the cut is accurate to one packet (~20 ms) without re-encoding. Anything
+    else is re-encoded to 16 kHz mono Opus.
+    """
+    if codec in COPYABLE_CODECS:
+        output_audio = output_base + COPYABLE_CODECS[codec]
+        codec_args = ["-c:a", "copy"]
+    else:
+        settings = ENCODE_SETTINGS["opus"]
+        output_audio = output_base + settings["extension"]
+        codec_args = ["-ac", "1", "-ar", str(AUDIO_SAMPLE_RATE), *settings["args"]]
+    subprocess.run(
+        [imageio_ffmpeg.get_ffmpeg_exe(), "-v", "error", "-y",
+         "-ss", f"{chunk['start']:.3f}", "-t", f"{chunk['end'] - chunk['start']:.3f}", "-i", audio_file,
+         "-map", "0:a:0", "-vn", *codec_args, output_audio],
+        check=True, capture_output=True,
+    )
+    return output_audio
+
+
+def transcribe_chunk(chunk_file: str, max_retries: int = MAX_RETRIES) -> dict:
+    """
+    Transcribes one chunk with verbose_json output. Rate limits, timeouts and server
+    errors are retried by the gateway (see llm.gateway). Returns {"text", "segments"}.
+    """
+    def create():
+        with open(chunk_file, "rb") as audio:
+            return get_openai_client().audio.transcriptions.create(
+                model="whisper-1",
+                file=audio,
+                response_format="verbose_json",
+            )
+
+    with span("whisper.chunk", bytes=os.path.getsize(chunk_file)):
+        key = request_key("whisper-1", "verbose_json", hash_file(chunk_file))
+        transcription = call("transcription", create, key=key, max_retries=max_retries)
+    segments = [
+        {"start": segment.start, "end": segment.end, "text": segment.text.strip()}
+        for segment in transcription.segments or []
+    ]
+    return {"text": transcription.text, "segments": segments}
+
+
+def stitch_segments(chunks: list, results: list) -> list:
+    """
+    Shifts every chunk's segments onto the recording's timeline and keeps each segment
+    only in the chunk that owns its midpoint, so the overlaps aren't transcribed twice.
+    """
+    segments = []
+    for chunk, result in zip(chunks, results):
+        for segment in result["segments"]:
+            start = chunk["start"] + segment["start"]
+            end = chunk["start"] + segment["end"]
+            if chunk["own_start"] <= (start + end) / 2 < chunk["own_end"] and segment["text"]:
+                segments.append({"start": round(start, 2), "end": round(end, 2), "text": segment["text"]})
+    return segments
+
+
+def transcribe_chunked(audio_file: str, chunk_seconds: float = CHUNK_SECONDS,
+                       max_concurrency: int = MAX_CONCURRENCY) -> dict:
+    """
+    Transcribes `audio_file` in concurrent chunks and returns
+    {"text", "segments": [{"start", "end", "text"}, ...], "chunks": int}.
+    """
+    duration = probe_duration(audio_file)
+    chunks = plan_chunks(duration, detect_silences(audio_file), chunk_seconds)
+    stream = probe_audio_stream(audio_file)
+    codec = stream[0] if stream else None
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        def run(indexed_chunk):
+            index, chunk = indexed_chunk
+            chunk_file = cut_chunk(audio_file, chunk, os.path.join(temp_dir, f"chunk_{index:04d}"), codec)
+            return transcribe_chunk(chunk_file)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(chunks)))) as executor:
+            # Each chunk runs in a copy of the caller's context so its spans join the request's trace.
+            futures = [executor.submit(contextvars.copy_context().run, run, item) for item in enumerate(chunks)]
+            results = [future.result() for future in futures]
+
+    segments = stitch_segments(chunks, results)
+    return {
+        "text": " ".join(segment["text"] for segment in segments),
+        "segments": segments,
+        "chunks": len(chunks),
+    }
+
+
+def needs_chunking(audio_file: str) -> bool:
+    if os.path.getsize(audio_file) > SINGLE_REQUEST_MAX_BYTES:
+        return True
+    return probe_duration(audio_file) > SINGLE_REQUEST_MAX_SECONDS
@@ -1,10 +1,104 @@
+import os
+import re
+import subprocess
+
+import imageio_ffmpeg
 from moviepy import VideoFileClip
 
+from resources import get_setting
+from telemetry.tracing import span
+
+# Audio is extracted by piping the video straight through the ffmpeg binary bundled with
+# imageio-ffmpeg, producing 16 kHz mono audio: that is all Whisper uses, and it is a
+# fraction of the size of a default-bitrate MP3, so the upload to the API is faster too.
+# AUDIO_EXTRACTION_BACKEND=moviepy forces the old moviepy path, which is also the
+# fallback if ffmpeg fails.
+AUDIO_EXTRACTION_BACKEND = get_setting("AUDIO_EXTRACTION_BACKEND", "ffmpeg")
+# "opus" (Ogg/Opus, smallest) or "mp3".
+AUDIO_FORMAT = get_setting("AUDIO_FORMAT", "opus")
+AUDIO_SAMPLE_RATE = 16000
+ENCODE_SETTINGS = {
+    "opus": {"extension": ".ogg", "args": ["-c:a", "libopus", "-b:a", "24k", "-application", "voip", "-compression_level", "5"]},
+    "mp3": {"extension": ".mp3", "args": ["-c:a", "libmp3lame", "-b:a", "32k"]},
+}
+
+# Source codecs Whisper accepts as-is, and the container to copy them into. If the upload
+# already carries one of these at a modest bitrate we skip decoding and re-encoding entirely.
+COPYABLE_CODECS = {"opus": ".ogg", "vorbis": ".ogg", "mp3": ".mp3", "aac": ".m4a"}
+COPY_MAX_KBPS = get_setting("AUDIO_COPY_MAX_KBPS", 96, int)
+
+AUDIO_STREAM_RE = re.compile(r"Stream #\d+:\d+.*?: Audio: (\w+)(.*)")
+BITRATE_RE = re.compile(r"(\d+) kb/s")
+
+
+def probe_audio_stream(video_file):
+    """
+    Returns (codec, kbps) for the first audio stream, kbps being None when the container
+    doesn't report it, or None if there is no audio stream.
+    """
+    # Without an output file ffmpeg always exits with an error after printing the
+    # stream list to stderr, so the return code says nothing here.
+    result = subprocess.run(
+        [imageio_ffmpeg.get_ffmpeg_exe(), "-hide_banner", "-i", video_file],
+        capture_output=True, text=True, check=False,
+    )
+    match = AUDIO_STREAM_RE.search(result.stderr)
+    if not match:
+        return None
+    bitrate = BITRATE_RE.search(match.group(2))
+    return match.group(1), int(bitrate.group(1)) if bitrate else None
+
+
+def _ffmpeg_extract(video_file, output_base):
+    stream = probe_audio_stream(video_file)
+    if stream is None:
+        raise ValueError("Video has no audio track")
+
+    codec, kbps = stream
+    if codec in COPYABLE_CODECS and (kbps is None or kbps <= COPY_MAX_KBPS):
+        output_audio = output_base + COPYABLE_CODECS[codec]
+        codec_args = ["-c:a", "copy"]
+    else:
+        settings = ENCODE_SETTINGS[AUDIO_FORMAT]
+        output_audio = output_base + settings["extension"]
+        codec_args = ["-ac", "1", "-ar", str(AUDIO_SAMPLE_RATE), *settings["args"]]
+
+    subprocess.run(
+        [imageio_ffmpeg.get_ffmpeg_exe(), "-v", "error", "-y", "-i", video_file,
+         "-map", "0:a:0", "-vn", *codec_args, output_audio],
+        check=True, capture_output=True,
+    )
+    return output_audio
+
+
+def _moviepy_extract(video_file, output_base):
+    output_audio = output_base + ".mp3"
+    clip = VideoFileClip(video_file)
+    clip.audio.write_audiofile(output_audio)
+    clip.close()
+    return output_audio
+
+
 def extract_audio_from_file(video_file, output_audio):
+    """
+    Extracts the audio track of `video_file` next to `output_audio`. The extension of
+    `output_audio` is replaced by the one matching the format actually written, and the
+    resulting path is returned (None if extraction failed).
+    """
+    output_base = os.path.splitext(output_audio)[0]
     try:
-        clip = VideoFileClip(video_file)
-        clip.audio.write_audiofile(output_audio)
-        clip.close()
+        with span("audio.extract", bytes=os.path.getsize(video_file)) as stage:
+            if AUDIO_EXTRACTION_BACKEND == "ffmpeg":
+                try:
+                    output_audio = _ffmpeg_extract(video_file, output_base)
+                except (subprocess.CalledProcessError, KeyError) as e:
+                    print(f"ffmpeg audio extraction failed ({e}), falling back to moviepy")
+                    output_audio = _moviepy_extract(video_file, output_base)
+            else:
+                output_audio = _moviepy_extract(video_file, output_base)
+            stage.set(output_bytes=os.path.getsize(output_audio))
         print(f"Audio successfully extracted to {output_audio}")
+        return output_audio
     except Exception as e:
-        print(f"Error extracting audio: {e}")
\ No newline at end of file
+        print(f"Error extracting audio: {e}")
+        return None
@@ -2,15 +2,42 @@ import os
 import tempfile
 from .extractaudio import extract_audio_from_file
 from .speechtotext import transcribe_audio
+from .transcript_cache import get_transcript_cache, hash_file
+from telemetry.tracing import traced
 
-def get_transcription(video_path: str) -> str:
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_audio:
-         audio_path = temp_audio.name
-    try:
-         extract_audio_from_file(video_path, audio_path)
-         result = transcribe_audio(audio_path)
-         transcript_text = getattr(result, "text", None) or result.get("text", "")
+def is_transcribed(content_hash: str) -> bool:
+     # True when get_transcription would answer from the cache without touching the audio.
+     cache = get_transcript_cache()
+     return cache.contains(cache.make_key(content_hash))
+
+def _transcript_text(result) -> str:
+     # Chunked transcriptions come back as dicts, single Whisper calls as the API object.
+     return (result["text"] if isinstance(result, dict) else result.text) or ""
+
+@traced("transcription")
+def get_transcription(video_path: str, content_hash: str | None = None, audio_path_provider=None) -> str:
+    # Check the content-addressed cache first so the same upload is only transcribed once,
+    # however many endpoints ask for it.
+    cache = get_transcript_cache()
+    key = cache.make_key(content_hash or hash_file(video_path))
+    with cache.lock(key):
+         cached_text = cache.get(key)
+         if cached_text is not None:
+              return cached_text
+
+         # Reuse an already extracted audio track when the caller can provide one (e.g. a stored
+         # media upload). It is only asked for on a cache miss.
+         if audio_path_provider is not None:
+              result = transcribe_audio(audio_path_provider())
+              transcript_text = _transcript_text(result)
+         else:
+              with tempfile.TemporaryDirectory() as temp_dir:
+                   audio_path = extract_audio_from_file(video_path, os.path.join(temp_dir, "audio"))
+                   if audio_path is None:
+                        raise ValueError("Could not extract audio from the video")
+                   result = transcribe_audio(audio_path)
+                   transcript_text = _transcript_text(result)
+
+         if transcript_text:
+              cache.put(key, transcript_text)
          return transcript_text
-    finally:
-         if os.path.exists(audio_path):
-              os.remove(audio_path)
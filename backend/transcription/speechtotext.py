@@ -1,28 +1,26 @@
 import os
-import sys
-from dotenv import load_dotenv
-from openai import OpenAI
-
-root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
-dotenv_path = os.path.join(root_dir, ".env")
-load_dotenv(dotenv_path)
-
-openai_api_key = os.getenv("OPENAI_API_KEY")
-if not openai_api_key:
-    print("Error: OPENAI_API_KEY not found in .env file.")
-    sys.exit(1)
-
-client = OpenAI(api_key=openai_api_key)
+from resources import get_openai_client
+from llm.gateway import call, request_key
+from telemetry.tracing import span
+from .chunked_transcription import needs_chunking, transcribe_chunked
+from .transcript_cache import hash_file
 
 def transcribe_audio(audio_file):
-    try:
+    """
+    Transcribes an audio file with Whisper. API errors that outlast the gateway's
+    retries (see llm.gateway) are raised to the caller.
+    """
+    # Long or large recordings are split and transcribed concurrently; the result is a
+    # dict with "text" (and timestamped "segments") instead of the API object.
+    if needs_chunking(audio_file):
+        return transcribe_chunked(audio_file)
+
+    def create():
         with open(audio_file, "rb") as audio:
-            transcription = client.audio.transcriptions.create(
+            return get_openai_client().audio.transcriptions.create(
                 model="whisper-1",
                 file=audio
             )
-        return transcription
-    except Exception as e:
-        print(f"Error transcribing audio: {e}")
-        sys.exit(1)
 
+    with span("whisper", bytes=os.path.getsize(audio_file)):
+        return call("transcription", create, key=request_key("whisper-1", hash_file(audio_file)))
@@ -0,0 +1,96 @@
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from resources import get_setting
+from sqlite_cache import SQLiteCache, process_wide
+
+root_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Transcripts are keyed by model + a SHA-256 of the uploaded file, so the same
+# video uploaded to several endpoints is only ever sent to Whisper once.
+TRANSCRIPTION_MODEL = "whisper-1"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path: str) -> str:
+    """
+    Returns the SHA-256 hex digest of a file, read in 1 MB chunks so large
+    videos are never loaded into memory at once.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TranscriptCache(SQLiteCache):
+    """
+    A small transcript cache on local disk (see sqlite_cache.SQLiteCache for the
+    expiry, size budget and counters), with a per-key lock so a transcript is only
+    requested once at a time.
+    """
+
+    file_name = "transcripts.sqlite3"
+    table = "transcripts"
+
+    def __init__(self, cache_dir: str, max_bytes: int, max_age: int):
+        super().__init__(cache_dir, max_bytes, max_age)
+        # key -> [lock, number of threads holding or waiting for it]
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    @staticmethod
+    def make_key(content_hash: str) -> str:
+        return f"{TRANSCRIPTION_MODEL}:{content_hash}"
+
+    @contextmanager
+    def lock(self, key: str):
+        """
+        Serialises work on a single key within this process, so two endpoints
+        receiving the same upload at once wait for one transcription instead of
+        running two. A key's lock only exists while some thread holds or waits for it.
+        """
+        with self._locks_guard:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._locks_guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[key]
+
+    def get(self, key: str) -> str | None:
+        with self._connect() as conn:
+            text = self._lookup(conn, key, time.time())
+            self._count(conn, "misses" if text is None else "hits")
+            return text
+
+    def contains(self, key: str) -> bool:
+        # Like get() but doesn't count as a lookup, for callers deciding whether to prepare work.
+        with self._connect() as conn:
+            row = conn.execute("SELECT created FROM transcripts WHERE key = ?", (key,)).fetchone()
+        return row is not None and time.time() - row[0] <= self.max_age
+
+    def put(self, key: str, text: str):
+        self._store(key, text)
+
+
+@process_wide
+def get_transcript_cache() -> TranscriptCache:
+    """
+    Returns the process-wide transcript cache, creating it on first use.
+    Configured through TRANSCRIPT_CACHE_DIR, TRANSCRIPT_CACHE_MAX_BYTES and
+    TRANSCRIPT_CACHE_MAX_AGE (seconds).
+    """
+    return TranscriptCache(
+        cache_dir=get_setting("TRANSCRIPT_CACHE_DIR", os.path.join(root_dir, "cache", "transcripts")),
+        max_bytes=get_setting("TRANSCRIPT_CACHE_MAX_BYTES", 50 * 1024 * 1024, int),
+        max_age=get_setting("TRANSCRIPT_CACHE_MAX_AGE", 7 * 24 * 60 * 60, int),
+    )
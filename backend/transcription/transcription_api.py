@@ -1,25 +1,41 @@
-from flask import Blueprint, request, jsonify
-import os
 import tempfile
+
+from flask import Blueprint, jsonify
+
+from media.media_store import get_media, get_transcript
+from media.upload_stream import receive_upload
+
 from .get_transcription import get_transcription
+from .transcript_cache import get_transcript_cache
 
 transcription = Blueprint("transcription", __name__)
 
 @transcription.route("/transcribe", methods=["POST"])
 def transcribe():
-    if "video" not in request.files:
-        return {"error": "No video file provided"}, 400
+    with tempfile.TemporaryDirectory() as temp_dir:
+        upload = receive_upload(temp_dir)
+        if upload["path"] is None:
+            return {"error": "No video file provided"}, 400
 
-    video_file = request.files["video"]
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as temp_video:
-        video_path = temp_video.name
-        video_file.save(video_path)
+        try:
+            transcription_text = get_transcription(upload["path"], content_hash=upload["sha256"])
+        except Exception as e:  # noqa: BLE001
+            return jsonify({"error": str(e)}), 500
+
+    return jsonify({"transcription": transcription_text})
+
+@transcription.route("/transcribe/<media_id>", methods=["POST"])
+def transcribe_media(media_id):
+    if get_media(media_id) is None:
+        return jsonify({"error": "Unknown media ID"}), 404
 
     try:
-        transcription_text = get_transcription(video_path)
-    except Exception as e:
+        transcription_text = get_transcript(media_id)
+    except Exception as e:  # noqa: BLE001
         return jsonify({"error": str(e)}), 500
-    finally:
-        os.remove(video_path)
 
     return jsonify({"transcription": transcription_text})
+
+@transcription.route("/cache-stats", methods=["GET"])
+def cache_stats():
+    return jsonify(get_transcript_cache().stats())